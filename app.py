@@ -2,89 +2,150 @@
 
 import argparse
 import logging
-from typing import List, Tuple
-
-import gradio as gr
+from typing import List, Optional, Tuple
 
 from src.config import (
     API_KEY_ENV_VAR,
     BATCH_SIZE,
     BATCH_WAIT_TIME,
-    CHAT_MODEL,
     CHROMA_DB_PATH,
-    EMBEDDING_MODEL,
+    CHUNK_SENTENCES,
+    CHUNK_STRIDE_SENTENCES,
+    PROFILE_SAMPLE_RATE,
+    REVIEW_METADATA_COLUMNS,
     REVIEWS_CSV_PATH,
-    TOP_K_RETRIEVAL,
 )
+from src.chunking import SentenceWindowChunker
 from src.data_loader import ReviewDataLoader
 from src.embeddings import BatchEmbeddingProcessor
-from src.rag_chain import RAGChainConfig, ReviewRAGChain
+from src.profiling import Profiler, create_profiler
+from src.rag_chain import ReviewRAGChain
+from src.service import (
+    build_index_version,
+    create_rag_chain,
+    create_vector_store_manager,
+    export_topic_clusters,
+    get_index_versions,
+    load_serving_store,
+    set_shared_rag_chain,
+    watch_index_versions,
+)
 from src.utils import ensure_directory, get_api_key, setup_logging
-from src.vectorstore import VectorStoreManager
 
 logger = logging.getLogger(__name__)
 
+ALL_HOSPITALS = "All hospitals"
+ANSWER_MODE_CHOICES = {"Generated answer": "generative", "Quotes from reviews (instant)": "extractive"}
 
-def setup_vector_database(api_key: str, recreate: bool = False):
-    """Set up or load the vector database."""
-    vector_store_manager = VectorStoreManager(
-        persist_directory=CHROMA_DB_PATH,
-        embedding_model=EMBEDDING_MODEL,
-        api_key=api_key,
-    )
 
-    if recreate or not CHROMA_DB_PATH.exists():
+def setup_vector_database(api_key: str, recreate: bool = False, use_snapshot: bool = True):
+    """Set up or load the vector database, returning it with its topic clusters and published index version."""
+    versions = get_index_versions()
+    version = versions.current()
+
+    if recreate or (version is None and not CHROMA_DB_PATH.exists()):
         logger.info("Creating new vector store...")
-        data_loader = ReviewDataLoader(csv_path=REVIEWS_CSV_PATH)
+        data_loader = ReviewDataLoader(csv_path=REVIEWS_CSV_PATH, metadata_columns=REVIEW_METADATA_COLUMNS)
         reviews = data_loader.load_reviews()
+        if CHUNK_SENTENCES:
+            reviews = SentenceWindowChunker(CHUNK_SENTENCES, CHUNK_STRIDE_SENTENCES).split_documents(reviews)
 
         batch_processor = BatchEmbeddingProcessor(
             batch_size=BATCH_SIZE,
             wait_time=BATCH_WAIT_TIME,
         )
-        vector_db = batch_processor.process_documents_in_batches(
-            documents=reviews,
-            vector_store_manager=vector_store_manager,
-        )
+        with build_index_version(api_key) as vector_store_manager:
+            vector_db = batch_processor.process_documents_in_batches(
+                documents=reviews,
+                vector_store_manager=vector_store_manager,
+            )
+            if use_snapshot:
+                vector_store_manager.export_snapshot(vector_db)
+                vector_db = vector_store_manager.load_snapshot()
+            export_topic_clusters(vector_store_manager, vector_db)
+        version = versions.current()
     else:
         logger.info("Loading existing vector store...")
-        vector_db = vector_store_manager.load_vector_store()
+        vector_store_manager = create_vector_store_manager(api_key, versions.directory(version) if version else None)
+        vector_db = load_serving_store(vector_store_manager, use_snapshot=use_snapshot)
         if vector_db is None:
             raise RuntimeError(
                 "Vector store not found. Run `python build_vectorstore.py` or start the app with --recreate-db."
             )
 
-    return vector_db
+    return vector_db, vector_store_manager.load_topics(), version
 
 
-def build_chatbot(api_key: str, recreate_db: bool = False):
+def build_chatbot(
+    api_key: str,
+    recreate_db: bool = False,
+    use_snapshot: bool = True,
+    profiler: Optional[Profiler] = None,
+):
     """Build the complete RAG chatbot."""
     ensure_directory(CHROMA_DB_PATH.parent)
 
-    vector_store = setup_vector_database(api_key, recreate=recreate_db)
+    vector_store, topics, version = setup_vector_database(api_key, recreate=recreate_db, use_snapshot=use_snapshot)
 
-    rag_config = RAGChainConfig(
-        chat_model=CHAT_MODEL,
-        api_key=api_key,
-        top_k=TOP_K_RETRIEVAL,
-    )
-    rag_chain = ReviewRAGChain(vector_store=vector_store, config=rag_config)
+    rag_chain = create_rag_chain(api_key, vector_store, profiler=profiler, index_version=version, topics=topics)
+    watch_index_versions(rag_chain, api_key, use_snapshot=use_snapshot)
+    set_shared_rag_chain(rag_chain)
     return rag_chain
 
 
-def respond_to_user_question(question: str, history: List[Tuple[str, str]], rag_chain: ReviewRAGChain) -> str:
-    """Process user questions and return responses."""
+def respond_to_user_question(
+    question: str,
+    history: List[Tuple[str, str]],
+    rag_chain: ReviewRAGChain,
+    hospital: Optional[str] = None,
+    session_id: Optional[str] = None,
+    mode: Optional[str] = None,
+) -> str:
+    """Process user questions and return responses, keeping conversation context per session."""
     try:
-        return rag_chain.answer_question(question)
+        selected = hospital if hospital and hospital != ALL_HOSPITALS else None
+        mode = ANSWER_MODE_CHOICES.get(mode, mode)
+        if session_id is None:
+            return rag_chain.answer_question(question, hospital=selected, mode=mode)
+        return rag_chain.answer_in_session(session_id, question, hospital=selected, history=history, mode=mode)
     except Exception as e:
         logger.error(f"Error processing question: {e}", exc_info=True)
         return f"Sorry, I encountered an error: {str(e)}"
 
 
-def launch_gradio_interface(rag_chain: ReviewRAGChain, share: bool = False):
-    """Launch the Gradio chat interface."""
+def launch_gradio_interface(rag_chain: ReviewRAGChain, share: bool = False, with_api: bool = False):
+    """Launch the Gradio chat interface, optionally alongside the HTTP API on the same port."""
+    import gradio as gr
+
+    additional_inputs = [
+        gr.Radio(
+            choices=list(ANSWER_MODE_CHOICES),
+            value=next(label for label, mode in ANSWER_MODE_CHOICES.items() if mode == rag_chain.config.answer_mode),
+            label="Answer mode",
+        )
+    ]
+    if rag_chain.available_partitions:
+        additional_inputs.append(
+            gr.Dropdown(
+                choices=[ALL_HOSPITALS] + rag_chain.available_partitions,
+                value=ALL_HOSPITALS,
+                label="Hospital",
+            )
+        )
+
+    def respond(
+        question: str,
+        history: List[Tuple[str, str]],
+        mode: Optional[str] = None,
+        hospital: Optional[str] = None,
+        request: gr.Request = None,
+    ) -> str:
+        session_id = request.session_hash if request is not None else None
+        return respond_to_user_question(question, history, rag_chain, hospital, session_id, mode)
+
     interface = gr.ChatInterface(
-        fn=lambda question, history: respond_to_user_question(question, history, rag_chain),
+        fn=respond,
+        additional_inputs=additional_inputs,
         title="🏥 Hospital Review Assistant",
         description="Ask questions about patient experiences at hospitals based on real reviews.",
         examples=[
@@ -96,6 +157,16 @@ def launch_gradio_interface(rag_chain: ReviewRAGChain, share: bool = False):
         theme=gr.themes.Soft(),
     )
 
+    if with_api:
+        import uvicorn
+
+        from src.api import create_api
+
+        api = gr.mount_gradio_app(create_api(rag_chain), interface, path="/ui")
+        logger.info("Serving the HTTP API at / and the chat UI at /ui")
+        uvicorn.run(api, host="0.0.0.0", port=7860)
+        return
+
     interface.launch(share=share, server_name="0.0.0.0", server_port=7860)
 
 
@@ -107,11 +178,32 @@ def main():
         action="store_true",
         help="Recreate the vector database from scratch",
     )
+    parser.add_argument(
+        "--no-snapshot",
+        action="store_true",
+        help="Serve from the Chroma store instead of the memory-mapped index snapshot",
+    )
     parser.add_argument(
         "--share",
         action="store_true",
         help="Create a public share link for the Gradio interface",
     )
+    parser.add_argument(
+        "--with-api",
+        action="store_true",
+        help="Also serve the HTTP/JSON API (/retrieve, /answer, /answer/stream) from the same server",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Capture cProfile stats, flame-graph stacks and tracemalloc snapshots to reports/profiles/",
+    )
+    parser.add_argument(
+        "--profile-sample-rate",
+        type=float,
+        default=None,
+        help=f"Fraction of questions to profile (default: {PROFILE_SAMPLE_RATE})",
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
@@ -126,9 +218,14 @@ def main():
 
     try:
         api_key = get_api_key(API_KEY_ENV_VAR)
-        rag_chain = build_chatbot(api_key, recreate_db=args.recreate_db)
+        rag_chain = build_chatbot(
+            api_key,
+            recreate_db=args.recreate_db,
+            use_snapshot=not args.no_snapshot,
+            profiler=create_profiler(args.profile, args.profile_sample_rate),
+        )
         logger.info("Chatbot initialized successfully")
-        launch_gradio_interface(rag_chain, share=args.share)
+        launch_gradio_interface(rag_chain, share=args.share, with_api=args.with_api)
     except Exception as e:
         logger.error(f"Failed to start chatbot: {e}", exc_info=True)
         raise
@@ -1,24 +1,163 @@
 """Standalone script to build and save the vector database."""
 
 import argparse
+import json
 import logging
+import shutil
 
 from src.config import (
     API_KEY_ENV_VAR,
     BATCH_SIZE,
     BATCH_WAIT_TIME,
-    CHROMA_DB_PATH,
+    CHUNK_SENTENCES,
+    CHUNK_STRIDE_SENTENCES,
+    DATA_VALIDATION_REPORT_PATH,
+    DEDUP_BANDS,
+    DEDUP_NUM_PERM,
+    DEDUP_REPORT_PATH,
+    DEDUP_SCOPE,
+    DEDUP_THRESHOLD,
     EMBEDDING_MODEL,
+    INDEX_ROOT,
+    PROFILE_SAMPLE_RATE,
+    PARTITION_KEY,
+    REVIEW_METADATA_COLUMNS,
     REVIEWS_CSV_PATH,
+    TOPIC_CLUSTERS,
 )
+from src.chunking import SentenceWindowChunker
 from src.data_loader import ReviewDataLoader
+from src.dedup import NearDuplicateDetector, deduplicate_documents
 from src.embeddings import BatchEmbeddingProcessor
+from src.profiling import create_profiler
+from src.service import build_index_version, export_topic_clusters, get_index_versions
+from src.sharding import ShardedIndexBuilder, ShardedVectorStore
 from src.utils import ensure_directory, get_api_key, setup_logging
+from src.validation import validate_reviews_csv
 from src.vectorstore import VectorStoreManager
 
 logger = logging.getLogger(__name__)
 
 
+def build_sharded(api_key: str, vector_store_manager: VectorStoreManager, args):
+    """Build the index as parallel review-id shards, then merge or keep the sharded layout."""
+    merge = args.shard_layout == "merged"
+    persist_directory = vector_store_manager.persist_directory
+    shard_directory = persist_directory.with_name(f"{persist_directory.name}_shards") if merge else persist_directory
+
+    builder = ShardedIndexBuilder(
+        csv_path=REVIEWS_CSV_PATH,
+        output_directory=shard_directory,
+        embedding_model=EMBEDDING_MODEL,
+        api_key=api_key,
+        num_shards=args.shards,
+        num_workers=args.workers,
+        batch_size=BATCH_SIZE,
+        wait_time=BATCH_WAIT_TIME,
+        dedup=args.dedup,
+        dedup_scope=dedup_scope(args),
+    )
+    builder.build()
+    if builder.dedup_report is not None:
+        write_dedup_report(builder.dedup_report)
+
+    if not merge:
+        return None
+
+    vector_db = vector_store_manager.create_from_shards(shard_directory)
+    shutil.rmtree(shard_directory)
+    return vector_db
+
+
+def run_preflight_check():
+    """Validate the reviews CSV before any embedding calls are made."""
+    report = validate_reviews_csv(REVIEWS_CSV_PATH, report_path=DATA_VALIDATION_REPORT_PATH)
+    logger.info(
+        f"Pre-flight check: {report.rows} rows, ~{report.estimated_tokens} tokens "
+        f"in {report.estimated_embedding_calls} embedding calls"
+    )
+    if not report.ok:
+        found = ", ".join(f"{issue}={value}" for issue, value in report.issues.items() if value)
+        raise ValueError(
+            f"Pre-flight data check failed ({found}); see {DATA_VALIDATION_REPORT_PATH} "
+            "or pass --skip-validation to build anyway"
+        )
+
+
+def dedup_scope(args):
+    """Metadata key near-duplicates must share to be merged; partitions must stay pure."""
+    if args.partition_by:
+        return args.partition_by
+    return None if args.dedup_across_hospitals else DEDUP_SCOPE
+
+
+def remove_near_duplicates(reviews, scope_key=None):
+    """Keep one review per near-duplicate cluster and write the savings report."""
+    detector = NearDuplicateDetector(threshold=DEDUP_THRESHOLD, num_perm=DEDUP_NUM_PERM, bands=DEDUP_BANDS)
+    unique_reviews, report = deduplicate_documents(reviews, detector, scope_key=scope_key, batch_size=BATCH_SIZE)
+    write_dedup_report(report)
+    return unique_reviews
+
+
+def write_dedup_report(report):
+    """Write the near-duplicate savings report and log them."""
+    ensure_directory(DEDUP_REPORT_PATH.parent)
+    DEDUP_REPORT_PATH.write_text(json.dumps(report.to_dict(), indent=2))
+    logger.info(
+        f"Skipping {report.duplicates_removed} near-duplicate reviews: "
+        f"{report.embedding_calls_saved} embedding calls and {report.index_entries_saved} index entries saved "
+        f"(report: {DEDUP_REPORT_PATH})"
+    )
+
+
+def build_index(api_key: str, vector_store_manager: VectorStoreManager, args):
+    """Embed the reviews into the new index version managed by ``vector_store_manager``."""
+    if args.shards > 1:
+        vector_db = build_sharded(api_key, vector_store_manager, args)
+    else:
+        data_loader = ReviewDataLoader(csv_path=REVIEWS_CSV_PATH, metadata_columns=REVIEW_METADATA_COLUMNS)
+        reviews = data_loader.load_reviews()
+        if args.dedup:
+            reviews = remove_near_duplicates(reviews, scope_key=dedup_scope(args))
+        if args.chunk_sentences:
+            review_count = len(reviews)
+            reviews = SentenceWindowChunker(args.chunk_sentences, args.chunk_stride).split_documents(reviews)
+            logger.info(f"Split {review_count} reviews into {len(reviews)} sentence-window chunks")
+
+        batch_processor = BatchEmbeddingProcessor(
+            batch_size=BATCH_SIZE,
+            wait_time=BATCH_WAIT_TIME,
+            profiler=create_profiler(args.profile, args.profile_sample_rate),
+        )
+
+        if args.partition_by:
+            vector_db = vector_store_manager.create_partitioned_vector_store(
+                documents=reviews,
+                partition_key=args.partition_by,
+                batch_processor=batch_processor,
+            )
+        else:
+            vector_db = batch_processor.process_documents_in_batches(
+                documents=reviews,
+                vector_store_manager=vector_store_manager,
+            )
+
+    logger.info(f"Vector database created successfully at {vector_store_manager.persist_directory}")
+
+    if vector_db is None or isinstance(vector_db, ShardedVectorStore):
+        logger.info("Sharded layout kept; shards are searched in parallel and no snapshot or topics are published")
+        return
+
+    if not args.no_snapshot:
+        snapshot_path = vector_store_manager.export_snapshot(vector_db)
+        logger.info(f"Index snapshot published at {snapshot_path}")
+        vector_db = vector_store_manager.load_snapshot()
+
+    if args.topics:
+        topics_path = export_topic_clusters(vector_store_manager, vector_db, clusters=args.topics)
+        logger.info(f"{args.topics} topic clusters for aggregate questions written to {topics_path}")
+
+
 def main():
     """Build the vector store from scratch."""
     parser = argparse.ArgumentParser(description="Build the vector database for the RAG chatbot")
@@ -28,36 +167,122 @@ def main():
         choices=["DEBUG", "INFO", "WARNING", "ERROR"],
         help="Set the logging level",
     )
+    parser.add_argument(
+        "--no-snapshot",
+        action="store_true",
+        help="Skip publishing the memory-mapped index snapshot",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="Partition the corpus by review_id range and build this many shards in parallel",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for a sharded build (defaults to one per shard)",
+    )
+    parser.add_argument(
+        "--shard-layout",
+        default="merged",
+        choices=["merged", "sharded"],
+        help="Merge shards into one store, or keep them as separately searched collections",
+    )
+    parser.add_argument(
+        "--partition-by",
+        nargs="?",
+        const=PARTITION_KEY,
+        default=None,
+        help=f"Build one collection per value of a metadata column (default column: {PARTITION_KEY})",
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help=(
+            "Embed one representative per cluster of near-duplicate reviews (MinHash + LSH); "
+            "with --shards, duplicates are found across all shards"
+        ),
+    )
+    parser.add_argument(
+        "--dedup-across-hospitals",
+        action="store_true",
+        help=f"With --dedup, also merge near-duplicates from different hospitals (default: within {DEDUP_SCOPE})",
+    )
+    parser.add_argument(
+        "--chunk-sentences",
+        type=int,
+        default=CHUNK_SENTENCES,
+        help="Index overlapping windows of this many sentences, pointing to their parent review; 0 indexes "
+        f"whole reviews (default: {CHUNK_SENTENCES})",
+    )
+    parser.add_argument(
+        "--chunk-stride",
+        type=int,
+        default=None,
+        help=f"Sentences between the starts of consecutive chunks, at most --chunk-sentences (default: "
+        f"{CHUNK_STRIDE_SENTENCES}, capped at --chunk-sentences)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Capture cProfile stats, flame-graph stacks and tracemalloc snapshots to reports/profiles/",
+    )
+    parser.add_argument(
+        "--profile-sample-rate",
+        type=float,
+        default=None,
+        help=f"Fraction of embedding batches to profile (default: {PROFILE_SAMPLE_RATE})",
+    )
+    parser.add_argument(
+        "--skip-validation",
+        action="store_true",
+        help="Skip the pre-flight data check of the reviews CSV",
+    )
+    parser.add_argument(
+        "--topics",
+        type=int,
+        default=TOPIC_CLUSTERS,
+        help=f"Topic clusters precomputed for aggregate questions; 0 skips the stage (default: {TOPIC_CLUSTERS})",
+    )
+    parser.add_argument(
+        "--rollback",
+        metavar="VERSION",
+        help=f"Re-publish a retained index version (see {INDEX_ROOT}/versions) instead of building",
+    )
     args = parser.parse_args()
+    if args.partition_by and args.shards > 1:
+        parser.error("--partition-by cannot be combined with --shards")
+    if args.chunk_sentences and args.shards > 1:
+        parser.error("--chunk-sentences cannot be combined with --shards")
+    if args.chunk_stride is None:
+        args.chunk_stride = min(CHUNK_STRIDE_SENTENCES, args.chunk_sentences or CHUNK_STRIDE_SENTENCES)
+    elif args.chunk_stride < 1 or (args.chunk_sentences and args.chunk_stride > args.chunk_sentences):
+        parser.error("--chunk-stride must be between 1 and --chunk-sentences, or sentences would be skipped")
+    if args.profile and args.shards > 1:
+        parser.error("--profile cannot be combined with --shards (batches run in worker processes)")
 
     setup_logging(getattr(logging, args.log_level))
 
+    if args.rollback:
+        get_index_versions().publish(args.rollback)
+        logger.info(f"Serving processes will switch to index version {args.rollback} on their next poll")
+        return
+
     try:
         api_key = get_api_key(API_KEY_ENV_VAR)
         logger.info("Starting vector database build process")
 
-        ensure_directory(CHROMA_DB_PATH.parent)
+        if not args.skip_validation:
+            run_preflight_check()
 
-        data_loader = ReviewDataLoader(csv_path=REVIEWS_CSV_PATH)
-        reviews = data_loader.load_reviews()
+        ensure_directory(INDEX_ROOT)
 
-        vector_store_manager = VectorStoreManager(
-            persist_directory=CHROMA_DB_PATH,
-            embedding_model=EMBEDDING_MODEL,
-            api_key=api_key,
-        )
-
-        batch_processor = BatchEmbeddingProcessor(
-            batch_size=BATCH_SIZE,
-            wait_time=BATCH_WAIT_TIME,
-        )
-
-        vector_db = batch_processor.process_documents_in_batches(
-            documents=reviews,
-            vector_store_manager=vector_store_manager,
-        )
+        with build_index_version(api_key) as vector_store_manager:
+            build_index(api_key, vector_store_manager, args)
 
-        logger.info(f"Vector database created successfully at {CHROMA_DB_PATH}")
+        logger.info(f"Index version {get_index_versions().current()} published; running apps will swap to it")
         logger.info("You can now run 'python app.py' to start the chatbot")
 
     except Exception as e:
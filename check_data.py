@@ -1,55 +1,96 @@
 """Utility script to check data integrity and structure."""
 
+import argparse
 import logging
+import sys
+from pathlib import Path
 
-import pandas as pd
-
-from src.config import REVIEWS_CSV_PATH
+from src.config import DATA_VALIDATION_REPORT_PATH, REVIEWS_CSV_PATH
 from src.utils import setup_logging
+from src.validation import validate_reviews_csv
 
 logger = logging.getLogger(__name__)
 
 
-def main():
-    """Check data file integrity."""
-    setup_logging()
+def print_report(report):
+    """Print a human-readable summary of a DataValidationReport."""
+    print("\n" + "=" * 80)
+    print("DATA INTEGRITY CHECK")
+    print("=" * 80)
 
-    logger.info("Checking data integrity...")
+    print(f"\n✅ File exists: {report.path}")
+    print(f"✅ Total rows: {report.rows}")
+    print(f"✅ Total columns: {len(report.columns)}")
 
-    if not REVIEWS_CSV_PATH.exists():
-        logger.error(f"Data file not found at {REVIEWS_CSV_PATH}")
-        return
+    print("\n📊 Column Information:")
+    print("-" * 80)
+    for col, stats in report.column_stats.items():
+        print(f"  {col:20s}: {stats['non_null']:5d} non-null values ({stats['missing']} missing)")
 
-    try:
-        df = pd.read_csv(REVIEWS_CSV_PATH)
+    if report.review_length:
+        length = report.review_length
+        print("\n📏 Review Length (characters):")
+        print("-" * 80)
+        print(f"  min {length['min']}, mean {length['mean']}, max {length['max']}")
+        for bucket in length["histogram"]:
+            if bucket["count"]:
+                upper = bucket["max_chars"] if bucket["max_chars"] is not None else "+"
+                print(f"  {bucket['min_chars']:>6}-{upper:<6}: {bucket['count']}")
 
-        print("\n" + "=" * 80)
-        print("DATA INTEGRITY CHECK")
-        print("=" * 80)
+    print("\n💰 Embedding Cost Estimate:")
+    print("-" * 80)
+    print(f"  ~{report.estimated_tokens} tokens in {report.estimated_embedding_calls} embedding calls")
 
-        print(f"\n✅ File exists: {REVIEWS_CSV_PATH}")
-        print(f"✅ Total rows: {len(df)}")
-        print(f"✅ Total columns: {len(df.columns)}")
+    print("\n🔎 Ingestion Issues:")
+    print("-" * 80)
+    for issue, value in report.issues.items():
+        marker = "❌" if value else "✅"
+        examples = report.examples.get(issue)
+        detail = f" (e.g. {', '.join(map(str, examples[:5]))})" if value and examples else ""
+        print(f"  {marker} {issue:20s}: {value}{detail}")
 
-        print("\n📊 Column Information:")
-        print("-" * 80)
-        for col in df.columns:
-            non_null = df[col].notna().sum()
-            null_count = df[col].isna().sum()
-            print(f"  {col:20s}: {non_null:5d} non-null values ({null_count} missing)")
+    print("\n📝 Sample Reviews:")
+    print("-" * 80)
+    for i, review in enumerate(report.samples, 1):
+        preview = review[:100] + "..." if len(review) > 100 else review
+        print(f"  {i}. {preview}\n")
 
-        print("\n📝 Sample Reviews:")
-        print("-" * 80)
-        if "review" in df.columns:
-            for i, review in enumerate(df["review"].head(3), 1):
-                preview = review[:100] + "..." if len(review) > 100 else review
-                print(f"  {i}. {preview}\n")
+    print("=" * 80)
+
+
+def main():
+    """Check data file integrity."""
+    parser = argparse.ArgumentParser(description="Validate the reviews CSV before ingestion")
+    parser.add_argument("--csv", type=Path, default=REVIEWS_CSV_PATH, help="CSV file to validate")
+    parser.add_argument(
+        "--report",
+        type=Path,
+        default=DATA_VALIDATION_REPORT_PATH,
+        help="Where to write the machine-readable JSON report",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Set the logging level",
+    )
+    args = parser.parse_args()
+
+    setup_logging(getattr(logging, args.log_level))
+
+    logger.info("Checking data integrity...")
+
+    if not args.csv.exists():
+        logger.error(f"Data file not found at {args.csv}")
+        sys.exit(1)
 
-        print("=" * 80)
-        logger.info("Data integrity check complete!")
+    report = validate_reviews_csv(args.csv, report_path=args.report)
+    print_report(report)
 
-    except Exception as e:
-        logger.error(f"Error reading data: {e}", exc_info=True)
+    if not report.ok:
+        logger.error("Data integrity check found issues that would break ingestion")
+        sys.exit(1)
+    logger.info("Data integrity check complete!")
 
 
 if __name__ == "__main__":
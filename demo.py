@@ -2,16 +2,9 @@
 
 import logging
 
-from src.config import (
-    API_KEY_ENV_VAR,
-    CHAT_MODEL,
-    CHROMA_DB_PATH,
-    EMBEDDING_MODEL,
-    TOP_K_RETRIEVAL,
-)
-from src.rag_chain import RAGChainConfig, ReviewRAGChain
+from src.config import API_KEY_ENV_VAR
+from src.service import create_rag_chain, create_vector_store_manager, load_serving_store
 from src.utils import get_api_key, setup_logging
-from src.vectorstore import VectorStoreManager
 
 logger = logging.getLogger(__name__)
 
@@ -28,24 +21,15 @@ def main():
     try:
         api_key = get_api_key(API_KEY_ENV_VAR)
 
-        vector_store_manager = VectorStoreManager(
-            persist_directory=CHROMA_DB_PATH,
-            embedding_model=EMBEDDING_MODEL,
-            api_key=api_key,
-        )
-        vector_store = vector_store_manager.load_vector_store()
+        vector_store_manager = create_vector_store_manager(api_key)
+        vector_store = load_serving_store(vector_store_manager)
 
         if vector_store is None:
             print("\n❌ Error: Vector store not found!")
             print("Please run: python build_vectorstore.py")
             return
 
-        config = RAGChainConfig(
-            chat_model=CHAT_MODEL,
-            api_key=api_key,
-            top_k=TOP_K_RETRIEVAL,
-        )
-        rag_chain = ReviewRAGChain(vector_store=vector_store, config=config)
+        rag_chain = create_rag_chain(api_key, vector_store, topics=vector_store_manager.load_topics())
 
         print("✅ Chatbot initialized successfully!\n")
         print("Try these example questions:")
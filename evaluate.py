@@ -2,22 +2,82 @@
 
 import argparse
 import logging
+from pathlib import Path
 
 from src.config import (
+    ANSWER_EVAL_CACHE_DIR,
+    ANSWER_EVAL_REPORT_PATH,
+    ANSWER_EVAL_WORKERS,
+    ANSWER_MODE,
     API_KEY_ENV_VAR,
-    CHROMA_DB_PATH,
-    EMBEDDING_MODEL,
+    CHAT_MODEL,
+    PROFILE_SAMPLE_RATE,
+    RETRIEVAL_UNIT,
     TOP_K_RETRIEVAL,
 )
-from src.evaluation import EvaluationSample, RetrieverEvaluator, summarize_evaluation
+from src.evaluation import DEFAULT_EVALUATION_SAMPLES, RetrieverEvaluator, summarize_evaluation
+from src.profiling import create_profiler
+from src.service import create_rag_chain, create_vector_store_manager, get_index_versions, load_serving_store
 from src.utils import get_api_key, setup_logging
-from src.vectorstore import VectorStoreManager
 
 logger = logging.getLogger(__name__)
 
 
+def evaluate_answers(args, api_key, vector_store, vector_store_manager):
+    """Answer the evaluation samples end to end under every requested configuration and grade them."""
+    from src.answer_evaluation import (
+        AnswerConfig,
+        AnswerEvaluator,
+        LLMFaithfulnessGrader,
+        summarize_answer_evaluation,
+        write_answer_report,
+    )
+
+    version = get_index_versions().current()
+    rag_chain = create_rag_chain(
+        api_key,
+        vector_store,
+        index_version=version,
+        topics=vector_store_manager.load_topics(),
+        profiler=create_profiler(args.profile, args.profile_sample_rate),
+    )
+    configs = [
+        AnswerConfig(mode=mode, unit=unit, top_k=args.top_k)
+        for mode in args.modes.split(",")
+        for unit in args.units.split(",")
+    ]
+    grader = LLMFaithfulnessGrader(rag_chain.chat_model, CHAT_MODEL) if args.grader == "llm" else None
+    evaluator = AnswerEvaluator(
+        rag_chain,
+        configs,
+        grader=grader,
+        cache_directory=None if args.no_cache else ANSWER_EVAL_CACHE_DIR,
+        max_workers=args.workers,
+    )
+    results = evaluator.evaluate(DEFAULT_EVALUATION_SAMPLES)
+    summary = summarize_answer_evaluation(results)
+
+    print("\n" + "=" * 80)
+    print("ANSWER EVALUATION RESULTS")
+    print("=" * 80)
+    columns = ("config", "question", "faithfulness", "keyword_hit_rate", "latency_ms", "cached", "error")
+    print(results[[column for column in columns if column in results]].to_string(index=False))
+    print("\n" + "=" * 80)
+    print("PER-CONFIGURATION SUMMARY")
+    print("=" * 80)
+    print(summary.to_string(index=False))
+    print("=" * 80 + "\n")
+
+    write_answer_report(
+        args.report,
+        results,
+        summary,
+        {"index_version": version, "grader": evaluator.grader.name, "workers": args.workers},
+    )
+
+
 def main():
-    """Evaluate the RAG chatbot retriever."""
+    """Evaluate the RAG chatbot retriever, or its end-to-end answers with --answers."""
     parser = argparse.ArgumentParser(description="Evaluate the RAG chatbot")
     parser.add_argument(
         "--log-level",
@@ -31,6 +91,55 @@ def main():
         default=TOP_K_RETRIEVAL,
         help="Number of documents to retrieve",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Capture cProfile stats, flame-graph stacks and tracemalloc snapshots to reports/profiles/",
+    )
+    parser.add_argument(
+        "--profile-sample-rate",
+        type=float,
+        default=None,
+        help=f"Fraction of evaluation questions to profile (default: {PROFILE_SAMPLE_RATE})",
+    )
+    parser.add_argument(
+        "--answers",
+        action="store_true",
+        help="Evaluate full answers (generation and faithfulness) instead of retrieval only",
+    )
+    parser.add_argument(
+        "--modes",
+        default=ANSWER_MODE,
+        help=f"Comma-separated answer modes to compare with --answers (default: {ANSWER_MODE})",
+    )
+    parser.add_argument(
+        "--units",
+        default=RETRIEVAL_UNIT,
+        help=f"Comma-separated retrieval units to compare with --answers (default: {RETRIEVAL_UNIT})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=ANSWER_EVAL_WORKERS,
+        help=f"Answers generated concurrently with --answers (default: {ANSWER_EVAL_WORKERS})",
+    )
+    parser.add_argument(
+        "--grader",
+        default="heuristic",
+        choices=["heuristic", "llm"],
+        help="Faithfulness grader: local term overlap or the chat model (default: heuristic)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Regenerate every answer instead of reusing {ANSWER_EVAL_CACHE_DIR}",
+    )
+    parser.add_argument(
+        "--report",
+        type=Path,
+        default=ANSWER_EVAL_REPORT_PATH,
+        help=f"Answer evaluation report path (default: {ANSWER_EVAL_REPORT_PATH})",
+    )
     args = parser.parse_args()
 
     setup_logging(getattr(logging, args.log_level))
@@ -39,39 +148,23 @@ def main():
         api_key = get_api_key(API_KEY_ENV_VAR)
         logger.info("Loading vector store for evaluation")
 
-        vector_store_manager = VectorStoreManager(
-            persist_directory=CHROMA_DB_PATH,
-            embedding_model=EMBEDDING_MODEL,
-            api_key=api_key,
-        )
-        vector_store = vector_store_manager.load_vector_store()
+        vector_store_manager = create_vector_store_manager(api_key)
+        vector_store = load_serving_store(vector_store_manager)
 
         if vector_store is None:
             logger.error("Vector store not found. Please run build_vectorstore.py first.")
             return
 
-        # Define evaluation samples
-        samples = [
-            EvaluationSample(
-                question="Has anyone complained about communication with the hospital staff?",
-                expected_keywords=["communication", "staff", "coordination", "nursing"],
-            ),
-            EvaluationSample(
-                question="What did patients say about the discharge process?",
-                expected_keywords=["discharge", "process", "seamless", "released"],
-            ),
-            EvaluationSample(
-                question="Were there any positive experiences mentioned?",
-                expected_keywords=["positive", "great", "excellent", "wonderful"],
-            ),
-            EvaluationSample(
-                question="What are common complaints about the facilities?",
-                expected_keywords=["facilities", "parking", "room", "equipment"],
-            ),
-        ]
-
-        evaluator = RetrieverEvaluator(vector_store, top_k=args.top_k)
-        results = evaluator.evaluate(samples)
+        if args.answers:
+            evaluate_answers(args, api_key, vector_store, vector_store_manager)
+            return
+
+        evaluator = RetrieverEvaluator(
+            vector_store,
+            top_k=args.top_k,
+            profiler=create_profiler(args.profile, args.profile_sample_rate),
+        )
+        results = evaluator.evaluate(DEFAULT_EVALUATION_SAMPLES)
 
         print("\n" + "=" * 80)
         print("EVALUATION RESULTS")
@@ -1,5 +1,7 @@
 """Generate visualization plots for the project documentation."""
 
+import json
+
 import matplotlib.pyplot as plt
 import numpy as np
 
@@ -67,15 +69,27 @@ def plot_system_architecture():
     print("✅ Saved: reports/system_architecture.png")
 
 
-def plot_response_time_distribution():
-    """Plot distribution of response times."""
-    np.random.seed(42)
-    response_times = np.random.gamma(2, 1.5, 1000)
+def plot_response_time_distribution(report_path="reports/load_test.json"):
+    """Plot the measured response time distribution from a load test report."""
+    if not os.path.exists(report_path):
+        print(f"⏭️  Skipped response time plot: run `python scripts/load_test.py` to create {report_path}")
+        return
+
+    with open(report_path) as report_file:
+        report = json.load(report_file)
+    level = report["saturation"]["last_healthy"] or report["levels"][0]["label"]
+    response_times = np.array(report["latency_samples_ms"][level]) / 1000
+    if response_times.size == 0:
+        print(f"⏭️  Skipped response time plot: no successful requests at {level}")
+        return
 
     plt.figure(figsize=(8, 5))
     plt.hist(response_times, bins=30, color="#10B981", edgecolor="#047857", alpha=0.7)
     plt.axvline(response_times.mean(), color="red", linestyle="--", linewidth=2, label=f"Mean: {response_times.mean():.2f}s")
-    plt.title("Response Time Distribution (Simulated)", fontsize=14, fontweight="bold")
+    p99 = np.percentile(response_times, 99)
+    plt.axvline(p99, color="#6B7280", linestyle=":", linewidth=2, label=f"p99: {p99:.2f}s")
+    source = "offline stubs" if report.get("offline") else report["target"]
+    plt.title(f"Response Time Distribution ({level}, {source})", fontsize=14, fontweight="bold")
     plt.xlabel("Response Time (seconds)", fontsize=12)
     plt.ylabel("Frequency", fontsize=12)
     plt.legend()
@@ -0,0 +1,120 @@
+"""Long-running worker that ingests new reviews from an append-only feed into the live index."""
+
+import argparse
+import logging
+import signal
+from pathlib import Path
+
+from src.config import (
+    API_KEY_ENV_VAR,
+    CHUNK_SENTENCES,
+    CHUNK_STRIDE_SENTENCES,
+    DELTA_MAX_SEGMENTS,
+    DELTA_PATH,
+    EMBEDDING_MODEL,
+    FEED_PATH,
+    FEED_TIMESTAMP_FIELD,
+    INGEST_BATCH_SIZE,
+    INGEST_MAX_BATCH_WAIT_SECONDS,
+    INGEST_METRICS_PATH,
+    INGEST_MIN_INTERVAL_SECONDS,
+    INGEST_POLL_SECONDS,
+    REVIEW_METADATA_COLUMNS,
+    REVIEWS_CSV_PATH,
+)
+from src.chunking import SentenceWindowChunker
+from src.data_loader import ReviewDataLoader
+from src.delta import DeltaWriter
+from src.ingest import IngestWorker, open_feed
+from src.service import create_vector_store_manager
+from src.utils import get_api_key, setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Tail the review feed and commit new rows to the delta index until interrupted."""
+    parser = argparse.ArgumentParser(description="Ingest new reviews from an append-only feed")
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Set the logging level",
+    )
+    parser.add_argument(
+        "--feed",
+        type=Path,
+        default=FEED_PATH,
+        help=f"Feed file (.jsonl or .csv) or directory of drop files (default: {FEED_PATH})",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=INGEST_BATCH_SIZE,
+        help=f"Rows per embedding call (default: {INGEST_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--max-batch-wait",
+        type=float,
+        default=INGEST_MAX_BATCH_WAIT_SECONDS,
+        help=f"Seconds before a partial batch is committed (default: {INGEST_MAX_BATCH_WAIT_SECONDS})",
+    )
+    parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=INGEST_MIN_INTERVAL_SECONDS,
+        help=f"Minimum seconds between embedding calls (default: {INGEST_MIN_INTERVAL_SECONDS})",
+    )
+    parser.add_argument(
+        "--chunk-sentences",
+        type=int,
+        default=CHUNK_SENTENCES,
+        help=f"Sentence-window size the index was built with; 0 for whole reviews (default: {CHUNK_SENTENCES})",
+    )
+    parser.add_argument(
+        "--until-idle",
+        action="store_true",
+        help="Exit once the feed is caught up instead of tailing it",
+    )
+    parser.add_argument(
+        "--reset",
+        action="store_true",
+        help="Drop the delta and its feed offset (after the feed rows were folded into a full rebuild) and exit",
+    )
+    args = parser.parse_args()
+
+    setup_logging(getattr(logging, args.log_level))
+
+    delta = DeltaWriter(DELTA_PATH, embedding_model=EMBEDDING_MODEL)
+    if args.reset:
+        delta.reset()
+        logger.info(f"Delta index at {DELTA_PATH} cleared")
+        return
+
+    api_key = get_api_key(API_KEY_ENV_VAR)
+    worker = IngestWorker(
+        feed=open_feed(args.feed),
+        delta=delta,
+        embeddings=create_vector_store_manager(api_key).embedding_function,
+        data_loader=ReviewDataLoader(csv_path=REVIEWS_CSV_PATH, metadata_columns=REVIEW_METADATA_COLUMNS),
+        batch_size=args.batch_size,
+        max_batch_wait_seconds=args.max_batch_wait,
+        min_interval_seconds=args.min_interval,
+        poll_seconds=INGEST_POLL_SECONDS,
+        max_segments=DELTA_MAX_SEGMENTS,
+        metrics_path=INGEST_METRICS_PATH,
+        chunker=SentenceWindowChunker(args.chunk_sentences, CHUNK_STRIDE_SENTENCES) if args.chunk_sentences else None,
+        timestamp_field=FEED_TIMESTAMP_FIELD,
+    )
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+
+    logger.info(f"Ingesting {args.feed} into {DELTA_PATH} from offset {delta.offset}")
+    try:
+        worker.run(until_idle=args.until_idle)
+    except KeyboardInterrupt:
+        worker.stop()
+    logger.info(f"Ingest metrics written to {INGEST_METRICS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
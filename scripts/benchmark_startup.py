@@ -0,0 +1,106 @@
+"""Benchmark cold-start import time of the application entry points.
+
+Runs each target in a fresh interpreter with ``-X importtime`` and reports the
+total import time plus the most expensive top-level packages, so regressions
+in startup latency show up before they reach a container replica.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_TARGETS = ["src", "src.rag_chain", "src.vectorstore", "app", "build_vectorstore", "evaluate", "demo"]
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Aggregate ``-X importtime`` output into self time (us) per top-level package."""
+    totals: Dict[str, int] = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            self_us, _, name = line[len("import time:") :].split("|", 2)
+            package = name.strip().split(".")[0]
+            totals[package] += int(self_us.strip())
+        except ValueError:
+            continue
+    return dict(totals)
+
+
+def benchmark_target(target: str, repeat: int = 3) -> Dict[str, object]:
+    """Import ``target`` in fresh interpreters and return the best observed timings."""
+    best_wall = float("inf")
+    best_breakdown: Dict[str, int] = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+        )
+        wall = time.perf_counter() - start
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+            return {"target": target, "error": error}
+        if wall < best_wall:
+            best_wall = wall
+            best_breakdown = parse_importtime(result.stderr)
+
+    return {
+        "target": target,
+        "wall_ms": round(best_wall * 1000, 1),
+        "import_ms": round(sum(best_breakdown.values()) / 1000, 1),
+        "packages_ms": {
+            name: round(us / 1000, 1)
+            for name, us in sorted(best_breakdown.items(), key=lambda item: item[1], reverse=True)
+        },
+    }
+
+
+def main():
+    """Run the startup benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark cold-start import time")
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS, help="Modules to import")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per target (best is reported)")
+    parser.add_argument("--top", type=int, default=8, help="Number of packages to show per target")
+    parser.add_argument("--json", type=Path, help="Write the full results to this JSON file")
+    parser.add_argument("--max-ms", type=float, help="Exit non-zero if any target's import time exceeds this")
+    args = parser.parse_args()
+
+    results: List[Dict[str, object]] = [benchmark_target(target, args.repeat) for target in args.targets]
+
+    print("\n" + "=" * 80)
+    print("STARTUP BENCHMARK (-X importtime)")
+    print("=" * 80)
+    failed = False
+    for result in results:
+        if "error" in result:
+            print(f"\n❌ {result['target']}: {result['error']}")
+            failed = True
+            continue
+        print(f"\n{result['target']}: {result['import_ms']:.1f} ms imports, {result['wall_ms']:.1f} ms wall")
+        for name, ms in list(result["packages_ms"].items())[: args.top]:
+            print(f"  {name:30s} {ms:8.1f} ms")
+        if args.max_ms is not None and result["import_ms"] > args.max_ms:
+            print(f"  ❌ exceeds budget of {args.max_ms:.1f} ms")
+            failed = True
+    print("=" * 80 + "\n")
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(results, indent=2))
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
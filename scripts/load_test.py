@@ -0,0 +1,132 @@
+"""Load-test the chat and retrieval paths, in-process or against the served API.
+
+Sweeps increasing concurrency (closed loop) or arrival rate (open loop), then
+reports throughput, p50/p95/p99 latency, error rates and the point where the
+replica stops scaling. ``--offline`` swaps the model and embedding providers
+for local stubs with realistic latency, so the harness runs without network
+access or API keys.
+"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.config import LOAD_TEST_REPORT_PATH, REVIEWS_CSV_PATH  # noqa: E402
+from src.utils import setup_logging  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+def parse_levels(text: str, kind=int):
+    """Parse a comma-separated list of load levels."""
+    return [kind(value) for value in text.split(",") if value.strip()]
+
+
+def main():
+    """Run the load test."""
+    parser = argparse.ArgumentParser(description="Load-test the RAG chatbot")
+    parser.add_argument("--target", choices=["chain", "http"], default="chain", help="In-process chain or served API")
+    parser.add_argument("--url", default="http://localhost:8000", help="Base URL of the API for --target http")
+    parser.add_argument("--operation", choices=["answer", "retrieve", "stream"], default="answer")
+    parser.add_argument("--mode", choices=["generative", "extractive"], default=None, help="Answer mode")
+    parser.add_argument("--offline", action="store_true", help="Use stub chat and embedding providers (chain only)")
+    parser.add_argument("--questions", type=Path, help="Question corpus (.txt, .jsonl or .csv)")
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32", help="Closed-loop user counts to sweep")
+    parser.add_argument("--rate", help="Open-loop arrival rates (requests/s) to sweep instead of concurrency")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per load level")
+    parser.add_argument("--slo-p99-ms", type=float, default=None, help="p99 latency objective for saturation")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Error budget for saturation")
+    parser.add_argument("--stub-chat-latency", type=float, default=0.8, help="Seconds per stub generation")
+    parser.add_argument("--stub-embedding-latency", type=float, default=0.05, help="Seconds per stub embedding call")
+    parser.add_argument("--json", type=Path, default=LOAD_TEST_REPORT_PATH, help="Where to write the JSON report")
+    parser.add_argument(
+        "--log-level",
+        default="WARNING",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Set the logging level",
+    )
+    args = parser.parse_args()
+    if args.offline and args.target != "chain":
+        parser.error("--offline only applies to --target chain")
+
+    setup_logging(getattr(logging, args.log_level))
+
+    from src.evaluation import DEFAULT_EVALUATION_SAMPLES
+    from src.loadtest import (
+        LoadGenerator,
+        build_offline_chain,
+        chain_target,
+        find_saturation,
+        http_target,
+        load_questions,
+    )
+
+    questions = (
+        load_questions(args.questions) if args.questions else [sample.question for sample in DEFAULT_EVALUATION_SAMPLES]
+    )
+
+    rag_chain = None
+    if args.target == "http":
+        target = http_target(args.url, args.operation, args.mode)
+    else:
+        if args.offline:
+            rag_chain = build_offline_chain(
+                REVIEWS_CSV_PATH,
+                chat_latency_seconds=args.stub_chat_latency,
+                embedding_latency_seconds=args.stub_embedding_latency,
+            )
+        else:
+            from src.service import get_shared_rag_chain
+
+            rag_chain = get_shared_rag_chain()
+        target = chain_target(rag_chain, args.operation, args.mode)
+
+    generator = LoadGenerator(target, questions)
+    if args.rate:
+        results = [generator.run_open(rate, args.duration) for rate in parse_levels(args.rate, float)]
+    else:
+        results = [generator.run_closed(users, args.duration) for users in parse_levels(args.concurrency)]
+    saturation = find_saturation(results, slo_p99_ms=args.slo_p99_ms, max_error_rate=args.max_error_rate)
+
+    print("\n" + "=" * 80)
+    print(f"LOAD TEST ({args.target}, {args.operation}{', offline stubs' if args.offline else ''})")
+    print("=" * 80)
+    print(f"{'level':18s} {'req':>6s} {'rps':>8s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'errors':>8s}")
+    for result in results:
+        print(
+            f"{result.label:18s} {result.requests:6d} {result.throughput_rps:8.2f} {result.p50_ms:9.1f} "
+            f"{result.p95_ms:9.1f} {result.p99_ms:9.1f} {result.error_rate:8.2%}"
+        )
+        if result.errors_by_type:
+            print(f"{'':18s} {result.errors_by_type}")
+    print("-" * 80)
+    print(f"Last healthy level : {saturation['last_healthy']}")
+    print(f"Saturated at       : {saturation['saturated_at']}")
+    print(f"Peak throughput    : {saturation['peak_throughput_rps']:.2f} req/s")
+    print("=" * 80 + "\n")
+
+    report = {
+        "target": args.target,
+        "url": args.url if args.target == "http" else None,
+        "operation": args.operation,
+        "mode": args.mode,
+        "offline": args.offline,
+        "questions": len(questions),
+        "saturation": saturation,
+        "levels": [result.summary() for result in results],
+        "latency_samples_ms": {result.label: result.latencies_ms for result in results},
+    }
+    if rag_chain is not None:
+        report["chain_metrics"] = rag_chain.metrics()
+    args.json.parent.mkdir(parents=True, exist_ok=True)
+    args.json.write_text(json.dumps(report, indent=2))
+    logger.info("Load test report written to %s", args.json)
+
+
+if __name__ == "__main__":
+    main()
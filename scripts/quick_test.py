@@ -1,5 +1,6 @@
 """Quick test script to validate the setup without running the full app."""
 
+import importlib.util
 import sys
 from pathlib import Path
 
@@ -8,19 +9,15 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 
 def test_imports():
-    """Test that all required packages can be imported."""
+    """Test that all required packages are installed without importing them."""
     print("Testing imports...")
-    try:
-        import langchain
-        import langchain_google_genai
-        import langchain_chroma
-        import gradio
-        import pandas
-        print("✅ All required packages imported successfully")
-        return True
-    except ImportError as e:
-        print(f"❌ Import error: {e}")
+    packages = ["langchain", "langchain_google_genai", "langchain_chroma", "gradio", "pandas"]
+    missing = [name for name in packages if importlib.util.find_spec(name) is None]
+    if missing:
+        print(f"❌ Missing packages: {', '.join(missing)}")
         return False
+    print("✅ All required packages are installed")
+    return True
 
 
 def test_src_modules():
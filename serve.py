@@ -0,0 +1,46 @@
+"""Standalone HTTP/JSON API server for the Hospital Review RAG Chatbot."""
+
+import argparse
+import logging
+
+from src.service import get_shared_rag_chain
+from src.utils import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Run the HTTP API server."""
+    parser = argparse.ArgumentParser(description="Serve the RAG chatbot over HTTP/JSON")
+    parser.add_argument("--host", default="0.0.0.0", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument(
+        "--no-snapshot",
+        action="store_true",
+        help="Serve from the Chroma store instead of the memory-mapped index snapshot",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Set the logging level",
+    )
+    args = parser.parse_args()
+
+    setup_logging(getattr(logging, args.log_level))
+
+    try:
+        import uvicorn
+
+        from src.api import create_api
+
+        rag_chain = get_shared_rag_chain(use_snapshot=not args.no_snapshot)
+        logger.info("Starting API server on %s:%d", args.host, args.port)
+        uvicorn.run(create_api(rag_chain), host=args.host, port=args.port, log_level=args.log_level.lower())
+    except Exception as e:
+        logger.error(f"Failed to start API server: {e}", exc_info=True)
+        raise
+
+
+if __name__ == "__main__":
+    main()
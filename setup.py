@@ -35,6 +35,8 @@ setup(
         "chromadb>=0.5.23",
         "google-generativeai>=0.8.3",
         "gradio>=5.7.1",
+        "fastapi>=0.115.6",
+        "uvicorn>=0.34.0",
         "pandas>=2.2.3",
         "numpy>=2.2.1",
         "python-dotenv>=1.0.1",
@@ -45,6 +47,7 @@ setup(
             "rag-build-db=build_vectorstore:main",
             "rag-evaluate=evaluate:main",
             "rag-demo=demo:main",
+            "rag-serve=serve:main",
         ],
     },
 )
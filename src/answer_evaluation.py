@@ -0,0 +1,409 @@
+"""End-to-end answer evaluation: the full chain over a question set, graded for faithfulness.
+
+Every (configuration, question) pair runs concurrently on a thread pool.
+Generations are cached on disk by question, index version (plus the live
+delta's feed offset), configuration, chain settings, chat model and prompt,
+and grades are cached by grader on top of them, so a re-run only pays for
+what changed.
+Importing this module loads LangChain.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from .config import (
+    CHARS_PER_TOKEN,
+    FAITHFULNESS_SUPPORT_THRESHOLD,
+    HUMAN_PROMPT_TEMPLATE,
+    SYSTEM_PROMPT_TEMPLATE,
+    TEMPERATURE,
+)
+from .evaluation import EvaluationSample
+from .extractive import sentence_terms, split_sentences
+from .rag_chain import FALLBACK_NOTICE
+from .utils import percentile
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from langchain_core.language_models import BaseChatModel
+
+    from .rag_chain import ReviewRAGChain
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT = 1
+_SCORE = re.compile(r"\d*\.?\d+")
+
+GRADER_PROMPT_TEMPLATE = """You are grading whether an answer is supported by the patient reviews it was based on.
+
+Reviews:
+{context}
+
+Question: {question}
+Answer: {answer}
+
+Reply with a single number between 0 and 1: the fraction of the answer's claims that the reviews support."""
+
+
+@dataclass(frozen=True)
+class AnswerConfig:
+    """One chain configuration under evaluation."""
+
+    mode: str
+    unit: str
+    top_k: int
+
+    @property
+    def name(self) -> str:
+        return f"{self.mode}/{self.unit}/k={self.top_k}"
+
+
+@dataclass
+class Grade:
+    """Faithfulness of one answer to its context."""
+
+    score: float  # 0 (nothing supported) to 1 (fully supported)
+    details: Dict[str, Any] = field(default_factory=dict)
+
+
+class HeuristicFaithfulnessGrader:
+    """
+    Local grader: the share of answer sentences whose content terms occur in the context.
+
+    Each sentence or line (bullets, headings) is a claim, supported when at
+    least ``threshold`` of its stemmed content terms appear in the retrieved
+    documents. Answers without content terms score 1.
+    """
+
+    def __init__(self, threshold: float = FAITHFULNESS_SUPPORT_THRESHOLD) -> None:
+        self.threshold = threshold
+
+    @property
+    def name(self) -> str:
+        return f"heuristic-v1@{self.threshold}"
+
+    def grade(self, question: str, answer: str, context: Sequence[str]) -> Grade:
+        context_terms = set()
+        for text in context:
+            context_terms |= sentence_terms(text)
+
+        claims, unsupported = 0, []
+        for sentence in (sentence for line in answer.splitlines() for sentence in split_sentences(line)):
+            terms = sentence_terms(sentence)
+            if not terms:
+                continue
+            claims += 1
+            if len(terms & context_terms) / len(terms) < self.threshold:
+                unsupported.append(sentence)
+        score = (claims - len(unsupported)) / claims if claims else 1.0
+        return Grade(round(score, 4), {"claims": claims, "unsupported": unsupported[:5]})
+
+
+class LLMFaithfulnessGrader:
+    """Grader asking a chat model what fraction of the answer the context supports."""
+
+    def __init__(self, chat_model: "BaseChatModel", model_name: Optional[str] = None) -> None:
+        self.chat_model = chat_model
+        self.model_name = model_name or getattr(chat_model, "model_name", None) or type(chat_model).__name__
+
+    @property
+    def name(self) -> str:
+        return f"llm:{self.model_name}"
+
+    def grade(self, question: str, answer: str, context: Sequence[str]) -> Grade:
+        prompt = GRADER_PROMPT_TEMPLATE.format(context="\n\n".join(context), question=question, answer=answer)
+        usage = TokenUsageCallback()
+        reply = str(self.chat_model.invoke(prompt, config={"callbacks": [usage]}).content)
+        match = _SCORE.search(reply)
+        if match is None:
+            raise ValueError(f"Grader reply has no score: {reply[:200]!r}")
+        return Grade(min(1.0, max(0.0, float(match.group()))), {"reply": reply[:500], "usage": usage.snapshot()})
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """
+    Sums the token usage of the chat model calls it observes.
+
+    Usage reported by the provider is used as is; calls without it are
+    estimated from prompt and reply length (``CHARS_PER_TOKEN``) and the
+    totals are flagged as estimated.
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.estimated = False
+        self._prompt_chars: Dict[Any, int] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[Any]],
+        *,
+        run_id: Any,
+        **kwargs: Any,
+    ) -> None:
+        with self._lock:
+            self._prompt_chars[run_id] = sum(len(str(message.content)) for batch in messages for message in batch)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: Any, **kwargs: Any) -> None:
+        input_tokens = output_tokens = output_chars = 0
+        reported = False
+        for generations in response.generations:
+            for generation in generations:
+                output_chars += len(generation.text)
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    reported = True
+                    input_tokens += usage.get("input_tokens", 0)
+                    output_tokens += usage.get("output_tokens", 0)
+        with self._lock:
+            prompt_chars = self._prompt_chars.pop(run_id, 0)
+            if not reported:
+                self.estimated = True
+                input_tokens = round(prompt_chars / CHARS_PER_TOKEN)
+                output_tokens = round(output_chars / CHARS_PER_TOKEN)
+            self.calls += 1
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+
+    def on_llm_error(self, error: BaseException, *, run_id: Any, **kwargs: Any) -> None:
+        with self._lock:
+            self._prompt_chars.pop(run_id, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Calls and token totals so far."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "estimated": self.estimated,
+            }
+
+
+class AnswerCache:
+    """Generations and their grades on disk, one JSON file per cache key."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads((self.directory / f"{key}.json").read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            logger.warning("Ignoring unreadable answer cache entry %s", key)
+            return None
+
+    def put(self, key: str, record: Dict[str, Any]) -> None:
+        """Write ``record`` atomically, so concurrent or interrupted runs never leave a partial entry."""
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as stream:
+                json.dump(record, stream)
+            os.replace(temporary, self.directory / f"{key}.json")
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+
+def chain_fingerprint(rag_chain: "ReviewRAGChain") -> Dict[str, Any]:
+    """Everything besides the question and configuration that changes an answer: index, settings, model and prompt."""
+    vector_store = rag_chain.vector_store
+    delta_offset = None
+    if hasattr(vector_store, "delta_metrics"):
+        vector_store.refresh(force=True)
+        delta_offset = vector_store.delta_metrics()["offset"]
+    prompt = hashlib.sha256((SYSTEM_PROMPT_TEMPLATE + HUMAN_PROMPT_TEMPLATE).encode("utf-8")).hexdigest()
+    settings = {key: value for key, value in asdict(rag_chain.config).items() if key != "api_key"}
+    settings["temperature"] = getattr(rag_chain.chat_model, "temperature", TEMPERATURE)
+    chain_settings = hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return {
+        "index_version": rag_chain.index_version,
+        "delta_offset": delta_offset,
+        "chat_model": f"{type(rag_chain.chat_model).__name__}:{rag_chain.config.chat_model}",
+        "chain_settings": chain_settings[:16],
+        "prompt": prompt[:16],
+    }
+
+
+def cache_key(question: str, config: AnswerConfig, fingerprint: Dict[str, Any]) -> str:
+    """Cache key of one generation."""
+    payload = {"format": CACHE_FORMAT, "question": question, "config": asdict(config), **fingerprint}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class AnswerEvaluator:
+    """
+    Runs the full chain concurrently over evaluation samples and grades each answer's faithfulness.
+
+    A grader is any object with a ``name`` (part of the grade cache key) and
+    ``grade(question, answer, context) -> Grade``.
+    """
+
+    def __init__(
+        self,
+        rag_chain: "ReviewRAGChain",
+        configs: Sequence[AnswerConfig],
+        grader: Optional[Any] = None,
+        cache_directory: Optional[Path] = None,
+        max_workers: int = 8,
+    ) -> None:
+        """
+        Initialize the evaluator.
+
+        Args:
+            rag_chain: Chain to evaluate.
+            configs: Configurations to answer every sample with.
+            grader: Faithfulness grader (defaults to HeuristicFaithfulnessGrader).
+            cache_directory: Directory caching generations and grades; None disables caching.
+            max_workers: Answers generated concurrently.
+        """
+        self.rag_chain = rag_chain
+        self.configs = list(configs)
+        self.grader = grader or HeuristicFaithfulnessGrader()
+        self.cache = AnswerCache(cache_directory) if cache_directory is not None else None
+        self.max_workers = max_workers
+
+    def evaluate(self, samples: Sequence[EvaluationSample]) -> "pd.DataFrame":
+        """Answer and grade every sample under every configuration; one row per pair."""
+        import pandas as pd
+
+        fingerprint = chain_fingerprint(self.rag_chain)
+        tasks = [(config, sample) for config in self.configs for sample in samples]
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers), thread_name_prefix="answer-eval") as pool:
+            rows = list(pool.map(lambda task: self._evaluate_one(task[0], task[1], fingerprint), tasks))
+
+        results = pd.DataFrame(rows)
+        logger.info(
+            "Answer evaluation completed: %d answers, %d generated, %d from cache",
+            len(results),
+            int((~results["cached"]).sum()) if len(results) else 0,
+            int(results["cached"].sum()) if len(results) else 0,
+        )
+        return results
+
+    def _evaluate_one(self, config: AnswerConfig, sample: EvaluationSample, fingerprint: Dict[str, Any]) -> Dict:
+        key = cache_key(sample.question, config, fingerprint)
+        record = self.cache.get(key) if self.cache is not None else None
+        cached = record is not None
+        row: Dict[str, Any] = {"config": config.name, "question": sample.question, "cached": cached, "error": None}
+        try:
+            if record is None:
+                record = self._generate(config, sample.question)
+                if self.cache is not None and not record["fallback"]:
+                    self.cache.put(key, record)
+            grade = record["grades"].get(self.grader.name)
+            if grade is None:
+                grade = asdict(self.grader.grade(sample.question, record["answer"], record["context"]))
+                record["grades"][self.grader.name] = grade
+                if self.cache is not None and not record["fallback"]:
+                    self.cache.put(key, record)
+        except Exception as exc:
+            logger.warning("Evaluating %r with %s failed: %s", sample.question, config.name, exc)
+            row["error"] = f"{type(exc).__name__}: {exc}"
+            if record is None:
+                return row
+            grade = None
+
+        answer = record["answer"].lower()
+        keyword_hits = sum(keyword.lower() in answer for keyword in sample.expected_keywords)
+        usage = record["usage"]
+        row.update(
+            {
+                "faithfulness": grade["score"] if grade else None,
+                "keyword_hit_rate": round(keyword_hits / len(sample.expected_keywords), 2),
+                "documents": len(record["context"]),
+                "latency_ms": record["latency_ms"],
+                "input_tokens": usage["input_tokens"],
+                "output_tokens": usage["output_tokens"],
+                "tokens_estimated": usage["estimated"],
+                "fallback": record["fallback"],
+                "answer": record["answer"],
+            }
+        )
+        return row
+
+    def _generate(self, config: AnswerConfig, question: str) -> Dict[str, Any]:
+        usage = TokenUsageCallback()
+        started = time.perf_counter()
+        answer, documents = self.rag_chain.answer_with_context(
+            question, mode=config.mode, unit=config.unit, k=config.top_k, callbacks=[usage]
+        )
+        return {
+            "answer": answer,
+            "context": [document.page_content for document in documents],
+            "latency_ms": round((time.perf_counter() - started) * 1000.0, 1),
+            "usage": usage.snapshot(),
+            "fallback": answer.startswith(FALLBACK_NOTICE),
+            "grades": {},
+        }
+
+
+def summarize_answer_evaluation(results: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Per-configuration faithfulness, keyword hit rate, latency and token usage.
+
+    Latency and tokens of cached rows are those measured when they were generated.
+    """
+    import pandas as pd
+
+    summary = []
+    for name, group in results.groupby("config", sort=False):
+        answered = group[group["latency_ms"].notna()] if "latency_ms" in group else group.iloc[0:0]
+        latencies = sorted(answered["latency_ms"]) if len(answered) else []
+        input_tokens = int(answered["input_tokens"].sum()) if len(answered) else 0
+        output_tokens = int(answered["output_tokens"].sum()) if len(answered) else 0
+        summary.append(
+            {
+                "config": name,
+                "questions": len(group),
+                "errors": int(group["error"].notna().sum()),
+                "faithfulness": round(float(answered["faithfulness"].mean()), 3) if len(answered) else None,
+                "keyword_hit_rate": round(float(answered["keyword_hit_rate"].mean()), 2) if len(answered) else None,
+                "latency_p50_ms": percentile(latencies, 0.5),
+                "latency_p95_ms": percentile(latencies, 0.95),
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "tokens_per_answer": round((input_tokens + output_tokens) / len(answered), 1) if len(answered) else 0.0,
+                "tokens_estimated": bool(answered["tokens_estimated"].any()) if len(answered) else False,
+                "generated": int((~group["cached"]).sum()),
+                "cached": int(group["cached"].sum()),
+            }
+        )
+    return pd.DataFrame(summary)
+
+
+def write_answer_report(
+    path: Path,
+    results: "pd.DataFrame",
+    summary: "pd.DataFrame",
+    metadata: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Write the per-configuration summary and per-answer results as JSON."""
+    report = {
+        **(metadata or {}),
+        "summary": json.loads(summary.to_json(orient="records")),
+        "results": json.loads(results.to_json(orient="records")),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2))
+    logger.info(f"Answer evaluation report written to {path}")
@@ -0,0 +1,166 @@
+"""Asynchronous HTTP/JSON query API over a shared ReviewRAGChain."""
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterator, List, Literal, Optional
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+    from langchain.schema import Document
+
+    from .rag_chain import ReviewRAGChain
+
+from .rag_chain import UnknownHospitalError
+from .resilience import CircuitOpenError, DeadlineExceededError
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = 32
+AnswerMode = Literal["generative", "extractive"]
+RetrievalUnit = Literal["review", "chunk"]
+_END_OF_STREAM = object()
+
+
+def _serialize_document(document: "Document") -> Dict[str, Any]:
+    return {"page_content": document.page_content, "metadata": document.metadata}
+
+
+def _questions_from_request(request: Any) -> List[str]:
+    """Return the batch of questions in a request, validating that exactly one form is used."""
+    from fastapi import HTTPException
+
+    if (request.question is None) == (request.questions is None):
+        raise HTTPException(status_code=422, detail="Provide exactly one of 'question' or 'questions'")
+    questions = [request.question] if request.question is not None else request.questions
+    if not questions or len(questions) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=422, detail=f"A batch must contain 1 to {MAX_BATCH_SIZE} questions")
+    return questions
+
+
+def create_api(rag_chain: "ReviewRAGChain") -> "FastAPI":
+    """
+    Build the HTTP API application.
+
+    Every request is served by the single ``rag_chain`` passed in, so the index
+    and the model clients (with their keep-alive connections) are shared across
+    all requests. Blocking chain calls run in the server's thread pool and
+    batched questions are processed concurrently.
+
+    Endpoints:
+        GET  /health         Liveness probe.
+        GET  /metrics        Model-call (retries, hedges, circuit state, latency) and batching metrics.
+        POST /retrieve       Relevant reviews for ``question`` or a ``questions`` batch.
+        POST /answer         Answers for ``question`` or a ``questions`` batch; a ``session_id``
+                             answers a single question as a conversation turn, and
+                             ``mode="extractive"`` quotes reviews instead of calling the LLM.
+                             On a chunked index, ``unit="chunk"`` retrieves the matching sentence
+                             windows instead of their deduplicated parent reviews (also on /retrieve).
+        POST /answer/stream  Plain-text streamed answer for a single ``question``; retrieval and the first
+                             chunk run before the response starts, so failures still map to 503/504.
+    """
+    from fastapi import FastAPI, HTTPException
+    from fastapi.responses import JSONResponse, StreamingResponse
+    from pydantic import BaseModel
+    from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+    class RetrieveRequest(BaseModel):
+        question: Optional[str] = None
+        questions: Optional[List[str]] = None
+        k: Optional[int] = None
+        hospital: Optional[str] = None
+        unit: Optional[RetrievalUnit] = None
+
+    class AnswerRequest(BaseModel):
+        question: Optional[str] = None
+        questions: Optional[List[str]] = None
+        hospital: Optional[str] = None
+        session_id: Optional[str] = None
+        mode: Optional[AnswerMode] = None
+        unit: Optional[RetrievalUnit] = None
+
+    class StreamRequest(BaseModel):
+        question: str
+        hospital: Optional[str] = None
+        mode: Optional[AnswerMode] = None
+        unit: Optional[RetrievalUnit] = None
+
+    app = FastAPI(title="Hospital Review RAG API")
+
+    @app.exception_handler(CircuitOpenError)
+    async def circuit_open(_request: Any, exc: CircuitOpenError) -> JSONResponse:
+        return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "30"})
+
+    @app.exception_handler(DeadlineExceededError)
+    async def deadline_exceeded(_request: Any, exc: DeadlineExceededError) -> JSONResponse:
+        return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+    @app.exception_handler(UnknownHospitalError)
+    async def unknown_hospital(_request: Any, exc: UnknownHospitalError) -> JSONResponse:
+        return JSONResponse(status_code=422, content={"detail": str(exc)})
+
+    @app.get("/health")
+    async def health() -> Dict[str, Any]:
+        return {"status": "ok", "partitions": rag_chain.available_partitions}
+
+    @app.get("/metrics")
+    async def metrics() -> Dict[str, Any]:
+        return rag_chain.metrics()
+
+    @app.post("/retrieve")
+    async def retrieve(request: RetrieveRequest) -> Dict[str, Any]:
+        questions = _questions_from_request(request)
+        results = await asyncio.gather(
+            *(
+                run_in_threadpool(
+                    rag_chain.retrieve_relevant_documents, question, request.k, request.hospital, request.unit
+                )
+                for question in questions
+            )
+        )
+        documents = [[_serialize_document(doc) for doc in docs] for docs in results]
+        if request.question is not None:
+            return {"documents": documents[0]}
+        return {"results": [{"question": q, "documents": d} for q, d in zip(questions, documents)]}
+
+    @app.post("/answer")
+    async def answer(request: AnswerRequest) -> Dict[str, Any]:
+        questions = _questions_from_request(request)
+        if request.session_id is not None:
+            if request.question is None:
+                raise HTTPException(status_code=422, detail="'session_id' requires a single 'question'")
+            answer = await run_in_threadpool(
+                rag_chain.answer_in_session,
+                request.session_id,
+                request.question,
+                request.hospital,
+                mode=request.mode,
+                unit=request.unit,
+            )
+            return {"answer": answer, "session_id": request.session_id}
+
+        answers = await asyncio.gather(
+            *(
+                run_in_threadpool(rag_chain.answer_question, question, request.hospital, request.mode, request.unit)
+                for question in questions
+            )
+        )
+        if request.question is not None:
+            return {"answer": answers[0]}
+        return {"results": [{"question": q, "answer": a} for q, a in zip(questions, answers)]}
+
+    @app.post("/answer/stream")
+    async def answer_stream(request: StreamRequest) -> StreamingResponse:
+        chunks = rag_chain.stream_answer(request.question, request.hospital, request.mode, request.unit)
+        # The generator is lazy: prime it here so retrieval and circuit/deadline errors surface before the 200 is sent.
+        first = await run_in_threadpool(next, chunks, _END_OF_STREAM)
+
+        async def body(first: Any, rest: Iterator[str]) -> AsyncIterator[str]:
+            if first is _END_OF_STREAM:
+                return
+            yield first
+            async for chunk in iterate_in_threadpool(rest):
+                yield chunk
+
+        return StreamingResponse(body(first, chunks), media_type="text/plain; charset=utf-8")
+
+    return app
@@ -0,0 +1,173 @@
+"""Micro-batching of concurrent retrieval requests.
+
+Concurrent callers enqueue their questions; a single worker thread drains the
+queue, embeds every pending question with one embedding call, runs one
+batched vector search per routing target and hands each caller its results.
+"""
+
+import inspect
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from langchain.schema import Document
+    from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+def embed_queries(embedding_function: "Embeddings", texts: Sequence[str]) -> List[List[float]]:
+    """Embed several queries with one call, keeping query-side task types where the provider uses them."""
+    if "task_type" in inspect.signature(embedding_function.embed_documents).parameters:
+        return embedding_function.embed_documents(list(texts), task_type="RETRIEVAL_QUERY")
+    return embedding_function.embed_documents(list(texts))
+
+
+@dataclass
+class _PendingQuery:
+    question: str
+    k: int
+    shard_names: Optional[Tuple[str, ...]]
+    future: Future = field(default_factory=Future)
+
+
+@dataclass
+class BatcherStats:
+    """Counters describing how well requests are being coalesced."""
+
+    queries: int = 0
+    batches: int = 0
+    largest_batch: int = 0
+
+    @property
+    def average_batch_size(self) -> float:
+        return self.queries / self.batches if self.batches else 0.0
+
+
+class QueryBatcher:
+    """Coalesces concurrent retrieval requests into batched embedding and search calls."""
+
+    def __init__(self, vector_store: Any, max_batch_size: int = 32, max_wait_ms: float = 5.0) -> None:
+        """
+        Initialize the batcher.
+
+        The collection window only opens while the previous batch held more than
+        one query, so an idle service dispatches each request immediately and low
+        load pays no added latency; under concurrency the window lets a batch fill.
+
+        Args:
+            vector_store: Store exposing ``embeddings`` and a vector search (Chroma, snapshot or sharded).
+            max_batch_size: Maximum number of questions per batch.
+            max_wait_ms: Longest time a batch waits for more questions once the window is open.
+        """
+        self.vector_store = vector_store
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.stats = BatcherStats()
+        self._queue: "queue.Queue[Optional[_PendingQuery]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()  # guards _closed, _worker, enqueueing and stats
+        self._closed = False
+        self._last_batch_size = 0
+
+    def search(self, question: str, k: int, shard_names: Optional[Sequence[str]] = None) -> List["Document"]:
+        """
+        Retrieve ``k`` documents for ``question``, blocking until its batch completes.
+
+        After ``close()`` (e.g. on the old index during a hot swap) the question
+        is searched directly in the calling thread instead.
+        """
+        pending = _PendingQuery(question, k, tuple(shard_names) if shard_names is not None else None)
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._ensure_worker()
+                self._queue.put(pending)
+        if closed:
+            self._process([pending])
+        return pending.future.result()
+
+    def close(self) -> None:
+        """Stop the worker thread once the queued questions are served; later searches run unbatched."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            worker, self._worker = self._worker, None
+            if worker is not None:
+                self._queue.put(None)
+        if worker is not None:
+            worker.join()
+        # Nothing is enqueued after the stop marker, but never leave a caller waiting on a lost question.
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None and not item.future.done():
+                item.future.set_exception(RuntimeError("Query batcher closed before the question was served"))
+
+    def _ensure_worker(self) -> None:
+        """Start the worker thread; called with ``_lock`` held."""
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="query-batcher", daemon=True)
+            self._worker.start()
+
+    def _collect(self, first: _PendingQuery) -> Tuple[List[_PendingQuery], bool]:
+        batch = [first]
+        deadline = time.monotonic() + (self.max_wait if self._last_batch_size > 1 else 0.0)
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stop = self._collect(first)
+            self._process(batch)
+            if stop:
+                return
+
+    def _process(self, batch: List[_PendingQuery]) -> None:
+        from .vectorstore import similarity_search_by_vectors_with_score
+
+        with self._lock:
+            self._last_batch_size = len(batch)
+            self.stats.queries += len(batch)
+            self.stats.batches += 1
+            self.stats.largest_batch = max(self.stats.largest_batch, len(batch))
+
+        try:
+            embeddings = embed_queries(self.vector_store.embeddings, [item.question for item in batch])
+            groups: Dict[Optional[Tuple[str, ...]], List[int]] = {}
+            for index, item in enumerate(batch):
+                groups.setdefault(item.shard_names, []).append(index)
+
+            for shard_names, indices in groups.items():
+                k = max(batch[i].k for i in indices)
+                vectors = [embeddings[i] for i in indices]
+                if shard_names is None:
+                    results = similarity_search_by_vectors_with_score(self.vector_store, vectors, k)
+                else:
+                    results = self.vector_store.similarity_search_by_vectors_with_score(vectors, k, shard_names)
+                for i, scored in zip(indices, results):
+                    batch[i].future.set_result([doc for doc, _ in scored[: batch[i].k]])
+        except Exception as exc:
+            logger.error("Batched retrieval failed for %d queries: %s", len(batch), exc)
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(exc)
@@ -0,0 +1,144 @@
+"""Sentence-window chunks of reviews that point back to their parent review.
+
+Long reviews often mix several topics, which blurs a single review embedding.
+Splitting each review into overlapping windows of sentences gives every topic
+its own vector. Each chunk keeps the parent's metadata plus ``parent_id`` and,
+for reviews split into several chunks, the parent's full text, so retrieval
+can return either the matching chunk or the whole review it came from.
+"""
+
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+
+from .extractive import split_sentences
+
+if TYPE_CHECKING:
+    from langchain.schema import Document
+
+REVIEW = "review"
+CHUNK = "chunk"
+RETRIEVAL_UNITS = (REVIEW, CHUNK)
+
+PARENT_ID = "parent_id"
+PARENT_CONTENT = "parent_content"
+PARENT_SOURCE = "parent_source"
+CHUNK_INDEX = "chunk_index"
+CHUNK_COUNT = "chunk_count"
+CHUNK_KEYS = (PARENT_ID, PARENT_CONTENT, PARENT_SOURCE, CHUNK_INDEX, CHUNK_COUNT)
+
+
+def sentence_windows(text: str, window: int, stride: int) -> List[str]:
+    """
+    Windows of ``window`` sentences, starting every ``stride`` sentences.
+
+    Every sentence is covered only when ``stride`` is at most ``window``.
+    """
+    sentences = split_sentences(text)
+    if len(sentences) <= window:
+        return [" ".join(sentences)] if sentences else []
+    starts = list(range(0, len(sentences) - window, stride)) + [len(sentences) - window]
+    return [" ".join(sentences[start : start + window]) for start in sorted(set(starts))]
+
+
+class SentenceWindowChunker:
+    """Splits review documents into sentence-window chunks."""
+
+    def __init__(
+        self,
+        window_sentences: int = 3,
+        stride_sentences: int = 2,
+        source_column: str = "review",
+        id_column: str = "review_id",
+    ) -> None:
+        """
+        Initialize the chunker.
+
+        Args:
+            window_sentences: Sentences per chunk.
+            stride_sentences: Sentences between the starts of consecutive chunks (less than the window overlaps
+                them). Capped at the window, so no sentence is left out of every chunk.
+            source_column: Column holding the review text in the document content.
+            id_column: Metadata field identifying the parent review (falls back to the CSV ``row``).
+        """
+        if window_sentences < 1 or stride_sentences < 1:
+            raise ValueError("Chunk window and stride must be at least one sentence")
+        self.window_sentences = window_sentences
+        self.stride_sentences = min(stride_sentences, window_sentences)
+        self.source_column = source_column
+        self.id_column = id_column
+
+    def split(self, document: "Document") -> List["Document"]:
+        """
+        Chunk one review document laid out by ``ReviewDataLoader``.
+
+        The review line of the content is replaced by the window, so the other
+        columns (hospital, physician, ...) stay part of every chunk's embedding.
+        """
+        from langchain_core.documents import Document
+
+        source = str(document.metadata.get("source") or "")
+        windows = sentence_windows(source, self.window_sentences, self.stride_sentences) or [source]
+        review_line = f"{self.source_column}: {source.strip()}"
+        parent_id = document.metadata.get(self.id_column, document.metadata.get("row"))
+
+        chunks = []
+        for index, window in enumerate(windows):
+            metadata: Dict[str, Any] = {
+                **document.metadata,
+                "source": window,
+                PARENT_ID: parent_id,
+                CHUNK_INDEX: index,
+                CHUNK_COUNT: len(windows),
+            }
+            if len(windows) > 1:
+                metadata[PARENT_CONTENT] = document.page_content
+                metadata[PARENT_SOURCE] = source
+            if review_line in document.page_content:
+                content = document.page_content.replace(review_line, f"{self.source_column}: {window}", 1)
+            else:
+                content = window
+            chunk_id = f"{document.id}#{index}" if document.id is not None else None
+            chunks.append(Document(id=chunk_id, page_content=content, metadata=metadata))
+        return chunks
+
+    def split_documents(self, documents: Iterable["Document"]) -> List["Document"]:
+        """Chunk every document, keeping chunks of the same review together."""
+        return [chunk for document in documents for chunk in self.split(document)]
+
+
+def is_chunk(document: "Document") -> bool:
+    """Whether ``document`` is a chunk rather than a whole review."""
+    return PARENT_ID in document.metadata
+
+
+def parent_key(document: "Document") -> Optional[str]:
+    """Identifier of the review ``document`` belongs to (itself when it is a whole review)."""
+    metadata = document.metadata
+    value = metadata.get(PARENT_ID, metadata.get("review_id", metadata.get("row")))
+    return None if value is None else str(value)
+
+
+def parent_document(document: "Document") -> "Document":
+    """The whole review a chunk was cut from; whole reviews are returned unchanged."""
+    from langchain_core.documents import Document
+
+    if not is_chunk(document):
+        return document
+    metadata = {key: value for key, value in document.metadata.items() if key not in CHUNK_KEYS}
+    if PARENT_SOURCE in document.metadata:
+        metadata["source"] = document.metadata[PARENT_SOURCE]
+    return Document(page_content=document.metadata.get(PARENT_CONTENT, document.page_content), metadata=metadata)
+
+
+def collapse_to_parents(documents: Iterable["Document"], k: int) -> List["Document"]:
+    """Replace ranked chunks by their parent reviews, keeping each review once at its best rank."""
+    parents: List["Document"] = []
+    seen = set()
+    for document in documents:
+        key = parent_key(document)
+        if key is not None and key in seen:
+            continue
+        seen.add(key)
+        parents.append(parent_document(document))
+        if len(parents) == k:
+            break
+    return parents
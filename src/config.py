@@ -6,10 +6,14 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data" / "raw"
 ARTIFACTS_DIR = BASE_DIR / "artifacts"
+REPORTS_DIR = BASE_DIR / "reports"
 
 # File paths
 REVIEWS_CSV_PATH = DATA_DIR / "reviews.csv"
 CHROMA_DB_PATH = ARTIFACTS_DIR / "chroma_data"
+SNAPSHOT_PATH = ARTIFACTS_DIR / "index_snapshot"
+TOPICS_PATH = ARTIFACTS_DIR / "topics"
+INDEX_ROOT = ARTIFACTS_DIR / "index"  # versioned builds; CHROMA_DB_PATH/SNAPSHOT_PATH are the legacy unversioned layout
 
 # Model configurations
 EMBEDDING_MODEL = "models/gemini-embedding-004"
@@ -17,6 +21,91 @@ CHAT_MODEL = "gemini-2.5-flash"
 TEMPERATURE = 0
 TOP_K_RETRIEVAL = 10
 
+# Review metadata and index partitioning
+REVIEW_METADATA_COLUMNS = ("review_id", "hospital_name")
+PARTITION_KEY = "hospital_name"
+
+# Sentence-window chunking (0 indexes one document per review)
+CHUNK_SENTENCES = 0  # sentences per chunk
+CHUNK_STRIDE_SENTENCES = 2  # sentences between chunk starts (capped at CHUNK_SENTENCES); below it windows overlap
+RETRIEVAL_UNIT = "review"  # "review" returns distinct parent reviews, "chunk" the matching chunks
+PARENT_OVERFETCH = 3  # chunks fetched per requested review before collapsing to parents
+
+# Retrieval micro-batching (set the window to None to disable)
+QUERY_BATCH_WINDOW_MS = 5.0
+QUERY_BATCH_MAX_SIZE = 32
+
+# Conversation sessions
+SESSION_MAX_COUNT = 10000
+SESSION_TTL_SECONDS = 1800
+SESSION_MAX_TURNS = 6
+SESSION_REUSE_THRESHOLD = 0.5  # topic overlap above which the previous turn's documents are reused
+
+# Chat model call policy
+LLM_TIMEOUT_SECONDS = 20.0  # per attempt
+LLM_DEADLINE_SECONDS = 45.0  # per answer, across retries
+LLM_MAX_RETRIES = 2  # jittered exponential backoff, retryable errors only
+LLM_HEDGE_ENABLED = False  # send a duplicate request when the first is slower than the hedge quantile
+LLM_HEDGE_QUANTILE = 0.95
+LLM_BREAKER_FAILURE_THRESHOLD = 5  # consecutive failures before failing fast
+LLM_BREAKER_RESET_SECONDS = 30.0
+LLM_MAX_CONCURRENCY = 32
+
+# Answer mode: "generative" (LLM) or "extractive" (quoted review sentences, no LLM call)
+ANSWER_MODE = "generative"
+EXTRACTIVE_FALLBACK = True  # answer extractively when generation fails or misses its deadline
+
+# Near-duplicate removal at ingest (MinHash + LSH)
+DEDUP_THRESHOLD = 0.8  # estimated Jaccard similarity of word 3-grams
+DEDUP_NUM_PERM = 128
+DEDUP_BANDS = 32
+DEDUP_SCOPE = PARTITION_KEY  # metadata key limiting merges to matching values; None merges across hospitals
+DEDUP_REPORT_PATH = REPORTS_DIR / "dedup_report.json"
+LOAD_TEST_REPORT_PATH = REPORTS_DIR / "load_test.json"
+
+# Opt-in profiling (--profile): fraction of requests / ingestion batches captured
+PROFILE_DIR = REPORTS_DIR / "profiles"
+PROFILE_SAMPLE_RATE = 0.1
+PROFILE_MEMORY = True  # tracemalloc allocation growth per profiled section
+PROFILE_INTERVAL_MS = 5.0  # stack sampling interval for flame graphs
+
+# Data validation (streaming pre-flight check of the reviews CSV)
+EMBEDDING_MAX_INPUT_TOKENS = 2048
+CHARS_PER_TOKEN = 4.0  # rough English average, used for token and cost estimates
+VALIDATION_CHUNK_ROWS = 50000
+DATA_VALIDATION_REPORT_PATH = REPORTS_DIR / "data_validation.json"
+
+# Topic clusters answering aggregate questions (k-means over all review embeddings after each build)
+TOPIC_CLUSTERS = 24  # 0 skips the stage
+TOPIC_TERMS = 6  # terms in each topic label
+TOPIC_REPRESENTATIVES = 3  # reviews quoted per topic (and per topic and hospital)
+TOPIC_MATCHES = 4  # topics summarized in one aggregate answer
+TOPIC_MIN_SIMILARITY = 0.5  # question-to-centroid cosine a topic needs; below it the question is answered by retrieval
+
+# Index versions and hot swap
+INDEX_KEEP_VERSIONS = 3  # published versions kept, including the current one
+INDEX_RETENTION_SECONDS = 3600.0  # minimum time a replaced version is kept so other replicas can swap off it
+INDEX_POLL_SECONDS = 10.0  # how often serving processes check for a new version (None disables hot swap)
+INDEX_DRAIN_TIMEOUT_SECONDS = 60.0  # longest wait for in-flight queries on the old version
+
+# Near-real-time ingestion from an append-only review feed (ingest_feed.py)
+FEED_PATH = DATA_DIR / "feed"  # a .jsonl/.csv file producers append to, or a directory of drop files
+DELTA_PATH = INDEX_ROOT / "delta"  # embedded feed rows, layered over every index version until the next rebuild
+INGEST_BATCH_SIZE = 20  # rows per embedding call
+INGEST_MAX_BATCH_WAIT_SECONDS = 2.0  # a partial batch is committed once its oldest row waited this long
+INGEST_MIN_INTERVAL_SECONDS = 5.0  # minimum time between embedding calls (rate limit)
+INGEST_POLL_SECONDS = 0.5
+FEED_TIMESTAMP_FIELD = "received_at"  # row field with the time it entered the feed; else the file's mtime is used
+INGEST_METRICS_PATH = REPORTS_DIR / "ingest_metrics.json"
+DELTA_MAX_SEGMENTS = 32  # delta segments merged into one beyond this
+DELTA_POLL_SECONDS = 1.0  # how often serving processes pick up new delta segments (None disables the delta)
+
+# End-to-end answer evaluation (evaluate.py --answers)
+ANSWER_EVAL_CACHE_DIR = ARTIFACTS_DIR / "answer_eval_cache"  # generations and grades keyed by question, index, config
+ANSWER_EVAL_REPORT_PATH = REPORTS_DIR / "answer_evaluation.json"
+ANSWER_EVAL_WORKERS = 8  # questions answered concurrently
+FAITHFULNESS_SUPPORT_THRESHOLD = 0.6  # share of an answer sentence's terms the context must contain to support it
+
 # Batch processing settings
 BATCH_SIZE = 20
 BATCH_WAIT_TIME = 30  # seconds
@@ -34,3 +123,12 @@ If you don't know an answer, say you don't know.
 """
 
 HUMAN_PROMPT_TEMPLATE = "{question}"
+
+CONDENSE_QUESTION_PROMPT_TEMPLATE = """Given the conversation below and a follow-up question, rewrite the follow-up as a standalone question.
+Keep every hospital name, physician name or topic the follow-up refers to, and return only the question.
+
+Conversation:
+{history}
+
+Follow-up question: {question}
+Standalone question:"""
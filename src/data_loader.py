@@ -1,30 +1,46 @@
 """Data loading functionality for the RAG chatbot."""
 
+import csv
 import logging
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
-from langchain.document_loaders.csv_loader import CSVLoader
-from langchain.schema import Document
+if TYPE_CHECKING:
+    from langchain.schema import Document
 
 logger = logging.getLogger(__name__)
 
 
+def _text(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
 class ReviewDataLoader:
     """Loads and processes hospital review data from CSV files."""
 
-    def __init__(self, csv_path: Path, source_column: str = "review"):
+    def __init__(
+        self,
+        csv_path: Optional[Path],
+        source_column: str = "review",
+        id_column: str = "review_id",
+        metadata_columns: Sequence[str] = (),
+    ):
         """
         Initialize the ReviewDataLoader.
 
         Args:
-            csv_path: Path to the CSV file containing reviews.
+            csv_path: Path to the CSV file containing reviews, or None for a loader that only turns
+                rows (e.g. feed records) into documents with ``document_from_row``.
             source_column: Name of the column containing review text.
+            id_column: Name of the column holding the numeric review identifier.
+            metadata_columns: Columns copied into document metadata (they stay in the content too).
         """
         self.csv_path = csv_path
         self.source_column = source_column
+        self.id_column = id_column
+        self.metadata_columns = tuple(metadata_columns)
 
-    def load_reviews(self) -> List[Document]:
+    def load_reviews(self) -> List["Document"]:
         """
         Load reviews from the CSV file.
 
@@ -34,15 +50,95 @@ class ReviewDataLoader:
         Raises:
             FileNotFoundError: If the CSV file doesn't exist.
         """
-        if not self.csv_path.exists():
-            raise FileNotFoundError(f"CSV file not found at {self.csv_path}")
-
         logger.info(f"Loading reviews from {self.csv_path}")
-        loader = CSVLoader(file_path=str(self.csv_path), source_column=self.source_column)
-        reviews = loader.load()
+        reviews = list(self.iter_reviews())
         logger.info(f"Loaded {len(reviews)} reviews successfully")
         return reviews
 
-    def get_review_count(self, reviews: List[Document]) -> int:
+    def iter_reviews(self, review_id_range: Optional[Tuple[int, int]] = None) -> Iterator["Document"]:
+        """
+        Stream reviews from the CSV file one row at a time.
+
+        Documents use the same ``column: value`` content layout as LangChain's
+        ``CSVLoader``, with ``source`` and ``row`` metadata.
+
+        Args:
+            review_id_range: Optional half-open ``(start, end)`` range of review ids to keep. Rows outside
+                it are only tokenized, so a sharded build's workers each pay for building their own rows.
+
+        Raises:
+            FileNotFoundError: If the CSV file doesn't exist.
+        """
+        with open(self._require_csv(), newline="", encoding="utf-8") as csv_file:
+            reader = csv.reader(csv_file)
+            header = next(reader, [])
+            id_index = header.index(self.id_column) if review_id_range is not None else None
+            for i, values in enumerate(values for values in reader if values):
+                if id_index is not None and not review_id_range[0] <= int(values[id_index]) < review_id_range[1]:
+                    continue
+                yield self.document_from_row(_row(header, values), i)
+
+    def document_from_row(self, row: Dict[str, Any], row_number: int) -> "Document":
+        """
+        Build the document for one review row (a CSV row or a feed record).
+
+        Raises:
+            KeyError: If the row lacks the source column or a metadata column.
+        """
+        from langchain_core.documents import Document
+
+        content = "\n".join(f"{str(key).strip()}: {_text(value).strip()}" for key, value in row.items())
+        metadata = {"source": _text(row[self.source_column]), "row": row_number}
+        for column in self.metadata_columns:
+            metadata[column] = _text(row[column])
+        return Document(page_content=content, metadata=metadata)
+
+    def partition_review_ids(self, num_partitions: int) -> List[Tuple[int, int]]:
+        """
+        Split the review id space into contiguous ranges of roughly equal row count.
+
+        Only the id column is parsed, so this pass is cheap compared to loading documents.
+
+        Returns:
+            Half-open ``(start, end)`` ranges covering every review id, in ascending order.
+        """
+        import numpy as np
+
+        with open(self._require_csv(), newline="", encoding="utf-8") as csv_file:
+            reader = csv.reader(csv_file)
+            id_index = next(reader, []).index(self.id_column)
+            ids = np.fromiter((int(values[id_index]) for values in reader if values), dtype=np.int64)
+        return _id_ranges(ids, num_partitions)
+
+    def _require_csv(self) -> Path:
+        if self.csv_path is None:
+            raise ValueError("This loader has no CSV file; it only builds documents from rows")
+        if not self.csv_path.exists():
+            raise FileNotFoundError(f"CSV file not found at {self.csv_path}")
+        return self.csv_path
+
+    def get_review_count(self, reviews: List["Document"]) -> int:
         """Return the number of reviews."""
         return len(reviews)
+
+
+def _row(header: List[str], values: List[str]) -> Dict[str, Any]:
+    """The row ``csv.DictReader`` would build: missing values are None, extra ones are listed under None."""
+    row: Dict[Any, Any] = dict(zip(header, values))
+    if len(values) < len(header):
+        row.update(dict.fromkeys(header[len(values) :]))
+    elif len(values) > len(header):
+        row[None] = values[len(header) :]
+    return row
+
+
+def _id_ranges(ids: Any, num_partitions: int) -> List[Tuple[int, int]]:
+    """Half-open review-id ranges of roughly equal row count covering every id in the array ``ids``."""
+    if ids.size == 0:
+        return []
+    ids = ids.copy()
+    ids.sort()
+    num_partitions = max(1, min(num_partitions, ids.size))
+    cut_points = [int(ids[(ids.size * i) // num_partitions]) for i in range(1, num_partitions)]
+    bounds = sorted(set([int(ids[0])] + cut_points + [int(ids[-1]) + 1]))
+    return list(zip(bounds[:-1], bounds[1:]))
@@ -0,0 +1,317 @@
+"""Near-duplicate review detection with MinHash signatures and LSH banding.
+
+Template-like reviews ("The medical staff were attentive...") are clustered
+before embedding so only one representative per cluster is embedded and
+indexed; the other members' review ids are kept in its metadata.
+"""
+
+import logging
+import math
+import re
+import zlib
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+    from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_FNV_OFFSET = 0xCBF29CE484222325  # 64-bit FNV-1a, used to hash LSH bands
+_FNV_PRIME = 0x100000001B3
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+@dataclass
+class DedupReport:
+    """Summary of what near-duplicate removal saved."""
+
+    input_documents: int
+    unique_documents: int
+    duplicate_clusters: int
+    duplicates_removed: int
+    embedding_calls_saved: int
+    index_entries_saved: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class _UnionFind:
+    def __init__(self, size: int) -> None:
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a: int, b: int) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+class NearDuplicateDetector:
+    """Clusters near-identical texts using MinHash + LSH."""
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 128,
+        bands: int = 32,
+        shingle_size: int = 3,
+        seed: int = 1,
+    ) -> None:
+        """
+        Initialize the detector.
+
+        Args:
+            threshold: Estimated Jaccard similarity of word shingles above which two texts are duplicates.
+            num_perm: Number of MinHash permutations per signature.
+            bands: LSH bands; ``num_perm`` must be divisible by it. More bands find more candidate pairs.
+            shingle_size: Number of consecutive words per shingle.
+            seed: Seed for the permutation coefficients.
+        """
+        import numpy as np
+
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        generator = np.random.default_rng(seed)
+        self._a = generator.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = generator.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+
+    def _shingle_hashes(self, text: str) -> "np.ndarray":
+        import numpy as np
+
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        if len(tokens) <= self.shingle_size:
+            shingles = {" ".join(tokens)}
+        else:
+            shingles = {
+                " ".join(tokens[i : i + self.shingle_size]) for i in range(len(tokens) - self.shingle_size + 1)
+            }
+        return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+    def signatures(self, texts: Sequence[str]) -> "np.ndarray":
+        """Compute a ``(len(texts), num_perm)`` MinHash signature matrix."""
+        import numpy as np
+
+        signatures = np.empty((len(texts), self.num_perm), dtype=np.uint64)
+        for row, text in enumerate(texts):
+            hashes = self._shingle_hashes(text)
+            signatures[row] = ((np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME).min(axis=0)
+        return signatures
+
+    def cluster(self, texts: Sequence[str]) -> List[List[int]]:
+        """
+        Group the indices of near-duplicate texts.
+
+        Returns:
+            Clusters as sorted index lists, ordered by their first member; singletons included.
+        """
+        if not texts:
+            return []
+        signatures = self.signatures(texts)
+        return self.cluster_signatures(self.band_keys(signatures), signatures.__getitem__)
+
+    def band_keys(self, signatures: "np.ndarray") -> "np.ndarray":
+        """Hash every LSH band of a signature matrix to one ``uint64`` bucket key, shape ``(rows, bands)``."""
+        import numpy as np
+
+        keys = np.empty((len(signatures), self.bands), dtype=np.uint64)
+        prime = np.uint64(_FNV_PRIME)
+        with np.errstate(over="ignore"):
+            for band in range(self.bands):
+                key = np.full(len(signatures), _FNV_OFFSET, dtype=np.uint64)
+                for column in range(band * self.rows, (band + 1) * self.rows):
+                    key = (key ^ signatures[:, column]) * prime
+                keys[:, band] = key
+        return keys
+
+    def cluster_signatures(self, band_keys: "np.ndarray", signature: Callable[[int], "np.ndarray"]) -> List[List[int]]:
+        """
+        Group near-duplicates from their band keys; ``signature(i)`` returns the MinHash signature of row ``i``.
+
+        Signatures are only read for candidate pairs, so they can stay on disk
+        (e.g. memory-mapped per shard) while a whole corpus is clustered.
+
+        Returns:
+            Clusters as sorted index lists, ordered by their first member; singletons included.
+        """
+        import numpy as np
+
+        clusters = _UnionFind(len(band_keys))
+        for band in range(self.bands):
+            column = band_keys[:, band]
+            order = np.argsort(column, kind="stable")  # stable: bucket members stay in index order
+            ordered = column[order]
+            starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+            ends = np.r_[starts[1:], len(ordered)]
+            for start, end in zip(starts[ends - starts > 1], ends[ends - starts > 1]):
+                anchor = int(order[start])
+                anchor_signature = signature(anchor)
+                for other in order[start + 1 : end]:
+                    other = int(other)
+                    if clusters.find(anchor) == clusters.find(other):
+                        continue
+                    if float(np.mean(anchor_signature == signature(other))) >= self.threshold:
+                        clusters.union(anchor, other)
+
+        groups: Dict[int, List[int]] = {}
+        for index in range(len(band_keys)):
+            groups.setdefault(clusters.find(index), []).append(index)
+        return sorted(groups.values(), key=lambda members: members[0])
+
+
+def _document_text(document: "Document") -> str:
+    """Review text of a document, falling back to its full content."""
+    return str(document.metadata.get("source") or document.page_content)
+
+
+def _document_id(document: "Document") -> str:
+    return str(document.metadata.get("review_id", document.metadata.get("row", "")))
+
+
+def mark_duplicates(representative: "Document", duplicate_ids: Sequence[str]) -> None:
+    """Record the review ids of the near-duplicates a representative stands for."""
+    representative.metadata["duplicate_review_ids"] = ",".join(duplicate_ids)
+    representative.metadata["duplicate_count"] = len(duplicate_ids)
+
+
+def document_signatures(documents: Sequence["Document"], detector: NearDuplicateDetector) -> "np.ndarray":
+    """MinHash signatures of the review texts of ``documents``."""
+    return detector.signatures([_document_text(document) for document in documents])
+
+
+def document_ids(documents: Sequence["Document"]) -> List[str]:
+    """Review ids recorded for ``documents`` when they are skipped as duplicates."""
+    return [_document_id(document) for document in documents]
+
+
+@dataclass
+class DuplicatePlan:
+    """Corpus-wide near-duplicate clusters of a sharded build, keyed by CSV row number."""
+
+    skip_rows: Set[int]
+    duplicates: Dict[int, List[str]]  # representative row -> review ids of the rows it stands for
+    report: DedupReport
+
+
+def plan_deduplication(
+    detector: NearDuplicateDetector,
+    signature_paths: Sequence[Path],
+    rows: Sequence[int],
+    ids: Sequence[str],
+    scopes: Sequence[Any],
+    batch_size: int = 20,
+) -> DuplicatePlan:
+    """
+    Cluster a corpus whose MinHash signatures were computed in parts, e.g. one ``.npy`` file per shard.
+
+    The signature files are memory-mapped and concatenated in order, aligned
+    with ``rows``, ``ids`` and ``scopes``. Only rows sharing a scope value are
+    merged, and each cluster is represented by its lowest row number, the
+    review an unsharded build would keep.
+    """
+    import numpy as np
+
+    parts = [np.load(path, mmap_mode="r") for path in signature_paths]
+    offsets = np.cumsum([0] + [len(part) for part in parts])
+    if len(rows) != offsets[-1]:
+        raise ValueError(f"{offsets[-1]} signatures for {len(rows)} rows")
+    keys = np.concatenate([detector.band_keys(part) for part in parts]) if parts else np.empty((0, detector.bands))
+
+    def signature(index: int) -> "np.ndarray":
+        part = int(np.searchsorted(offsets, index, side="right")) - 1
+        return parts[part][index - offsets[part]]
+
+    by_scope: Dict[Any, List[int]] = {}
+    for index, scope in enumerate(scopes):
+        by_scope.setdefault(scope, []).append(index)
+
+    skip_rows: Set[int] = set()
+    duplicates: Dict[int, List[str]] = {}
+    for indices in by_scope.values():
+        for cluster in detector.cluster_signatures(keys[indices], lambda i: signature(indices[i])):
+            if len(cluster) == 1:
+                continue
+            members = sorted((indices[i] for i in cluster), key=lambda index: rows[index])
+            duplicates[rows[members[0]]] = [ids[index] for index in members[1:]]
+            skip_rows.update(rows[index] for index in members[1:])
+
+    total, removed = len(rows), len(skip_rows)
+    report = DedupReport(
+        input_documents=total,
+        unique_documents=total - removed,
+        duplicate_clusters=len(duplicates),
+        duplicates_removed=removed,
+        embedding_calls_saved=math.ceil(total / batch_size) - math.ceil((total - removed) / batch_size),
+        index_entries_saved=removed,
+    )
+    return DuplicatePlan(skip_rows, duplicates, report)
+
+
+def deduplicate_documents(
+    documents: List["Document"],
+    detector: NearDuplicateDetector,
+    scope_key: Optional[str] = None,
+    batch_size: int = 20,
+) -> Tuple[List["Document"], DedupReport]:
+    """
+    Keep one representative document per near-duplicate cluster.
+
+    Each representative gets ``duplicate_review_ids`` (comma-separated, since
+    Chroma metadata cannot hold lists) and ``duplicate_count`` metadata.
+
+    Args:
+        documents: Documents to deduplicate, in ingestion order.
+        detector: Configured NearDuplicateDetector.
+        scope_key: Optional metadata key (e.g. ``hospital_name``); only documents sharing its value are merged.
+        batch_size: Embedding batch size, used to report the API calls saved.
+
+    Returns:
+        The representative documents and a DedupReport.
+    """
+    scopes: Dict[Any, List[int]] = {}
+    for index, document in enumerate(documents):
+        scopes.setdefault(document.metadata.get(scope_key) if scope_key else None, []).append(index)
+
+    keep: List[int] = []
+    duplicate_clusters = 0
+    for indices in scopes.values():
+        for cluster in detector.cluster([_document_text(documents[i]) for i in indices]):
+            members = [indices[i] for i in cluster]
+            representative = documents[members[0]]
+            keep.append(members[0])
+            if len(members) > 1:
+                duplicate_clusters += 1
+                mark_duplicates(representative, [_document_id(documents[i]) for i in members[1:]])
+
+    unique = [documents[i] for i in sorted(keep)]
+    removed = len(documents) - len(unique)
+    report = DedupReport(
+        input_documents=len(documents),
+        unique_documents=len(unique),
+        duplicate_clusters=duplicate_clusters,
+        duplicates_removed=removed,
+        embedding_calls_saved=math.ceil(len(documents) / batch_size) - math.ceil(len(unique) / batch_size),
+        index_entries_saved=removed,
+    )
+    logger.info(
+        "Deduplication kept %d of %d documents (%d clusters, %d embedding calls saved)",
+        report.unique_documents,
+        report.input_documents,
+        report.duplicate_clusters,
+        report.embedding_calls_saved,
+    )
+    return unique, report
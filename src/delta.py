@@ -0,0 +1,368 @@
+"""Append-only delta segments layered over the serving index.
+
+Rows ingested from the live review feed are embedded in micro-batches and each
+batch is written as a small memory-mapped snapshot segment under the delta
+directory. ``SEGMENTS.json`` lists the committed segments together with the
+feed offset they cover and is replaced atomically with ``os.replace``, so a
+segment and its offset become visible together: a worker restarted after a
+crash resumes exactly after the last committed batch and never re-embeds it.
+
+Serving processes wrap their base index in ``LiveIndex``, which picks up new
+segments by polling the manifest and merges their hits with the base index, so
+new reviews are searchable without reloading the whole store.
+"""
+
+import heapq
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from .chunking import CHUNK_COUNT, CHUNK_INDEX
+from .snapshot import IndexSnapshot, write_snapshot
+
+if TYPE_CHECKING:
+    from langchain.schema import Document
+    from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+SEGMENTS_FILE = "SEGMENTS.json"
+SEGMENT_PREFIX = "segment-"
+
+
+def read_delta_manifest(directory: Path) -> Dict[str, Any]:
+    """The committed delta state; empty (no segments, no offset) when nothing was ingested yet."""
+    try:
+        return json.loads((directory / SEGMENTS_FILE).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {"segments": [], "offset": None, "rows": 0, "next_segment": 1}
+
+
+class DeltaWriter:
+    """Commits embedded micro-batches as delta segments; one writer per delta directory."""
+
+    def __init__(self, directory: Path, embedding_model: Optional[str] = None) -> None:
+        """
+        Open (or create) a delta directory and remove segments left behind by an interrupted commit.
+
+        Args:
+            directory: Delta directory shared with the serving processes.
+            embedding_model: Embedding model recorded in every segment.
+        """
+        self.directory = directory
+        self.embedding_model = embedding_model
+        directory.mkdir(parents=True, exist_ok=True)
+        self.state = read_delta_manifest(directory)
+        self._remove_uncommitted()
+
+    @property
+    def segments(self) -> List[str]:
+        """Committed segment names, oldest first."""
+        return list(self.state["segments"])
+
+    @property
+    def offset(self) -> Optional[Dict[str, Any]]:
+        """Feed offset covered by the committed segments."""
+        return self.state["offset"]
+
+    def append(
+        self,
+        ids: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        texts: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+        offset: Dict[str, Any],
+    ) -> str:
+        """
+        Write one batch as a new segment and commit it together with the feed ``offset``.
+
+        Returns:
+            Name of the committed segment.
+        """
+        name = f"{SEGMENT_PREFIX}{self.state['next_segment']:06d}"
+        dimension = len(vectors[0]) if len(vectors) else 0
+        write_snapshot(
+            self.directory / name,
+            [(ids, vectors, texts, metadatas)],
+            count=len(ids),
+            dimension=dimension,
+            embedding_model=self.embedding_model,
+        )
+        self._commit(
+            segments=self.segments + [name],
+            offset=offset,
+            rows=self.state["rows"] + len(ids),
+            next_segment=self.state["next_segment"] + 1,
+        )
+        return name
+
+    def compact(self, key: str = "review_id") -> Optional[str]:
+        """
+        Merge all segments into one, keeping only the newest record per ``key``.
+
+        A review indexed as sentence-window chunks is one record made of all its
+        chunks: every chunk of its newest version is kept and older versions are
+        dropped as a whole.
+
+        Serving processes keep reading the old segments until they see the new
+        manifest; old segment directories are removed right after the commit and
+        stay readable through already-open memory maps.
+
+        Returns:
+            Name of the merged segment, or None when there was nothing to merge.
+        """
+        old_segments = self.segments
+        if len(old_segments) < 2:
+            return None
+
+        kept_chunks: Dict[str, set] = {}  # chunk indexes kept from the newest version of each record
+        chunk_counts: Dict[str, int] = {}
+        ids, vectors, texts, metadatas = [], [], [], []
+        for name in reversed(old_segments):
+            segment = IndexSnapshot(self.directory / name, embedding_function=None)
+            for row in range(len(segment) - 1, -1, -1):
+                document = segment.get_document(row)
+                record_key = None if document.metadata.get(key) is None else str(document.metadata[key])
+                if record_key is not None:
+                    chunk_index = document.metadata.get(CHUNK_INDEX, 0)
+                    if record_key not in kept_chunks:
+                        chunk_counts[record_key] = int(document.metadata.get(CHUNK_COUNT, 1))
+                    kept = kept_chunks.setdefault(record_key, set())
+                    # Rows are visited newest first, so once the newest version is complete older rows are stale.
+                    if chunk_index in kept or len(kept) >= chunk_counts[record_key]:
+                        continue
+                    kept.add(chunk_index)
+                ids.append(document.id)
+                vectors.append(segment.vectors[row].tolist())
+                texts.append(document.page_content)
+                metadatas.append(document.metadata)
+        for collection in (ids, vectors, texts, metadatas):
+            collection.reverse()
+
+        name = f"{SEGMENT_PREFIX}{self.state['next_segment']:06d}"
+        write_snapshot(
+            self.directory / name,
+            [(ids, vectors, texts, metadatas)],
+            count=len(ids),
+            dimension=len(vectors[0]),
+            embedding_model=self.embedding_model,
+        )
+        self._commit(segments=[name], next_segment=self.state["next_segment"] + 1)
+        for old in old_segments:
+            shutil.rmtree(self.directory / old, ignore_errors=True)
+        logger.info("Compacted %d delta segments into %s (%d records)", len(old_segments), name, len(ids))
+        return name
+
+    def reset(self) -> None:
+        """Drop every segment and the feed offset, e.g. after the feed was folded into a full rebuild."""
+        self._commit(segments=[], offset=None, rows=0)
+        self._remove_uncommitted()
+
+    def _commit(self, **changes: Any) -> None:
+        state = {**self.state, **changes, "updated_at": time.time()}
+        path = self.directory / SEGMENTS_FILE
+        temporary = path.with_name(f"{SEGMENTS_FILE}.{os.getpid()}.tmp")
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump(state, handle, indent=2)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, path)
+        self.state = state
+
+    def _remove_uncommitted(self) -> None:
+        committed = set(self.segments)
+        for path in self.directory.iterdir():
+            if path.is_dir() and path.name.startswith(SEGMENT_PREFIX) and path.name not in committed:
+                logger.info("Removing uncommitted delta segment %s", path.name)
+                shutil.rmtree(path, ignore_errors=True)
+
+
+class LiveIndex:
+    """
+    Serves a base index plus the delta segments committed by the ingest worker.
+
+    The manifest is checked at most every ``poll_seconds`` from the search path,
+    and only new segments are opened. A record in a newer segment replaces the
+    same ``key`` in older segments and in the base index, so re-delivered or
+    edited reviews are returned once, in their latest form.
+    """
+
+    def __init__(
+        self,
+        base: Any,
+        delta_directory: Path,
+        poll_seconds: float = 1.0,
+        key: str = "review_id",
+    ) -> None:
+        """
+        Initialize the live index.
+
+        Args:
+            base: Index built by ``build_vectorstore.py`` (Chroma, snapshot or sharded store).
+            delta_directory: Directory written by the ingest worker's ``DeltaWriter``.
+            poll_seconds: Minimum interval between manifest checks.
+            key: Metadata field identifying a review across the base index and the delta.
+        """
+        self.base = base
+        self.delta_directory = delta_directory
+        self.poll_seconds = poll_seconds
+        self.key = key
+        self.refreshes = 0
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._segments: Dict[str, IndexSnapshot] = {}
+        self._segment_keys: Dict[str, List[Optional[str]]] = {}
+        self._view: Tuple[List[IndexSnapshot], Dict[str, int], int] = ([], {}, 0)
+        self._offset: Optional[Dict[str, Any]] = None
+        self.refresh(force=True)
+
+    @property
+    def embeddings(self) -> "Embeddings":
+        """Embedding function used for queries, mirroring the LangChain vector store API."""
+        return self.base.embeddings
+
+    @property
+    def partition_key(self) -> Optional[str]:
+        """Metadata field the base index is partitioned by, if any."""
+        return getattr(self.base, "partition_key", None)
+
+    @property
+    def partition_values(self) -> List[str]:
+        """Partition values of the base index (empty when it is not partitioned)."""
+        return list(getattr(self.base, "partition_values", []))
+
+    def shards_for_values(self, values: Sequence[str]) -> List[str]:
+        """Map partition values to shard names of the base index."""
+        return self.base.shards_for_values(values)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Open segments committed since the last check; returns True when the view changed."""
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return False
+        with self._lock:
+            self._next_check = now + self.poll_seconds
+            try:
+                stat = os.stat(self.delta_directory / SEGMENTS_FILE)
+                stamp = (stat.st_ino, stat.st_mtime_ns)
+            except FileNotFoundError:
+                stamp = None
+            if stamp == self._stamp:
+                return False
+
+            manifest = read_delta_manifest(self.delta_directory)
+            try:
+                segments = {
+                    name: self._segments.get(name) or IndexSnapshot(self.delta_directory / name, self.embeddings)
+                    for name in manifest["segments"]
+                }
+            except FileNotFoundError:
+                # Compacted away between reading the manifest and opening it; retry on the next check.
+                logger.debug("Delta segment disappeared during refresh; retrying on the next poll")
+                return False
+
+            keys = {name: self._segment_keys.get(name) or self._read_keys(segments[name]) for name in segments}
+            ordered = [segments[name] for name in manifest["segments"]]
+            latest: Dict[str, int] = {}
+            for position, name in enumerate(manifest["segments"]):
+                latest.update((record_key, position) for record_key in keys[name] if record_key is not None)
+            self._segments, self._segment_keys = segments, keys
+            self._view = (ordered, latest, sum(len(segment) for segment in ordered))
+            self._offset = manifest["offset"]
+            self._stamp = stamp
+            self.refreshes += 1
+        logger.info("Delta index refreshed: %d segments, %d documents", len(ordered), self._view[2])
+        return True
+
+    def delta_metrics(self) -> Dict[str, Any]:
+        """Size and freshness of the delta currently served."""
+        segments, latest, documents = self._view
+        return {
+            "segments": len(segments),
+            "documents": documents,
+            "reviews": len(latest),
+            "refreshes": self.refreshes,
+            "offset": self._offset,
+        }
+
+    def similarity_search_by_vectors_with_score(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        k: int = 4,
+        shard_names: Optional[Sequence[str]] = None,
+    ) -> List[List[Tuple["Document", float]]]:
+        """Search the base index and the delta, returning the merged ``k`` best per query embedding."""
+        from .vectorstore import similarity_search_by_vectors_with_score
+
+        self.refresh()
+        segments, latest, documents = self._view
+        # Over-fetch from the base so results replaced by delta records can be dropped without a short page.
+        base_k = k + min(len(latest), k)
+        if shard_names is None:
+            base_results = similarity_search_by_vectors_with_score(self.base, embeddings, base_k)
+        else:
+            base_results = self.base.similarity_search_by_vectors_with_score(embeddings, base_k, shard_names)
+        if not documents:
+            return [results[:k] for results in base_results]
+
+        allowed = self._partition_filter(shard_names)
+        delta_results = [segment.similarity_search_by_vectors_with_score(embeddings, k) for segment in segments]
+        merged = []
+        for row, base_hits in enumerate(base_results):
+            candidates = [hit for hit in base_hits if self._key(hit[0]) not in latest]
+            for position, segment_hits in enumerate(delta_results):
+                candidates.extend(
+                    hit
+                    for hit in segment_hits[row]
+                    if latest.get(self._key(hit[0])) in (position, None)
+                    and (allowed is None or str(hit[0].metadata.get(self.partition_key, "")).lower() in allowed)
+                )
+            merged.append(heapq.nlargest(k, candidates, key=lambda item: item[1]))
+        return merged
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: Sequence[float],
+        k: int = 4,
+        shard_names: Optional[Sequence[str]] = None,
+    ) -> List[Tuple["Document", float]]:
+        """Return the merged ``k`` best documents for one query embedding."""
+        return self.similarity_search_by_vectors_with_score([embedding], k, shard_names)[0]
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        shard_names: Optional[Sequence[str]] = None,
+    ) -> List[Tuple["Document", float]]:
+        """Embed ``query`` and search the base index and the delta."""
+        return self.similarity_search_by_vector_with_score(self.embeddings.embed_query(query), k, shard_names)
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        shard_names: Optional[Sequence[str]] = None,
+    ) -> List["Document"]:
+        """Embed ``query`` and return the merged top-k documents."""
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, shard_names)]
+
+    def _read_keys(self, segment: IndexSnapshot) -> List[Optional[str]]:
+        return [self._key(segment.get_document(row)) for row in range(len(segment))]
+
+    def _key(self, document: "Document") -> Optional[str]:
+        value = document.metadata.get(self.key)
+        return None if value is None else str(value)
+
+    def _partition_filter(self, shard_names: Optional[Sequence[str]]) -> Optional[set]:
+        """Partition values (lower-cased) of the selected shards, or None when every delta record qualifies."""
+        if shard_names is None or not self.partition_key:
+            return None
+        selected = set(shard_names)
+        return {value.lower() for value in self.partition_values if set(self.shards_for_values([value])) & selected}
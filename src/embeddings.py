@@ -2,10 +2,13 @@
 
 import logging
 import time
-from typing import List
+from typing import TYPE_CHECKING, List, Optional
 
-from langchain.schema import Document
-from langchain_chroma import Chroma
+from .profiling import Profiler
+
+if TYPE_CHECKING:
+    from langchain.schema import Document
+    from langchain_chroma import Chroma
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +20,7 @@ class BatchEmbeddingProcessor:
         self,
         batch_size: int = 20,
         wait_time: int = 30,
+        profiler: Optional[Profiler] = None,
     ) -> None:
         """
         Initialize the batch processor.
@@ -24,15 +28,17 @@ class BatchEmbeddingProcessor:
         Args:
             batch_size: Number of documents to process per batch.
             wait_time: Time to wait between batches in seconds.
+            profiler: Optional profiler sampling embedding batches (the wait between batches is excluded).
         """
         self.batch_size = batch_size
         self.wait_time = wait_time
+        self.profiler = profiler or Profiler.disabled()
 
     def process_documents_in_batches(
         self,
-        documents: List[Document],
+        documents: List["Document"],
         vector_store_manager,
-    ) -> Chroma:
+    ) -> "Chroma":
         """
         Process documents in batches to create a vector store.
 
@@ -54,22 +60,24 @@ class BatchEmbeddingProcessor:
 
             logger.info(f"Processing batch {current_batch_num}/{num_batches}...")
 
-            if i == 0:
-                vector_db = vector_store_manager.create_vector_store(
-                    documents=batch_docs,
-                    recreate=True,
-                )
-            else:
-                if vector_db is None:
-                    raise RuntimeError("Vector store is not initialized. Ensure recreate=True for the first batch.")
-                vector_db.add_documents(documents=batch_docs)
+            with self.profiler.profile(f"embedding_batch_{current_batch_num}"):
+                if i == 0:
+                    vector_db = vector_store_manager.create_vector_store(
+                        documents=batch_docs,
+                        recreate=True,
+                    )
+                else:
+                    if vector_db is None:
+                        raise RuntimeError("Vector store is not initialized. Ensure recreate=True for the first batch.")
+                    vector_db.add_documents(documents=batch_docs)
 
             if current_batch_num < num_batches:
                 logger.info(f"Batch {current_batch_num} processed. Waiting {self.wait_time} seconds...")
                 time.sleep(self.wait_time)
             else:
                 logger.info(f"Batch {current_batch_num} processed (final batch). Persisting store...")
-                if vector_db is not None:
+                # langchain-chroma persists automatically; older Chroma wrappers need an explicit call.
+                if vector_db is not None and hasattr(vector_db, "persist"):
                     vector_db.persist()
 
         logger.info("All batches processed successfully")
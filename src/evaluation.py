@@ -2,10 +2,13 @@
 
 import logging
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-import pandas as pd
-from langchain_chroma import Chroma
+from .profiling import Profiler
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from langchain_chroma import Chroma
 
 logger = logging.getLogger(__name__)
 
@@ -18,19 +21,43 @@ class EvaluationSample:
     expected_keywords: List[str]
 
 
+DEFAULT_EVALUATION_SAMPLES = [
+    EvaluationSample(
+        question="Has anyone complained about communication with the hospital staff?",
+        expected_keywords=["communication", "staff", "coordination", "nursing"],
+    ),
+    EvaluationSample(
+        question="What did patients say about the discharge process?",
+        expected_keywords=["discharge", "process", "seamless", "released"],
+    ),
+    EvaluationSample(
+        question="Were there any positive experiences mentioned?",
+        expected_keywords=["positive", "great", "excellent", "wonderful"],
+    ),
+    EvaluationSample(
+        question="What are common complaints about the facilities?",
+        expected_keywords=["facilities", "parking", "room", "equipment"],
+    ),
+]
+
+
 class RetrieverEvaluator:
     """Evaluates the retriever performance using keyword matching."""
 
-    def __init__(self, vector_store: Chroma, top_k: int = 5) -> None:
+    def __init__(self, vector_store: "Chroma", top_k: int = 5, profiler: Optional[Profiler] = None) -> None:
         self.vector_store = vector_store
         self.top_k = top_k
+        self.profiler = profiler or Profiler.disabled()
 
-    def evaluate(self, samples: List[EvaluationSample]) -> pd.DataFrame:
+    def evaluate(self, samples: List[EvaluationSample]) -> "pd.DataFrame":
         """Evaluate the retriever against provided samples."""
+        import pandas as pd
+
         results = []
 
         for sample in samples:
-            retrieved_docs = self.vector_store.similarity_search(sample.question, self.top_k)
+            with self.profiler.profile("evaluate_retrieval"):
+                retrieved_docs = self.vector_store.similarity_search(sample.question, self.top_k)
             combined_text = " ".join(doc.page_content.lower() for doc in retrieved_docs)
             keyword_hits = sum(keyword.lower() in combined_text for keyword in sample.expected_keywords)
             hit_rate = keyword_hits / len(sample.expected_keywords)
@@ -49,7 +76,7 @@ class RetrieverEvaluator:
         return df_results
 
 
-def summarize_evaluation(df_results: pd.DataFrame) -> Dict[str, float]:
+def summarize_evaluation(df_results: "pd.DataFrame") -> Dict[str, float]:
     """Generate summary statistics from evaluation results."""
     return {
         "average_hit_rate": df_results["hit_rate"].mean(),
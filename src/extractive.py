@@ -0,0 +1,144 @@
+"""LLM-free extractive answers built directly from retrieved reviews."""
+
+import math
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from .sessions import content_terms
+
+if TYPE_CHECKING:
+    from langchain.schema import Document
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+_SUFFIXES = ("ing", "ed", "es", "ly", "s", "e")
+OTHER_GROUP = "Other reviews"
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split review text into sentences."""
+    return [sentence.strip() for sentence in _SENTENCE_BOUNDARY.split(text.strip()) if sentence.strip()]
+
+
+def _stem(token: str) -> str:
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[: -len(suffix)]
+    return token
+
+
+def sentence_terms(text: str) -> Set[str]:
+    """Stemmed content words, so "discharged" matches "discharge"."""
+    return {_stem(token) for token in content_terms(text)}
+
+
+@dataclass
+class RankedSentence:
+    """A review sentence scored against the question."""
+
+    text: str
+    score: float
+    group: str
+    review_id: Optional[str]
+
+
+class ExtractiveAnswerer:
+    """
+    Answers by quoting the retrieved review sentences closest to the question.
+
+    Sentences are scored by TF-IDF cosine similarity to the question (IDF taken
+    over the retrieved sentences), plus a small prior for the retrieval rank of
+    their review. Near-identical sentences are dropped, and the rest are grouped
+    by hospital. Everything runs locally, with no model or embedding calls.
+    """
+
+    def __init__(
+        self,
+        group_key: str = "hospital_name",
+        max_sentences: int = 8,
+        max_per_group: int = 3,
+        duplicate_threshold: float = 0.8,
+        rank_weight: float = 0.1,
+    ) -> None:
+        """
+        Initialize the answerer.
+
+        Args:
+            group_key: Document metadata key to group quotes by.
+            max_sentences: Maximum number of quoted sentences.
+            max_per_group: Maximum quotes per group.
+            duplicate_threshold: Jaccard overlap of stemmed terms above which a sentence repeats an earlier one.
+            rank_weight: Weight of the document retrieval-rank prior relative to lexical similarity.
+        """
+        self.group_key = group_key
+        self.max_sentences = max_sentences
+        self.max_per_group = max_per_group
+        self.duplicate_threshold = duplicate_threshold
+        self.rank_weight = rank_weight
+
+    def rank(self, question: str, documents: List["Document"]) -> List[RankedSentence]:
+        """Score every sentence of ``documents``, best first, with near-duplicates removed."""
+        candidates = []
+        for rank, document in enumerate(documents):
+            text = str(document.metadata.get("source") or document.page_content)
+            group = str(document.metadata.get(self.group_key) or OTHER_GROUP)
+            review_id = document.metadata.get("review_id", document.metadata.get("row"))
+            for sentence in split_sentences(text):
+                candidates.append((sentence, sentence_terms(sentence), group, review_id, rank))
+        if not candidates:
+            return []
+
+        document_frequency: Dict[str, int] = {}
+        for _, terms, _, _, _ in candidates:
+            for term in terms:
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+
+        def idf(term: str) -> float:
+            return math.log(1 + len(candidates) / document_frequency.get(term, 1))
+
+        query_terms = sentence_terms(question)
+        query_norm = math.sqrt(sum(idf(term) ** 2 for term in query_terms)) or 1.0
+        ranked = []
+        for sentence, terms, group, review_id, rank in candidates:
+            sentence_norm = math.sqrt(sum(idf(term) ** 2 for term in terms)) or 1.0
+            similarity = sum(idf(term) ** 2 for term in query_terms & terms) / (query_norm * sentence_norm)
+            score = similarity + self.rank_weight / (1 + rank)
+            ranked.append((score, sentence, terms, group, review_id))
+        ranked.sort(key=lambda item: item[0], reverse=True)
+
+        kept: List[RankedSentence] = []
+        kept_terms: List[Set[str]] = []
+        for score, sentence, terms, group, review_id in ranked:
+            if any(_jaccard(terms, other) >= self.duplicate_threshold for other in kept_terms):
+                continue
+            kept.append(RankedSentence(sentence, score, group, None if review_id is None else str(review_id)))
+            kept_terms.append(terms)
+        return kept
+
+    def answer(self, question: str, documents: List["Document"]) -> str:
+        """Render the best sentences as a quoted answer grouped by hospital."""
+        groups: Dict[str, List[RankedSentence]] = {}
+        selected = 0
+        for sentence in self.rank(question, documents):
+            if selected >= self.max_sentences:
+                break
+            quotes = groups.setdefault(sentence.group, [])
+            if len(quotes) < self.max_per_group:
+                quotes.append(sentence)
+                selected += 1
+        if not selected:
+            return "No relevant reviews were found for this question."
+
+        lines = [f"Here is what patients said ({selected} excerpts quoted from the most relevant reviews):"]
+        for group, quotes in groups.items():
+            lines.append(f"\n**{group}**")
+            for quote in quotes:
+                source = f" (review {quote.review_id})" if quote.review_id is not None else ""
+                lines.append(f'- "{quote.text}"{source}')
+        return "\n".join(lines)
+
+
+def _jaccard(first: Set[str], second: Set[str]) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
@@ -0,0 +1,394 @@
+"""Near-real-time ingestion of new reviews from an append-only feed.
+
+The feed is either a single ``.jsonl``/``.csv`` file that producers append to,
+or a directory of drop files processed in name order. ``IngestWorker`` tails
+it, embeds new rows in micro-batches under the embedding rate limit, and
+commits every batch to the delta index together with the feed offset it
+covers (see ``src.delta``), so a restarted worker resumes where it stopped
+without re-embedding anything.
+"""
+
+import csv
+import json
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional, Tuple
+
+from .delta import DeltaWriter
+from .resilience import is_retryable
+from .utils import ensure_directory, percentile
+
+if TYPE_CHECKING:
+    from langchain.schema import Document
+    from langchain_core.embeddings import Embeddings
+
+    from .chunking import SentenceWindowChunker
+    from .data_loader import ReviewDataLoader
+
+logger = logging.getLogger(__name__)
+
+FEED_SUFFIXES = (".jsonl", ".csv")
+
+
+@dataclass
+class FeedRecord:
+    """
+    One feed line: the parsed row (None when unparseable) and a stable id derived from its position.
+
+    ``arrived_at`` is the epoch time the line reached the feed as far as the
+    file shows it: its modification time when the line was read. Lines appended
+    before the latest write look newer than they are, so producers that can
+    should stamp rows themselves (see ``IngestWorker.timestamp_field``).
+    """
+
+    row: Optional[Dict[str, Any]]
+    id: str
+    arrived_at: float = 0.0
+
+
+def _parse_line(text: str, header: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+    try:
+        if header is None:
+            row = json.loads(text)
+            return row if isinstance(row, dict) else None
+        values = next(csv.reader([text]))
+    except (ValueError, csv.Error):
+        return None
+    return dict(zip(header, values)) if len(values) == len(header) else None
+
+
+def _read_records(path: Path, position: int, limit: int, complete: bool) -> Tuple[List[FeedRecord], int]:
+    """
+    Read up to ``limit`` records of ``path`` starting at byte ``position``.
+
+    A trailing line without a newline is still being written and is left for
+    the next read, unless ``complete`` says the file is final. CSV feeds must
+    hold one record per line (no quoted line breaks).
+    """
+    records: List[FeedRecord] = []
+    arrived_at = path.stat().st_mtime
+    with open(path, "rb") as handle:
+        header = None
+        if path.suffix == ".csv":
+            header_line = handle.readline()
+            if not header_line or not (header_line.endswith(b"\n") or complete):
+                return records, position
+            header = [column.strip() for column in next(csv.reader([header_line.decode("utf-8-sig")]))]
+            position = max(position, handle.tell())
+        handle.seek(position)
+        while len(records) < limit:
+            line = handle.readline()
+            if not line or not (line.endswith(b"\n") or complete):
+                break
+            start, position = position, handle.tell()
+            text = line.decode("utf-8", errors="replace").strip()
+            if text:
+                records.append(FeedRecord(_parse_line(text, header), f"{path.name}:{start}", arrived_at))
+    return records, position
+
+
+class FileFeed:
+    """A single append-only ``.jsonl`` or ``.csv`` file."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def read(self, offset: Optional[Dict[str, Any]], limit: int) -> Tuple[List[FeedRecord], Dict[str, Any]]:
+        """
+        Return up to ``limit`` complete records after ``offset`` and the offset after the last one.
+
+        Raises:
+            ValueError: If the offset belongs to another feed or the file shrank (it is not append-only).
+        """
+        position = self._position(offset)
+        if not self.path.exists():
+            return [], {"file": self.path.name, "position": position}
+        records, position = _read_records(self.path, position, limit, complete=False)
+        return records, {"file": self.path.name, "position": position}
+
+    def backlog(self, offset: Optional[Dict[str, Any]]) -> int:
+        """Bytes of the feed not read yet."""
+        size = self.path.stat().st_size if self.path.exists() else 0
+        return max(size - self._position(offset), 0)
+
+    def _position(self, offset: Optional[Dict[str, Any]]) -> int:
+        if offset is None:
+            return 0
+        if offset["file"] != self.path.name:
+            raise ValueError(
+                f"Committed offset belongs to feed {offset['file']}, not {self.path.name}; "
+                "reset the delta to start over"
+            )
+        if self.path.exists() and self.path.stat().st_size < offset["position"]:
+            raise ValueError(f"Feed {self.path} is shorter than its committed offset; it must be append-only")
+        return offset["position"]
+
+
+class DirectoryFeed:
+    """
+    A directory of drop files, read in file-name order.
+
+    Producers must move finished files into the directory (write elsewhere,
+    then rename), so every ``.jsonl``/``.csv`` file in it is complete.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def files(self) -> List[Path]:
+        """Drop files in processing order."""
+        if not self.directory.exists():
+            return []
+        return sorted(path for path in self.directory.iterdir() if path.suffix in FEED_SUFFIXES and path.is_file())
+
+    def read(self, offset: Optional[Dict[str, Any]], limit: int) -> Tuple[List[FeedRecord], Optional[Dict[str, Any]]]:
+        """Return up to ``limit`` records after ``offset``, continuing into later files as earlier ones are used up."""
+        files = self.files()
+        index, position = self._locate(files, offset)
+        records: List[FeedRecord] = []
+        while index < len(files):
+            batch, position = _read_records(files[index], position, limit - len(records), complete=True)
+            records.extend(batch)
+            if len(records) >= limit or index + 1 == len(files):
+                break
+            index, position = index + 1, 0
+        if index == len(files):
+            return records, offset
+        return records, {"file": files[index].name, "position": position}
+
+    def backlog(self, offset: Optional[Dict[str, Any]]) -> int:
+        """Bytes of drop files not read yet."""
+        files = self.files()
+        index, position = self._locate(files, offset)
+        return sum(path.stat().st_size for path in files[index:]) - (position if index < len(files) else 0)
+
+    @staticmethod
+    def _locate(files: List[Path], offset: Optional[Dict[str, Any]]) -> Tuple[int, int]:
+        if offset is None:
+            return 0, 0
+        index = next((i for i, path in enumerate(files) if path.name >= offset["file"]), len(files))
+        if index < len(files) and files[index].name == offset["file"]:
+            return index, offset["position"]
+        return index, 0  # the offset's file was removed after it was fully read
+
+
+def open_feed(path: Path):
+    """Open a feed file, or a directory of drop files."""
+    if path.is_dir() or not path.suffix:
+        return DirectoryFeed(path)
+    if path.suffix not in FEED_SUFFIXES:
+        raise ValueError(f"Unsupported feed format {path.suffix!r}; expected one of {FEED_SUFFIXES}")
+    return FileFeed(path)
+
+
+@dataclass
+class IngestStats:
+    """Counters of one ingest worker."""
+
+    rows_committed: int = 0
+    rows_rejected: int = 0
+    batches: int = 0
+    embedding_retries: int = 0
+    compactions: int = 0
+
+
+class IngestWorker:
+    """Tails a feed and commits new reviews to the delta index in rate-limited micro-batches."""
+
+    def __init__(
+        self,
+        feed: Any,
+        delta: DeltaWriter,
+        embeddings: "Embeddings",
+        data_loader: "ReviewDataLoader",
+        batch_size: int = 20,
+        max_batch_wait_seconds: float = 2.0,
+        min_interval_seconds: float = 5.0,
+        poll_seconds: float = 0.5,
+        max_segments: int = 32,
+        metrics_path: Optional[Path] = None,
+        chunker: Optional["SentenceWindowChunker"] = None,
+        timestamp_field: Optional[str] = "received_at",
+    ) -> None:
+        """
+        Initialize the worker.
+
+        Args:
+            feed: ``FileFeed`` or ``DirectoryFeed`` to tail.
+            delta: Delta index receiving the batches; its committed offset is where reading resumes.
+            embeddings: Embedding client (the model the serving index was built with).
+            data_loader: Turns feed rows into documents laid out like the CSV build.
+            batch_size: Rows per embedding call.
+            max_batch_wait_seconds: A partial batch is committed once its oldest row waited this long.
+            min_interval_seconds: Minimum time between embedding calls (the rate limit).
+            poll_seconds: Sleep between feed reads when there is nothing to do.
+            max_segments: Delta segments above which they are compacted into one.
+            metrics_path: JSON file rewritten with ``metrics()`` after every batch.
+            chunker: Splits rows into sentence-window chunks, for an index built with chunking.
+            timestamp_field: Row field holding the time the producer wrote it (epoch seconds or ISO 8601);
+                rows without it fall back to the feed file's modification time.
+        """
+        self.feed = feed
+        self.delta = delta
+        self.embeddings = embeddings
+        self.data_loader = data_loader
+        self.batch_size = batch_size
+        self.max_batch_wait_seconds = max_batch_wait_seconds
+        self.min_interval_seconds = min_interval_seconds
+        self.poll_seconds = poll_seconds
+        self.max_segments = max_segments
+        self.metrics_path = metrics_path
+        self.chunker = chunker
+        self.timestamp_field = timestamp_field
+        self.stats = IngestStats()
+        self._read_offset = delta.offset
+        self._pending: List[Tuple["Document", float, float]] = []
+        self._lags: Deque[float] = deque(maxlen=1000)
+        self._next_call = 0.0
+        self._started = time.monotonic()
+        self._stop = threading.Event()
+
+    def poll(self, flush: bool = False) -> int:
+        """
+        Read new feed rows and commit a batch if it is full, overdue, or ``flush`` is set.
+
+        Returns:
+            Rows committed by this call.
+        """
+        space = self.batch_size - len(self._pending)
+        if space > 0:
+            records, self._read_offset = self.feed.read(self._read_offset, space)
+            seen_at = time.monotonic()
+            for record in records:
+                document = self._to_document(record)
+                if document is None:
+                    self.stats.rows_rejected += 1
+                else:
+                    self._pending.append((document, seen_at, self._arrived_at(record)))
+
+        if not self._pending:
+            return 0
+        overdue = time.monotonic() - self._pending[0][1] >= self.max_batch_wait_seconds
+        if flush or overdue or len(self._pending) >= self.batch_size:
+            return self._commit_pending()
+        return 0
+
+    def run(self, until_idle: bool = False) -> None:
+        """Ingest until ``stop()`` is called, or with ``until_idle`` until the feed is caught up."""
+        self._started = time.monotonic()
+        while not self._stop.is_set():
+            if self.poll():
+                continue
+            if until_idle and self.feed.backlog(self._read_offset) == 0:
+                self.poll(flush=True)
+                break
+            self._stop.wait(self.poll_seconds)
+        logger.info("Ingest worker stopped: %s", self.metrics())
+
+    def stop(self) -> None:
+        """Stop after the current batch; rows read but not committed are re-read on restart."""
+        self._stop.set()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Throughput, lag from feed arrival to commit, and backlog since the worker started."""
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        lags = sorted(self._lags)
+        return {
+            **asdict(self.stats),
+            "rows_per_second": self.stats.rows_committed / elapsed,
+            "lag_seconds": {
+                "last": self._lags[-1] if self._lags else 0.0,
+                "p50": percentile(lags, 0.5),
+                "p95": percentile(lags, 0.95),
+                "max": lags[-1] if lags else 0.0,
+            },
+            "pending_rows": len(self._pending),
+            "backlog_bytes": self.feed.backlog(self._read_offset),
+            "offset": self.delta.offset,
+            "delta_segments": len(self.delta.segments),
+        }
+
+    def _arrived_at(self, record: FeedRecord) -> float:
+        value = record.row.get(self.timestamp_field) if self.timestamp_field and record.row else None
+        if value in (None, ""):
+            return record.arrived_at
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            pass
+        try:
+            stamp = datetime.fromisoformat(str(value))
+        except ValueError:
+            logger.warning("Feed record %s has an unreadable %s %r", record.id, self.timestamp_field, value)
+            return record.arrived_at
+        return (stamp if stamp.tzinfo else stamp.replace(tzinfo=timezone.utc)).timestamp()
+
+    def _to_document(self, record: FeedRecord) -> Optional["Document"]:
+        if record.row is None:
+            logger.warning("Skipping unparseable feed record %s", record.id)
+            return None
+        try:
+            document = self.data_loader.document_from_row(record.row, self.delta.state["rows"] + len(self._pending))
+        except KeyError as exc:
+            logger.warning("Skipping feed record %s without column %s", record.id, exc)
+            return None
+        document.id = record.id
+        return document
+
+    def _commit_pending(self) -> int:
+        documents = [document for document, _, _ in self._pending]
+        rows = len(documents)
+        if self.chunker is not None:
+            documents = self.chunker.split_documents(documents)
+        vectors = self._embed([document.page_content for document in documents])
+        self.delta.append(
+            ids=[document.id for document in documents],
+            vectors=vectors,
+            texts=[document.page_content for document in documents],
+            metadatas=[document.metadata for document in documents],
+            offset=self._read_offset,
+        )
+        committed_at = time.time()
+        self._lags.extend(max(committed_at - arrived_at, 0.0) for _, _, arrived_at in self._pending)
+        self._pending = []
+        self.stats.rows_committed += rows
+        self.stats.batches += 1
+
+        if len(self.delta.segments) > self.max_segments:
+            self.delta.compact(key=self.data_loader.id_column)
+            self.stats.compactions += 1
+        logger.info(
+            "Committed %d feed rows (lag %.2fs, offset %s)", rows, self._lags[-1], self.delta.offset
+        )
+        self._write_metrics()
+        return rows
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed one batch, waiting out the rate limit and retrying transient failures with backoff."""
+        attempt = 0
+        while True:
+            wait = self._next_call - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._next_call = time.monotonic() + self.min_interval_seconds
+            try:
+                return self.embeddings.embed_documents(texts)
+            except Exception as exc:
+                if not is_retryable(exc) or self._stop.is_set():
+                    raise
+                delay = min(max(self.min_interval_seconds, 1.0) * 2**attempt, 60.0)
+                attempt += 1
+                self.stats.embedding_retries += 1
+                logger.warning("Embedding batch failed (%s); retrying in %.0fs", exc, delay)
+                self._stop.wait(delay)
+
+    def _write_metrics(self) -> None:
+        if self.metrics_path is None:
+            return
+        ensure_directory(self.metrics_path.parent)
+        self.metrics_path.write_text(json.dumps(self.metrics(), indent=2))
@@ -0,0 +1,352 @@
+"""Load generation against the RAG chain, in-process or over HTTP.
+
+Closed-loop runs keep a fixed number of simulated users busy. Open-loop runs
+issue requests at a Poisson arrival rate, and measure latency from each
+request's scheduled arrival, so queueing delay under overload is counted
+instead of hidden (no coordinated omission).
+"""
+
+import csv
+import http.client
+import itertools
+import json
+import logging
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+from .utils import percentile
+
+if TYPE_CHECKING:
+    from .rag_chain import ReviewRAGChain
+
+logger = logging.getLogger(__name__)
+
+MAX_LATENCY_SAMPLES = 10000
+OPERATIONS = ("answer", "retrieve", "stream")
+
+Target = Callable[[str], Any]
+
+
+class HTTPStatusError(RuntimeError):
+    """Non-2xx response from the served API."""
+
+    def __init__(self, status: int, body: str) -> None:
+        super().__init__(f"HTTP {status}: {body[:200]}")
+        self.code = status
+
+
+class ExtractiveFallbackError(RuntimeError):
+    """Answer served by the extractive fallback because generation failed; counted as an error, not a success."""
+
+
+def _reject_fallback(answer: str) -> str:
+    from .rag_chain import FALLBACK_NOTICE
+
+    if answer.startswith(FALLBACK_NOTICE):
+        raise ExtractiveFallbackError("Generation failed; the answer fell back to quoted review excerpts")
+    return answer
+
+
+@dataclass
+class LevelResult:
+    """Outcome of one load level."""
+
+    label: str
+    concurrency: Optional[int]
+    rate: Optional[float]
+    requests: int
+    errors: int
+    duration_seconds: float
+    throughput_rps: float
+    error_rate: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    errors_by_type: Dict[str, int] = field(default_factory=dict)
+    latencies_ms: List[float] = field(default_factory=list, repr=False)
+
+    def summary(self) -> Dict[str, Any]:
+        """Result without the raw latency samples."""
+        result = asdict(self)
+        del result["latencies_ms"]
+        return result
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+        self.errors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            if error is None:
+                self.latencies.append(seconds * 1000)
+            else:
+                name = f"HTTP {error.code}" if isinstance(error, HTTPStatusError) else type(error).__name__
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def result(self, label: str, duration: float, concurrency: Optional[int], rate: Optional[float]) -> LevelResult:
+        latencies = sorted(self.latencies)
+        errors = sum(self.errors.values())
+        total = len(latencies) + errors
+        step = max(1, len(latencies) // MAX_LATENCY_SAMPLES)
+        return LevelResult(
+            label=label,
+            concurrency=concurrency,
+            rate=rate,
+            requests=total,
+            errors=errors,
+            duration_seconds=round(duration, 3),
+            throughput_rps=round(len(latencies) / duration, 2) if duration > 0 else 0.0,
+            error_rate=round(errors / total, 4) if total else 0.0,
+            p50_ms=round(percentile(latencies, 0.50), 1),
+            p95_ms=round(percentile(latencies, 0.95), 1),
+            p99_ms=round(percentile(latencies, 0.99), 1),
+            max_ms=round(latencies[-1], 1) if latencies else 0.0,
+            errors_by_type=dict(self.errors),
+            latencies_ms=[round(value, 1) for value in latencies[::step]],
+        )
+
+
+class LoadGenerator:
+    """Replays a question corpus against a target callable."""
+
+    def __init__(self, target: Target, questions: Sequence[str], seed: int = 0) -> None:
+        """
+        Initialize the generator.
+
+        Args:
+            target: Callable issuing one request for a question; raising counts as an error.
+            questions: Corpus replayed round-robin.
+            seed: Seed for open-loop arrival times.
+        """
+        if not questions:
+            raise ValueError("The question corpus is empty")
+        self.target = target
+        self.questions = list(questions)
+        self.seed = seed
+
+    def _question_source(self) -> Callable[[], str]:
+        cycle = itertools.cycle(self.questions)
+        lock = threading.Lock()
+
+        def next_question() -> str:
+            with lock:
+                return next(cycle)
+
+        return next_question
+
+    def _issue(self, question: str, started: float, recorder: _Recorder) -> None:
+        try:
+            self.target(question)
+        except Exception as exc:
+            recorder.record(time.monotonic() - started, exc)
+        else:
+            recorder.record(time.monotonic() - started)
+
+    def run_closed(
+        self,
+        concurrency: int,
+        duration_seconds: Optional[float] = 10.0,
+        requests: Optional[int] = None,
+    ) -> LevelResult:
+        """
+        Keep ``concurrency`` users sending back-to-back requests.
+
+        Stops after ``requests`` requests in total when given, otherwise after ``duration_seconds``.
+        """
+        recorder = _Recorder()
+        next_question = self._question_source()
+        budget = itertools.count() if requests is not None else None
+        budget_lock = threading.Lock()
+        started = time.monotonic()
+        stop_at = started + duration_seconds if requests is None and duration_seconds else None
+
+        def user() -> None:
+            while True:
+                if budget is not None:
+                    with budget_lock:
+                        if next(budget) >= requests:
+                            return
+                elif time.monotonic() >= stop_at:
+                    return
+                self._issue(next_question(), time.monotonic(), recorder)
+
+        threads = [threading.Thread(target=user, name=f"load-user-{i}", daemon=True) for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return recorder.result(f"concurrency={concurrency}", time.monotonic() - started, concurrency, None)
+
+    def run_open(self, rate: float, duration_seconds: float = 10.0, max_in_flight: int = 256) -> LevelResult:
+        """Send requests at a Poisson arrival ``rate`` per second for ``duration_seconds``."""
+        recorder = _Recorder()
+        next_question = self._question_source()
+        arrivals = random.Random(self.seed)
+        started = time.monotonic()
+        scheduled = started
+
+        with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="load-arrival") as executor:
+            while True:
+                scheduled += arrivals.expovariate(rate)
+                if scheduled - started >= duration_seconds:
+                    break
+                delay = scheduled - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self._issue, next_question(), scheduled, recorder)
+        return recorder.result(f"rate={rate:g}/s", time.monotonic() - started, None, rate)
+
+
+def find_saturation(
+    results: Sequence[LevelResult],
+    slo_p99_ms: Optional[float] = None,
+    max_error_rate: float = 0.01,
+    min_throughput_gain: float = 0.1,
+) -> Dict[str, Any]:
+    """
+    Locate where a sweep of increasing load levels stops scaling.
+
+    Returns:
+        ``last_healthy``: the highest level still within the p99 SLO and error budget;
+        ``saturated_at``: the first level whose throughput grew by less than
+        ``min_throughput_gain`` over the previous level (or that broke the SLO);
+        ``peak_throughput_rps``: the best throughput observed.
+    """
+    last_healthy = None
+    saturated_at = None
+    previous = None
+    for result in results:
+        healthy = result.error_rate <= max_error_rate and (slo_p99_ms is None or result.p99_ms <= slo_p99_ms)
+        if healthy:
+            last_healthy = result.label
+        flat = previous is not None and result.throughput_rps < previous.throughput_rps * (1 + min_throughput_gain)
+        if saturated_at is None and (flat or not healthy):
+            saturated_at = result.label
+        previous = result
+    return {
+        "last_healthy": last_healthy,
+        "saturated_at": saturated_at,
+        "peak_throughput_rps": max((result.throughput_rps for result in results), default=0.0),
+    }
+
+
+def load_questions(path: Path) -> List[str]:
+    """Read questions from a ``.jsonl`` (``question`` field), ``.csv`` (``question`` column) or plain-text file."""
+    if path.suffix == ".jsonl":
+        with open(path, encoding="utf-8") as handle:
+            return [json.loads(line)["question"] for line in handle if line.strip()]
+    if path.suffix == ".csv":
+        with open(path, newline="", encoding="utf-8") as handle:
+            return [row["question"] for row in csv.DictReader(handle) if row.get("question")]
+    with open(path, encoding="utf-8") as handle:
+        return [line.strip() for line in handle if line.strip()]
+
+
+def chain_target(rag_chain: "ReviewRAGChain", operation: str = "answer", mode: Optional[str] = None) -> Target:
+    """
+    Target calling a ReviewRAGChain in-process.
+
+    Answers degraded to the extractive fallback raise ExtractiveFallbackError, so
+    failed or throttled model calls show up in the error rate.
+    """
+    if operation == "retrieve":
+        return rag_chain.retrieve_relevant_documents
+    if operation == "stream":
+        return lambda question: _reject_fallback("".join(rag_chain.stream_answer(question, mode=mode)))
+    return lambda question: _reject_fallback(rag_chain.answer_question(question, mode=mode))
+
+
+def http_target(base_url: str, operation: str = "answer", mode: Optional[str] = None, timeout: float = 60.0) -> Target:
+    """
+    Target posting to the served HTTP API, with one keep-alive connection per load thread.
+
+    As with ``chain_target``, answers degraded to the extractive fallback count as errors.
+    """
+    parts = urlsplit(base_url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    path = parts.path.rstrip("/") + {"answer": "/answer", "retrieve": "/retrieve", "stream": "/answer/stream"}[operation]
+    local = threading.local()
+
+    def send(question: str) -> str:
+        payload: Dict[str, Any] = {"question": question}
+        if mode is not None and operation != "retrieve":
+            payload["mode"] = mode
+        body = json.dumps(payload)
+        for attempt in range(2):
+            connection = getattr(local, "connection", None)
+            if connection is None:
+                connection = local.connection = connection_class(parts.netloc, timeout=timeout)
+            try:
+                connection.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+                response = connection.getresponse()
+                text = response.read().decode("utf-8", "replace")
+            except (http.client.HTTPException, ConnectionError):
+                # A kept-alive connection closed by the server; reconnect once.
+                connection.close()
+                local.connection = None
+                if attempt:
+                    raise
+                continue
+            if not 200 <= response.status < 300:
+                raise HTTPStatusError(response.status, text)
+            if operation == "stream":
+                _reject_fallback(text)
+            elif operation == "answer":
+                _reject_fallback(str(json.loads(text).get("answer", "")))
+            return text
+        raise AssertionError("unreachable")
+
+    return send
+
+
+def build_offline_chain(
+    csv_path: Path,
+    chat_latency_seconds: float = 0.8,
+    embedding_latency_seconds: float = 0.05,
+    limit: Optional[int] = None,
+    workdir: Optional[Path] = None,
+) -> "ReviewRAGChain":
+    """
+    Build a ReviewRAGChain on stub providers, so a load test runs without network access.
+
+    The reviews are embedded with StubEmbeddings into a memory-mapped index
+    snapshot, and answers come from StubChatModel. The configured batching,
+    session and resilience settings are kept, so the serving path under test
+    matches production apart from the providers.
+    """
+    from .config import REVIEW_METADATA_COLUMNS
+    from .data_loader import ReviewDataLoader
+    from .service import create_rag_chain
+    from .snapshot import IndexSnapshot, write_snapshot
+    from .stubs import StubChatModel, StubEmbeddings
+
+    documents = ReviewDataLoader(csv_path=csv_path, metadata_columns=REVIEW_METADATA_COLUMNS).load_reviews()
+    documents = documents[:limit] if limit else documents
+    embeddings = StubEmbeddings()
+    vectors = embeddings.embed_documents([document.page_content for document in documents])
+    embeddings.latency_seconds = embedding_latency_seconds
+
+    directory = Path(workdir or tempfile.mkdtemp(prefix="rag-loadtest-")) / "index_snapshot"
+    records: Iterable = [
+        (
+            [str(i) for i in range(len(documents))],
+            vectors,
+            [document.page_content for document in documents],
+            [document.metadata for document in documents],
+        )
+    ]
+    write_snapshot(directory, records, count=len(documents), dimension=embeddings.dimension, embedding_model="stub")
+
+    stub_model = StubChatModel(latency_seconds=chat_latency_seconds, latency_jitter_seconds=chat_latency_seconds / 4)
+    return create_rag_chain(api_key="", vector_store=IndexSnapshot(directory, embeddings), chat_model=stub_model)
@@ -0,0 +1,190 @@
+"""Opt-in, sampled profiling of requests and ingestion batches.
+
+A sampled section records three artifacts under the output directory:
+
+- ``<name>.prof``: cProfile stats of the thread that entered the section
+  (``python -m pstats``, snakeviz, gprof2dot).
+- ``<name>.folded``: wall-clock stack samples of every thread, including
+  model-call and batching workers, in collapsed-stack format for
+  flamegraph.pl or speedscope.
+- ``<name>.memory.txt``: the tracemalloc allocation growth over the section.
+
+When profiling is disabled, or a section is not sampled, ``profile`` returns a
+no-op context manager after one comparison and one random draw.
+"""
+
+import contextlib
+import cProfile
+import itertools
+import logging
+import random
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import ContextManager, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class _StackSampler:
+    """Samples the Python stacks of all threads at a fixed interval."""
+
+    def __init__(self, interval_seconds: float) -> None:
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def __enter__(self) -> "_StackSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval_seconds):
+            if len(names) != threading.active_count():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write_folded(self, path: Path) -> None:
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common()))
+
+
+class Profiler:
+    """Profiles a sampled fraction of named code sections."""
+
+    def __init__(
+        self,
+        output_directory: Optional[Path] = None,
+        sample_rate: float = 1.0,
+        enabled: bool = True,
+        memory: bool = True,
+        interval_ms: float = 5.0,
+        top_allocations: int = 25,
+    ) -> None:
+        """
+        Initialize the profiler.
+
+        Args:
+            output_directory: Where artifacts are written; required when enabled.
+            sample_rate: Fraction of sections profiled (1.0 profiles every one).
+            enabled: When False, every section is a no-op.
+            memory: Also trace allocations with tracemalloc (slower while a section is profiled).
+            interval_ms: Stack sampling interval for the flame graph.
+            top_allocations: Allocation sites listed in the memory report.
+        """
+        if enabled and output_directory is None:
+            raise ValueError("output_directory is required when profiling is enabled")
+        self.output_directory = output_directory
+        self.sample_rate = sample_rate
+        self.enabled = enabled
+        self.memory = memory
+        self.interval_seconds = interval_ms / 1000.0
+        self.top_allocations = top_allocations
+        self.profiled = 0
+        self.skipped_busy = 0
+        self._sequence = itertools.count(1)
+        self._busy = threading.Lock()
+
+    @classmethod
+    def disabled(cls) -> "Profiler":
+        """A profiler whose sections are all no-ops."""
+        return cls(enabled=False)
+
+    def profile(self, name: str) -> ContextManager[None]:
+        """Context manager profiling the enclosed block when it is sampled."""
+        if not self.enabled or random.random() >= self.sample_rate:
+            return contextlib.nullcontext()
+        return self._profile(name)
+
+    @contextlib.contextmanager
+    def _profile(self, name: str) -> Iterator[None]:
+        # cProfile and tracemalloc are process-wide, so sections are profiled one at a time.
+        if not self._busy.acquire(blocking=False):
+            self.skipped_busy += 1
+            yield
+            return
+
+        stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{next(self._sequence):05d}-{_UNSAFE_NAME.sub('_', name)}"
+        started_tracing = self.memory and not tracemalloc.is_tracing()
+        try:
+            if started_tracing:
+                tracemalloc.start()
+            before = tracemalloc.take_snapshot() if self.memory else None
+            profile = cProfile.Profile()
+            started = time.perf_counter()
+            with _StackSampler(self.interval_seconds) as sampler:
+                profile.enable()
+                try:
+                    yield
+                finally:
+                    profile.disable()
+            self._write(stem, name, time.perf_counter() - started, profile, sampler, before)
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+            self._busy.release()
+
+    def _write(
+        self,
+        stem: str,
+        name: str,
+        elapsed: float,
+        profile: cProfile.Profile,
+        sampler: _StackSampler,
+        before: Optional[tracemalloc.Snapshot],
+    ) -> None:
+        directory = self.output_directory
+        directory.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(str(directory / f"{stem}.prof"))
+        sampler.write_folded(directory / f"{stem}.folded")
+
+        if before is not None:
+            current, peak = tracemalloc.get_traced_memory()
+            growth = tracemalloc.take_snapshot().compare_to(before, "lineno")
+            lines = [
+                f"section: {name}",
+                f"wall time: {elapsed * 1000:.1f} ms",
+                f"traced memory: {current / 1024:.1f} KiB current, {peak / 1024:.1f} KiB peak",
+                "",
+                f"top {self.top_allocations} allocation sites by growth:",
+            ]
+            lines.extend(str(stat) for stat in growth[: self.top_allocations])
+            (directory / f"{stem}.memory.txt").write_text("\n".join(lines) + "\n")
+
+        self.profiled += 1
+        logger.info("Profiled %s in %.1f ms -> %s/%s.*", name, elapsed * 1000, directory, stem)
+
+
+def create_profiler(enabled: bool, sample_rate: Optional[float] = None) -> Profiler:
+    """Build a Profiler from the configured output directory and settings (disabled unless ``enabled``)."""
+    from .config import PROFILE_DIR, PROFILE_INTERVAL_MS, PROFILE_MEMORY, PROFILE_SAMPLE_RATE
+
+    if not enabled:
+        return Profiler.disabled()
+    return Profiler(
+        output_directory=PROFILE_DIR,
+        sample_rate=PROFILE_SAMPLE_RATE if sample_rate is None else sample_rate,
+        memory=PROFILE_MEMORY,
+        interval_ms=PROFILE_INTERVAL_MS,
+    )
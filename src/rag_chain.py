@@ -1,25 +1,42 @@
 """Defines the retrieval-augmented generation chain for the chatbot."""
 
+import contextlib
 import logging
-from dataclasses import dataclass
-from typing import List, Optional
-
-from langchain.schema import Document
-from langchain.schema.runnable import RunnablePassthrough
-from langchain_chroma import Chroma
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import (
-    ChatPromptTemplate,
-    HumanMessagePromptTemplate,
-    PromptTemplate,
-    SystemMessagePromptTemplate,
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .config import (
+    CONDENSE_QUESTION_PROMPT_TEMPLATE,
+    HUMAN_PROMPT_TEMPLATE,
+    PARTITION_KEY,
+    SYSTEM_PROMPT_TEMPLATE,
+    TEMPERATURE,
 )
+from .chunking import CHUNK, RETRIEVAL_UNITS, REVIEW, collapse_to_parents, is_chunk
+from .extractive import ExtractiveAnswerer
+from .profiling import Profiler
+from .resilience import ResilienceConfig, ResilientCaller
+from .topics import TopicIndex, is_aggregate_question
+
+if TYPE_CHECKING:
+    from langchain.schema import Document
+    from langchain_chroma import Chroma
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.prompts import ChatPromptTemplate
+
+    from .sharding import ShardedVectorStore
+    from .snapshot import IndexSnapshot
 
-from .config import HUMAN_PROMPT_TEMPLATE, SYSTEM_PROMPT_TEMPLATE, TEMPERATURE
+    VectorStore = Union[Chroma, IndexSnapshot, ShardedVectorStore]
 
 logger = logging.getLogger(__name__)
 
+GENERATIVE = "generative"
+EXTRACTIVE = "extractive"
+ANSWER_MODES = (GENERATIVE, EXTRACTIVE)
+FALLBACK_NOTICE = "The answer generator is unavailable right now, so here are the most relevant review excerpts.\n\n"
+
 
 @dataclass
 class RAGChainConfig:
@@ -28,32 +45,201 @@ class RAGChainConfig:
     chat_model: str
     api_key: str
     top_k: int
+    batch_window_ms: Optional[float] = None
+    batch_max_size: int = 32
+    session_max_count: int = 10000
+    session_ttl_seconds: float = 1800.0
+    session_max_turns: int = 6
+    session_reuse_threshold: float = 0.5
+    resilience: ResilienceConfig = field(default_factory=ResilienceConfig)
+    answer_mode: str = GENERATIVE
+    extractive_fallback: bool = True
+    topic_matches: int = 4  # topics summarized for aggregate questions; 0 answers them by retrieval
+    topic_min_similarity: float = 0.5  # topics less similar to the question are not used
+    retrieval_unit: str = REVIEW  # "review" collapses chunks to their parent reviews, "chunk" returns the chunks
+    parent_overfetch: int = 3  # chunks fetched per requested review when collapsing a chunked index
+    hospital_filter_max_fetch: int = 1000  # deepest search when filtering an unpartitioned index by hospital
+
+
+class UnknownHospitalError(ValueError):
+    """A request selected a hospital the index has no reviews for."""
+
+
+class _ServingIndex:
+    """A vector store, its query batcher and topics, with a count of the queries still using them."""
+
+    def __init__(
+        self,
+        vector_store: "VectorStore",
+        query_batcher: Any,
+        version: Optional[str],
+        topics: Optional[TopicIndex] = None,
+    ) -> None:
+        self.vector_store = vector_store
+        self.query_batcher = query_batcher
+        self.version = version
+        self.topics = topics
+        self.chunked: Optional[bool] = None  # learned from the first non-empty retrieval that collapses to parents
+        self.in_flight = 0
+        self.idle = threading.Condition()
+
+    def drain(self, timeout_seconds: Optional[float]) -> bool:
+        """Wait until no retrieval uses this index; returns False on timeout."""
+        with self.idle:
+            return self.idle.wait_for(lambda: self.in_flight == 0, timeout_seconds)
 
 
 class ReviewRAGChain:
     """Handles RAG operations for answering user queries."""
 
-    def __init__(self, vector_store: Chroma, config: RAGChainConfig) -> None:
-        self.vector_store = vector_store
+    def __init__(
+        self,
+        vector_store: "VectorStore",
+        config: RAGChainConfig,
+        chat_model: Optional["BaseChatModel"] = None,
+        profiler: Optional[Profiler] = None,
+        index_version: Optional[str] = None,
+        topics: Optional[TopicIndex] = None,
+    ) -> None:
+        """
+        Initialize the chain.
+
+        Args:
+            vector_store: Index to retrieve from.
+            config: Chain configuration.
+            chat_model: Chat model to use instead of the configured Gemini model (e.g. a local stub).
+            profiler: Optional profiler sampling answered questions.
+            index_version: Published index version ``vector_store`` was loaded from, if any.
+            topics: Precomputed topic clusters of ``vector_store``, used to answer aggregate questions.
+        """
+        from langchain_core.output_parsers import StrOutputParser
+        from langchain_core.prompts import PromptTemplate
+
+        from .sessions import SessionStore
+
         self.config = config
         self.prompt = self._build_prompt_template()
-        self.chat_model = ChatGoogleGenerativeAI(
-            model=self.config.chat_model,
-            temperature=TEMPERATURE,
-            google_api_key=self.config.api_key,
-        )
+        if chat_model is None:
+            from langchain_google_genai import ChatGoogleGenerativeAI
 
-        self.retriever = self.vector_store.as_retriever(k=self.config.top_k)
-        self.chain = (
-            {"context": self.retriever, "question": RunnablePassthrough()}
-            | self.prompt
-            | self.chat_model
-            | StrOutputParser()
+            chat_model = ChatGoogleGenerativeAI(
+                model=self.config.chat_model,
+                temperature=TEMPERATURE,
+                google_api_key=self.config.api_key,
+                timeout=self.config.resilience.timeout_seconds,
+            )
+        self.chat_model = chat_model
+        self.llm_caller = ResilientCaller(self.config.resilience, name="chat")
+        self.extractive_answerer = ExtractiveAnswerer(group_key=PARTITION_KEY)
+        self.extractive_fallbacks = 0
+        self.topic_answers = 0
+        self._counters_lock = threading.Lock()  # answers run concurrently on the API's worker threads
+        self.profiler = profiler or Profiler.disabled()
+
+        self.generation_chain = self.prompt | self.chat_model | StrOutputParser()
+        self.condense_chain = (
+            PromptTemplate.from_template(CONDENSE_QUESTION_PROMPT_TEMPLATE) | self.chat_model | StrOutputParser()
+        )
+        self.sessions = SessionStore(
+            max_sessions=self.config.session_max_count,
+            ttl_seconds=self.config.session_ttl_seconds,
+            max_turns=self.config.session_max_turns,
         )
+
+        self._index = _ServingIndex(vector_store, self._create_query_batcher(vector_store), index_version, topics)
+        self._index_lock = threading.Lock()
+        self.index_swaps = 0
         logger.info("RAG chain initialized with model %s", self.config.chat_model)
 
+    @property
+    def vector_store(self) -> "VectorStore":
+        """The index currently serving new retrievals."""
+        return self._index.vector_store
+
+    @property
+    def query_batcher(self) -> Any:
+        """Micro-batcher of the current index, or None when batching is disabled."""
+        return self._index.query_batcher
+
+    @property
+    def index_version(self) -> Optional[str]:
+        """Published index version being served (None for an unversioned index)."""
+        return self._index.version
+
+    def _create_query_batcher(self, vector_store: "VectorStore") -> Any:
+        if self.config.batch_window_ms is None:
+            return None
+        from .batching import QueryBatcher
+
+        return QueryBatcher(
+            vector_store,
+            max_batch_size=self.config.batch_max_size,
+            max_wait_ms=self.config.batch_window_ms,
+        )
+
+    def swap_vector_store(
+        self,
+        vector_store: "VectorStore",
+        version: Optional[str] = None,
+        drain_timeout_seconds: Optional[float] = 60.0,
+        topics: Optional[TopicIndex] = None,
+    ) -> bool:
+        """
+        Serve new retrievals from ``vector_store`` (and its ``topics``), then drain the previous index.
+
+        Retrievals already running finish on the previous index; the call blocks
+        until they have (or the timeout passes) and then stops its query batcher.
+        Sessions keep their already retrieved documents.
+
+        Returns:
+            True when the previous index drained within the timeout.
+        """
+        replacement = _ServingIndex(vector_store, self._create_query_batcher(vector_store), version, topics)
+        with self._index_lock:
+            previous, self._index = self._index, replacement
+            self.index_swaps += 1
+        logger.info(
+            "Swapped index version %s -> %s; draining %d in-flight retrievals",
+            previous.version,
+            version,
+            previous.in_flight,
+        )
+
+        drained = previous.drain(drain_timeout_seconds)
+        if not drained:
+            logger.warning(
+                "Index version %s still had %d retrievals after %.0f s; releasing it anyway",
+                previous.version,
+                previous.in_flight,
+                drain_timeout_seconds,
+            )
+        if previous.query_batcher is not None:
+            previous.query_batcher.close()
+        return drained
+
+    @contextlib.contextmanager
+    def _lease_index(self) -> Iterator[_ServingIndex]:
+        with self._index_lock:
+            index = self._index
+            with index.idle:
+                index.in_flight += 1
+        try:
+            yield index
+        finally:
+            with index.idle:
+                index.in_flight -= 1
+                if index.in_flight == 0:
+                    index.idle.notify_all()
+
     @staticmethod
-    def _build_prompt_template() -> ChatPromptTemplate:
+    def _build_prompt_template() -> "ChatPromptTemplate":
+        from langchain_core.prompts import (
+            ChatPromptTemplate,
+            HumanMessagePromptTemplate,
+            PromptTemplate,
+            SystemMessagePromptTemplate,
+        )
+
         system_prompt = SystemMessagePromptTemplate(
             prompt=PromptTemplate(
                 input_variables=["context"],
@@ -68,13 +254,387 @@ class ReviewRAGChain:
         )
         return ChatPromptTemplate.from_messages([system_prompt, human_prompt])
 
-    def answer_question(self, question: str) -> str:
-        """Generate an answer for the given question."""
+    def answer_question(
+        self,
+        question: str,
+        hospital: Optional[str] = None,
+        mode: Optional[str] = None,
+        unit: Optional[str] = None,
+    ) -> str:
+        """
+        Answer a question, optionally restricted to one hospital.
+
+        Args:
+            question: The user's question.
+            hospital: Optional hospital to restrict retrieval to.
+            mode: ``"generative"`` (LLM answer) or ``"extractive"`` (quoted review sentences, no LLM call);
+                defaults to the configured mode.
+            unit: Retrieval unit used as context, as in ``retrieve_relevant_documents``.
+        """
         logger.debug("Answering question: %s", question)
-        return self.chain.invoke(question)
+        return self.answer_with_context(question, hospital, mode, unit)[0]
+
+    def answer_with_context(
+        self,
+        question: str,
+        hospital: Optional[str] = None,
+        mode: Optional[str] = None,
+        unit: Optional[str] = None,
+        k: Optional[int] = None,
+        callbacks: Optional[List[Any]] = None,
+    ) -> Tuple[str, List["Document"]]:
+        """
+        Answer a question and return the documents it was grounded in, for evaluation and citations.
+
+        The documents are the retrieved reviews, or the topic summaries for an
+        aggregate question. ``k`` overrides the configured top-k, and
+        ``callbacks`` (LangChain callback handlers) observe the model calls.
+        """
+        with self.profiler.profile("answer_question"):
+            answered = self._answer_from_topics(question, hospital, mode, callbacks)
+            if answered is not None:
+                return answered
+            documents = self.retrieve_relevant_documents(question, k, hospital=hospital, unit=unit)
+            return self._answer_from_documents(question, documents, mode, callbacks), documents
+
+    def answer_in_session(
+        self,
+        session_id: str,
+        question: str,
+        hospital: Optional[str] = None,
+        history: Optional[List[Tuple[str, str]]] = None,
+        mode: Optional[str] = None,
+        unit: Optional[str] = None,
+    ) -> str:
+        """
+        Answer a question in the context of a conversation.
+
+        Follow-ups are condensed against the session history into a standalone
+        question. Aggregate questions are answered from the topic clusters.
+        When the standalone question stays on the previous turn's topic and
+        routing target, the previous turn's documents are reused instead of
+        running a new retrieval.
+
+        Args:
+            session_id: Identifier of the chat session.
+            question: The user's (possibly elliptical) question.
+            hospital: Optional hospital selected in the UI.
+            history: ``(question, answer)`` pairs from the client, used to seed unknown sessions.
+            mode: Answer mode, as in ``answer_question``.
+            unit: Retrieval unit, as in ``retrieve_relevant_documents``.
+        """
+        with self.profiler.profile("answer_in_session"):
+            return self._answer_in_session(session_id, question, hospital, history, mode, unit)
 
-    def retrieve_relevant_documents(self, question: str, k: Optional[int] = None) -> List[Document]:
-        """Retrieve relevant documents for a question."""
+    def _answer_in_session(
+        self,
+        session_id: str,
+        question: str,
+        hospital: Optional[str],
+        history: Optional[List[Tuple[str, str]]],
+        mode: Optional[str],
+        unit: Optional[str],
+    ) -> str:
+        from .sessions import topic_overlap
+
+        mode = self._resolve_mode(mode)
+        state = self.sessions.get(session_id, history)
+        standalone = question
+        if state.turns and mode == GENERATIVE:
+            try:
+                standalone = self.llm_caller.call(
+                    self.condense_chain.invoke, {"history": state.format_history(), "question": question}
+                ).strip()
+            except Exception as exc:
+                if not self.config.extractive_fallback:
+                    raise
+                logger.warning("Could not condense follow-up, using it as asked: %s", exc)
+            standalone = standalone or question
+            logger.debug("Condensed follow-up %r to %r", question, standalone)
+
+        answered = self._answer_from_topics(standalone, hospital, mode)
+        if answered is not None:
+            state.record(question, answered[0], standalone, None, [])
+            return answered[0]
+
+        route = self.route_question(standalone, hospital)
+        reuse = (
+            bool(state.last_documents)
+            and state.last_route == (tuple(route) if route is not None else None)
+            and topic_overlap(standalone, state.last_question or "") >= self.config.session_reuse_threshold
+        )
+        if reuse:
+            logger.debug("Reusing %d documents from the previous turn", len(state.last_documents))
+            documents = state.last_documents
+        else:
+            documents = self.retrieve_relevant_documents(standalone, hospital=hospital, unit=unit)
+
+        answer = self._answer_from_documents(standalone, documents, mode)
+        state.record(question, answer, standalone, route, documents)
+        return answer
+
+    def stream_answer(
+        self,
+        question: str,
+        hospital: Optional[str] = None,
+        mode: Optional[str] = None,
+        unit: Optional[str] = None,
+    ) -> Iterator[str]:
+        """Generate an answer incrementally, yielding text chunks as the model produces them."""
+        logger.debug("Streaming answer for question: %s", question)
+        mode = self._resolve_mode(mode)
+        answered = self._answer_from_topics(question, hospital, mode)
+        if answered is not None:
+            yield answered[0]
+            return
+        documents = self.retrieve_relevant_documents(question, hospital=hospital, unit=unit)
+        if mode == EXTRACTIVE:
+            yield self.extractive_answerer.answer(question, documents)
+            return
+
+        streamed = False
+        try:
+            for chunk in self.llm_caller.stream(
+                self.generation_chain.stream, {"context": documents, "question": question}
+            ):
+                streamed = True
+                yield chunk
+        except Exception as exc:
+            # Once text has been sent the answer cannot be swapped for another one.
+            if streamed or not self.config.extractive_fallback:
+                raise
+            yield self._fallback_answer(question, documents, exc)
+
+    def extractive_answer(self, question: str, documents: List["Document"]) -> str:
+        """Answer from ``documents`` by quoting their most relevant sentences, without calling the LLM."""
+        return self.extractive_answerer.answer(question, documents)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Model-call, index and retrieval-batching metrics for monitoring."""
+        metrics: Dict[str, Any] = {
+            "chat": self.llm_caller.snapshot(),
+            **self._counters(),
+            "index": {"version": self.index_version, "swaps": self.index_swaps},
+        }
+        if hasattr(self.vector_store, "delta_metrics"):
+            metrics["index"]["delta"] = self.vector_store.delta_metrics()
+        if self.query_batcher is not None:
+            stats = self.query_batcher.stats
+            metrics["retrieval_batching"] = {**asdict(stats), "average_batch_size": stats.average_batch_size}
+        return metrics
+
+    def _resolve_mode(self, mode: Optional[str]) -> str:
+        mode = mode or self.config.answer_mode
+        if mode not in ANSWER_MODES:
+            raise ValueError(f"Unknown answer mode {mode!r}; expected one of {ANSWER_MODES}")
+        return mode
+
+    def _resolve_unit(self, unit: Optional[str]) -> str:
+        unit = unit or self.config.retrieval_unit
+        if unit not in RETRIEVAL_UNITS:
+            raise ValueError(f"Unknown retrieval unit {unit!r}; expected one of {RETRIEVAL_UNITS}")
+        return unit
+
+    def _generate(self, question: str, documents: List["Document"], callbacks: Optional[List[Any]] = None) -> str:
+        config = {"callbacks": callbacks} if callbacks else None
+        return self.llm_caller.call(self.generation_chain.invoke, {"context": documents, "question": question}, config)
+
+    def _answer_from_documents(
+        self,
+        question: str,
+        documents: List["Document"],
+        mode: Optional[str],
+        callbacks: Optional[List[Any]] = None,
+    ) -> str:
+        if self._resolve_mode(mode) == EXTRACTIVE:
+            return self.extractive_answer(question, documents)
+        try:
+            return self._generate(question, documents, callbacks)
+        except Exception as exc:
+            if not self.config.extractive_fallback:
+                raise
+            return self._fallback_answer(question, documents, exc)
+
+    def _answer_from_topics(
+        self,
+        question: str,
+        hospital: Optional[str],
+        mode: Optional[str],
+        callbacks: Optional[List[Any]] = None,
+    ) -> Optional[Tuple[str, List["Document"]]]:
+        """
+        Answer an aggregate question from the topic summaries.
+
+        Returns:
+            The answer and the summary documents it used, or None when the question is not
+            aggregate, there are no topics or none is similar enough to the question.
+        """
+        index = self._index
+        if index.topics is None or not self.config.topic_matches or not is_aggregate_question(question):
+            return None
+
+        group = self._resolve_hospital(index, hospital) or index.topics.group_named_in(question)
+        embedding = index.vector_store.embeddings.embed_query(question)
+        matches = index.topics.match(
+            embedding,
+            group=group,
+            n=self.config.topic_matches,
+            min_similarity=self.config.topic_min_similarity,
+        )
+        if not matches:
+            return None
+        logger.debug("Answering aggregate question from topics %s", [topic.id for topic, _ in matches])
+        self._count("topic_answers")
+
+        documents = index.topics.summary_documents(matches, group)
+        if self._resolve_mode(mode) == EXTRACTIVE:
+            return index.topics.describe(matches, group), documents
+        try:
+            return self._generate(question, documents, callbacks), documents
+        except Exception as exc:
+            if not self.config.extractive_fallback:
+                raise
+            logger.warning("Generation failed (%s: %s); answering from topic summaries", type(exc).__name__, exc)
+            self._count("extractive_fallbacks")
+            return FALLBACK_NOTICE + index.topics.describe(matches, group), documents
+
+    def _counters(self) -> Dict[str, int]:
+        with self._counters_lock:
+            return {"extractive_fallbacks": self.extractive_fallbacks, "topic_answers": self.topic_answers}
+
+    def _count(self, counter: str) -> None:
+        with self._counters_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _fallback_answer(self, question: str, documents: List["Document"], error: Exception) -> str:
+        logger.warning("Generation failed (%s: %s); answering extractively", type(error).__name__, error)
+        self._count("extractive_fallbacks")
+        return FALLBACK_NOTICE + self.extractive_answer(question, documents)
+
+    @property
+    def available_partitions(self) -> List[str]:
+        """Partition values (e.g. hospital names) the vector store can route to."""
+        return list(getattr(self.vector_store, "partition_values", []))
+
+    def route_question(self, question: str, hospital: Optional[str] = None) -> Optional[List[str]]:
+        """
+        Pick the shards to search for a question.
+
+        A selected ``hospital`` wins; otherwise any partition value named in the
+        question is used. Returns None to fan out across the whole index.
+
+        Raises:
+            UnknownHospitalError: If ``hospital`` is not one of the index's hospitals.
+        """
+        index = self._index
+        return self._route(index.vector_store, question, self._resolve_hospital(index, hospital))
+
+    @staticmethod
+    def _resolve_hospital(index: _ServingIndex, hospital: Optional[str]) -> Optional[str]:
+        """
+        The index's spelling of a selected ``hospital``.
+
+        The known hospitals are the partitions, or on an unpartitioned index the
+        hospitals counted by its topics. When neither is available the name is
+        passed through and only filters the results.
+        """
+        if not hospital:
+            return None
+        known = list(getattr(index.vector_store, "partition_values", []))
+        if not known and index.topics is not None and index.topics.group_key == PARTITION_KEY:
+            known = list(index.topics.group_totals)
+        if not known:
+            return hospital
+        match = next((value for value in known if value.lower() == hospital.lower()), None)
+        if match is None:
+            logger.warning("Rejecting request for unknown hospital %r", hospital)
+            raise UnknownHospitalError(f"Unknown hospital: {hospital!r}")
+        return match
+
+    @staticmethod
+    def _route(vector_store: "VectorStore", question: str, hospital: Optional[str]) -> Optional[List[str]]:
+        partitions = list(getattr(vector_store, "partition_values", []))
+        if not partitions:
+            return None
+
+        if hospital:
+            values = [hospital]
+        else:
+            lowered = question.lower()
+            values = [value for value in partitions if value.lower() in lowered]
+
+        shard_names = vector_store.shards_for_values(values) if values else []
+        return shard_names or None
+
+    def retrieve_relevant_documents(
+        self,
+        question: str,
+        k: Optional[int] = None,
+        hospital: Optional[str] = None,
+        unit: Optional[str] = None,
+    ) -> List["Document"]:
+        """
+        Retrieve relevant documents for a question, routed to matching shards when possible.
+
+        Args:
+            question: The user's question.
+            k: Number of documents (defaults to the configured top-k).
+            hospital: Optional hospital to restrict retrieval to: its partition, or on an unpartitioned
+                index a filter on the ``PARTITION_KEY`` metadata of the hits.
+            unit: For an index of sentence-window chunks, ``"review"`` returns the ``k`` best distinct parent
+                reviews and ``"chunk"`` the ``k`` best chunks; defaults to the configured unit. An index of
+                whole reviews returns reviews either way.
+
+        Raises:
+            UnknownHospitalError: If ``hospital`` is not one of the index's hospitals.
+        """
         k_value = k or self.config.top_k
-        logger.debug("Retrieving %d documents for question: %s", k_value, question)
-        return self.vector_store.similarity_search(question, k_value)
+        unit = self._resolve_unit(unit)
+        with self._lease_index() as index:
+            hospital = self._resolve_hospital(index, hospital)
+            shard_names = self._route(index.vector_store, question, hospital)
+            # An unpartitioned index cannot route, so a selected hospital filters the hits instead.
+            only = hospital if shard_names is None else None
+            if unit == CHUNK or index.chunked is False:
+                return self._search_in(index, question, k_value, shard_names, only)
+
+            documents = self._search_in(index, question, k_value * self.config.parent_overfetch, shard_names, only)
+            if documents:
+                index.chunked = any(is_chunk(document) for document in documents)
+            return collapse_to_parents(documents, k_value)
+
+    def _search_in(
+        self,
+        index: _ServingIndex,
+        question: str,
+        k: int,
+        shard_names: Optional[List[str]],
+        hospital: Optional[str],
+    ) -> List["Document"]:
+        """``_search``, keeping only ``hospital``'s documents and searching deeper until ``k`` of them are found."""
+        if hospital is None:
+            return self._search(index, question, k, shard_names)
+        fetch = k
+        while True:
+            documents = self._search(index, question, fetch, shard_names)
+            matching = [
+                document
+                for document in documents
+                if str(document.metadata.get(PARTITION_KEY, "")).lower() == hospital.lower()
+            ]
+            if len(matching) >= k or len(documents) < fetch or fetch >= self.config.hospital_filter_max_fetch:
+                return matching[:k]
+            fetch = min(fetch * 4, self.config.hospital_filter_max_fetch)
+
+    @staticmethod
+    def _search(index: _ServingIndex, question: str, k: int, shard_names: Optional[List[str]]) -> List["Document"]:
+        if index.query_batcher is not None:
+            logger.debug("Queueing batched retrieval of %d documents for question: %s", k, question)
+            return index.query_batcher.search(question, k, shard_names)
+
+        if shard_names is None:
+            logger.debug("Retrieving %d documents for question: %s", k, question)
+            return index.vector_store.similarity_search(question, k)
+
+        logger.debug("Retrieving %d documents from shards %s for question: %s", k, shard_names, question)
+        return index.vector_store.similarity_search(question, k, shard_names=shard_names)
@@ -0,0 +1,401 @@
+"""Tail-latency controls for model calls: deadlines, retries, hedging and circuit breaking."""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_END_OF_STREAM = object()
+
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+# Provider exception class names (google.api_core, httpx, grpc) treated as transient,
+# matched by name so this module does not import any provider SDK.
+RETRYABLE_ERROR_NAMES = frozenset(
+    {
+        "DeadlineExceeded",
+        "InternalServerError",
+        "ResourceExhausted",
+        "ServiceUnavailable",
+        "TooManyRequests",
+        "GatewayTimeout",
+        "BadGateway",
+        "Aborted",
+        "RetryError",
+        "ConnectError",
+        "ReadTimeout",
+        "RemoteProtocolError",
+    }
+)
+
+
+class DeadlineExceededError(TimeoutError):
+    """A model call did not complete within its deadline."""
+
+
+class CircuitOpenError(RuntimeError):
+    """The circuit breaker is open, so the call was rejected without reaching the provider."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether ``error`` looks transient (timeouts, throttling, 5xx, dropped connections)."""
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if isinstance(status, int) and status in RETRYABLE_STATUS_CODES:
+        return True
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+@dataclass
+class ResilienceConfig:
+    """Policy for calls to a remote model."""
+
+    timeout_seconds: Optional[float] = 20.0
+    deadline_seconds: Optional[float] = 45.0
+    max_retries: int = 2
+    backoff_base_seconds: float = 0.5
+    backoff_max_seconds: float = 4.0
+    hedge: bool = False
+    hedge_quantile: float = 0.95
+    hedge_min_delay_seconds: float = 0.5
+    hedge_min_samples: int = 20
+    breaker_failure_threshold: int = 5
+    breaker_reset_seconds: float = 30.0
+    max_concurrency: int = 32
+
+
+class LatencyWindow:
+    """Rolling window of recent successful call latencies."""
+
+    def __init__(self, size: int = 512) -> None:
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Nearest-rank quantile of the window, or None when it is empty."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, max(0, int(round(q * len(samples))) - 1))]
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and calls
+    are rejected for ``reset_seconds``. Then a single probe call is let through
+    (half-open): its success closes the circuit, its failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may proceed now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning("Circuit opened after %d consecutive failures", self._failures)
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+
+class CallMetrics:
+    """Thread-safe counters for a ResilientCaller."""
+
+    COUNTERS = (
+        "calls",
+        "successes",
+        "failures",
+        "attempts",
+        "retries",
+        "timeouts",
+        "hedges_fired",
+        "hedge_wins",
+        "short_circuited",
+    )
+
+    def __init__(self) -> None:
+        self._counts = dict.fromkeys(self.COUNTERS, 0)
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[name] += amount
+
+    def __getitem__(self, name: str) -> int:
+        return self._counts[name]
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+class ResilientCaller:
+    """
+    Runs blocking model calls under a deadline, retry, hedging and circuit-breaker policy.
+
+    Attempts run on a bounded thread pool so the caller can stop waiting at the
+    deadline. Python threads cannot be interrupted, so an abandoned attempt keeps
+    its worker until the provider client gives up; the pool bound and the circuit
+    breaker stop such attempts from piling up during a provider incident.
+    """
+
+    def __init__(self, config: Optional[ResilienceConfig] = None, name: str = "llm") -> None:
+        self.config = config or ResilienceConfig()
+        self.name = name
+        self.metrics = CallMetrics()
+        self.latency = LatencyWindow()
+        self.breaker = CircuitBreaker(self.config.breaker_failure_threshold, self.config.breaker_reset_seconds)
+        self._executor = ThreadPoolExecutor(max_workers=self.config.max_concurrency, thread_name_prefix=f"{name}-call")
+        self._random = random.Random()
+
+    def call(self, function: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Call ``function(*args, **kwargs)`` under the configured policy.
+
+        Raises:
+            CircuitOpenError: If the circuit is open.
+            DeadlineExceededError: If no attempt succeeded before the deadline.
+            Exception: The last error of the final attempt, or the first non-retryable error.
+        """
+        self.metrics.increment("calls")
+        result = self._call_with_retries(function, args, kwargs, self._deadline(), hedge=True)
+        self.metrics.increment("successes")
+        return result
+
+    def stream(self, function: Callable[..., Iterator[Any]], *args: Any, **kwargs: Any) -> Iterator[Any]:
+        """
+        Iterate ``function(*args, **kwargs)`` under the deadline, timeout and circuit-breaker policy.
+
+        Nothing has been sent before the first chunk arrives, so waiting for it
+        is an ordinary call: bounded by ``timeout_seconds`` and the deadline, and
+        retried. Chunks already sent cannot be taken back, so after that each
+        chunk must follow the previous one within ``timeout_seconds`` (an idle
+        timeout) and the stream must end by the deadline, and failures are
+        raised instead of retried. Streams are never hedged.
+
+        Raises:
+            CircuitOpenError: If the circuit is open.
+            DeadlineExceededError: If the first chunk, a later chunk or the end of the stream came too late.
+        """
+        self.metrics.increment("calls")
+        deadline = self._deadline()
+        iterator, chunk = self._call_with_retries(self._open_stream, (function, args, kwargs), {}, deadline, False)
+        try:
+            while chunk is not _END_OF_STREAM:
+                yield chunk
+                chunk = self._next_chunk(iterator, deadline)
+        except Exception as exc:
+            if isinstance(exc, DeadlineExceededError):
+                self.metrics.increment("timeouts")
+            if is_retryable(exc):
+                self.breaker.record_failure()
+            self.metrics.increment("failures")
+            raise
+        self.metrics.increment("successes")
+
+    def _deadline(self) -> Optional[float]:
+        return time.monotonic() + self.config.deadline_seconds if self.config.deadline_seconds else None
+
+    def _timeout(self, deadline: Optional[float]) -> Optional[float]:
+        """Per-attempt (or per-chunk) timeout, shortened to what is left of ``deadline``."""
+        timeout = self.config.timeout_seconds
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return timeout
+
+    def _call_with_retries(
+        self,
+        function: Callable[..., Any],
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any],
+        deadline: Optional[float],
+        hedge: bool,
+    ) -> Any:
+        config = self.config
+        for attempt in range(config.max_retries + 1):
+            if not self.breaker.allow():
+                self.metrics.increment("short_circuited")
+                self.metrics.increment("failures")
+                raise CircuitOpenError(f"{self.name} circuit is open; failing fast")
+
+            timeout = self._timeout(deadline)
+            self.metrics.increment("attempts")
+            try:
+                result = self._attempt(function, args, kwargs, timeout, hedge)
+            except Exception as exc:
+                if isinstance(exc, DeadlineExceededError):
+                    self.metrics.increment("timeouts")
+                if not is_retryable(exc):
+                    # The provider answered; the request itself is at fault.
+                    self.breaker.record_success()
+                    self.metrics.increment("failures")
+                    raise
+                self.breaker.record_failure()
+
+                backoff = self._random.uniform(
+                    0, min(config.backoff_max_seconds, config.backoff_base_seconds * 2**attempt)
+                )
+                out_of_time = deadline is not None and time.monotonic() + backoff >= deadline
+                if attempt == config.max_retries or out_of_time:
+                    self.metrics.increment("failures")
+                    raise
+                logger.warning("%s call failed (%s); retrying in %.2fs", self.name, exc, backoff)
+                self.metrics.increment("retries")
+                time.sleep(backoff)
+            else:
+                self.breaker.record_success()
+                return result
+        raise AssertionError("unreachable")
+
+    @staticmethod
+    def _open_stream(
+        function: Callable[..., Iterator[Any]], args: Tuple[Any, ...], kwargs: Dict[str, Any]
+    ) -> Tuple[Iterator[Any], Any]:
+        """Start a stream and wait for its first chunk."""
+        iterator = iter(function(*args, **kwargs))
+        return iterator, next(iterator, _END_OF_STREAM)
+
+    def _next_chunk(self, iterator: Iterator[Any], deadline: Optional[float]) -> Any:
+        timeout = self._timeout(deadline)
+        future = self._executor.submit(next, iterator, _END_OF_STREAM)
+        done, _ = wait([future], timeout=None if timeout is None else max(timeout, 0.0))
+        if not done:
+            future.cancel()
+            if deadline is not None and time.monotonic() >= deadline:
+                raise DeadlineExceededError(f"{self.name} stream exceeded its {self.config.deadline_seconds}s deadline")
+            raise DeadlineExceededError(f"{self.name} stream sent no chunk for {timeout:.2f}s")
+        return future.result()
+
+    def hedge_delay(self) -> Optional[float]:
+        """Delay before a hedged duplicate request is sent, or None when hedging is off or not warmed up."""
+        config = self.config
+        if not config.hedge or len(self.latency) < config.hedge_min_samples:
+            return None
+        return max(config.hedge_min_delay_seconds, self.latency.quantile(config.hedge_quantile) or 0.0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters, latency quantiles and breaker state for monitoring."""
+        return {
+            **self.metrics.snapshot(),
+            "circuit": self.breaker.state,
+            "latency_p50_seconds": self.latency.quantile(0.5),
+            "latency_p95_seconds": self.latency.quantile(0.95),
+            "latency_p99_seconds": self.latency.quantile(0.99),
+        }
+
+    def close(self) -> None:
+        """Release the worker threads without waiting for abandoned attempts."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _timed(function: Callable[..., Any], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Tuple[Any, float]:
+        started = time.monotonic()
+        result = function(*args, **kwargs)
+        return result, time.monotonic() - started
+
+    def _attempt(
+        self,
+        function: Callable[..., Any],
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any],
+        timeout: Optional[float],
+        hedge: bool = True,
+    ) -> Any:
+        """One attempt, possibly hedged: the first successful request wins."""
+        started = time.monotonic()
+        deadline = started + timeout if timeout is not None else None
+        hedge_at = self.hedge_delay() if hedge else None
+        primary = self._executor.submit(self._timed, function, args, kwargs)
+        pending: Set[Future] = {primary}
+        last_error: Optional[BaseException] = None
+
+        while pending:
+            wake_at = deadline
+            if hedge_at is not None:
+                wake_at = started + hedge_at if wake_at is None else min(wake_at, started + hedge_at)
+            wait_for = None if wake_at is None else max(0.0, wake_at - time.monotonic())
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                try:
+                    result, elapsed = future.result()
+                except Exception as exc:
+                    last_error = exc
+                    continue
+                self.latency.add(elapsed)
+                if future is not primary:
+                    self.metrics.increment("hedge_wins")
+                for other in pending:
+                    other.cancel()
+                return result
+
+            if done:
+                continue
+            if deadline is not None and time.monotonic() >= deadline:
+                for other in pending:
+                    other.cancel()
+                raise DeadlineExceededError(f"{self.name} call exceeded its {timeout:.2f}s deadline")
+            if hedge_at is not None:
+                hedge_at = None
+                self.metrics.increment("hedges_fired")
+                pending.add(self._executor.submit(self._timed, function, args, kwargs))
+
+        assert last_error is not None
+        raise last_error
@@ -0,0 +1,273 @@
+"""Shared construction of the serving RAG chain.
+
+Entry points (the Gradio app, the HTTP API, the CLI demo and evaluation) load
+the index and model clients through here so a process holds exactly one
+vector store and one set of provider clients, whose connections are reused
+across requests.
+"""
+
+import contextlib
+import logging
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator, Optional
+
+from .config import (
+    ANSWER_MODE,
+    API_KEY_ENV_VAR,
+    CHAT_MODEL,
+    CHROMA_DB_PATH,
+    DELTA_PATH,
+    DELTA_POLL_SECONDS,
+    EMBEDDING_MODEL,
+    EXTRACTIVE_FALLBACK,
+    INDEX_DRAIN_TIMEOUT_SECONDS,
+    INDEX_KEEP_VERSIONS,
+    INDEX_POLL_SECONDS,
+    INDEX_RETENTION_SECONDS,
+    INDEX_ROOT,
+    LLM_BREAKER_FAILURE_THRESHOLD,
+    LLM_BREAKER_RESET_SECONDS,
+    LLM_DEADLINE_SECONDS,
+    LLM_HEDGE_ENABLED,
+    LLM_HEDGE_QUANTILE,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    LLM_TIMEOUT_SECONDS,
+    PARENT_OVERFETCH,
+    PARTITION_KEY,
+    QUERY_BATCH_MAX_SIZE,
+    QUERY_BATCH_WINDOW_MS,
+    RETRIEVAL_UNIT,
+    SESSION_MAX_COUNT,
+    SESSION_MAX_TURNS,
+    SESSION_REUSE_THRESHOLD,
+    SESSION_TTL_SECONDS,
+    SNAPSHOT_PATH,
+    TOP_K_RETRIEVAL,
+    TOPIC_CLUSTERS,
+    TOPIC_MATCHES,
+    TOPIC_MIN_SIMILARITY,
+    TOPIC_REPRESENTATIVES,
+    TOPIC_TERMS,
+    TOPICS_PATH,
+)
+from .utils import get_api_key
+from .versions import CHROMA_SUBDIR, SNAPSHOT_SUBDIR, TOPICS_SUBDIR, IndexVersions, IndexWatcher
+
+if TYPE_CHECKING:
+    from .profiling import Profiler
+    from .rag_chain import ReviewRAGChain
+    from .topics import TopicIndex
+    from .vectorstore import VectorStoreManager
+
+logger = logging.getLogger(__name__)
+
+_shared_chain: Optional["ReviewRAGChain"] = None
+_shared_chain_lock = threading.Lock()
+_index_watcher: Optional[IndexWatcher] = None
+
+
+def get_index_versions() -> IndexVersions:
+    """Versioned index directories under the configured index root."""
+    return IndexVersions(INDEX_ROOT)
+
+
+def create_vector_store_manager(
+    api_key: str,
+    version_directory: Optional[Path] = None,
+    embedding_function: Optional[Any] = None,
+) -> "VectorStoreManager":
+    """
+    Create the VectorStoreManager for one index version.
+
+    Defaults to the published version, or to the legacy unversioned
+    ``CHROMA_DB_PATH``/``SNAPSHOT_PATH``/``TOPICS_PATH`` layout when nothing has been published.
+    ``embedding_function`` reuses an existing embedding client.
+    """
+    from .vectorstore import VectorStoreManager
+
+    if version_directory is None:
+        versions = get_index_versions()
+        current = versions.current()
+        version_directory = versions.directory(current) if current else None
+
+    return VectorStoreManager(
+        persist_directory=version_directory / CHROMA_SUBDIR if version_directory else CHROMA_DB_PATH,
+        embedding_model=EMBEDDING_MODEL,
+        api_key=api_key,
+        snapshot_directory=version_directory / SNAPSHOT_SUBDIR if version_directory else SNAPSHOT_PATH,
+        topics_directory=version_directory / TOPICS_SUBDIR if version_directory else TOPICS_PATH,
+        embedding_function=embedding_function,
+    )
+
+
+@contextlib.contextmanager
+def build_index_version(api_key: str) -> Iterator["VectorStoreManager"]:
+    """
+    Yield a VectorStoreManager writing a new index version.
+
+    The version is published when the block completes, after which versions
+    beyond the retention policy are deleted. A failed build is removed and the
+    published version keeps serving.
+    """
+    versions = get_index_versions()
+    with versions.build() as directory:
+        yield create_vector_store_manager(api_key, directory)
+    versions.collect_garbage(keep=INDEX_KEEP_VERSIONS, retention_seconds=INDEX_RETENTION_SECONDS)
+
+
+def load_serving_store(vector_store_manager: "VectorStoreManager", use_snapshot: bool = True) -> Optional[Any]:
+    """
+    Open the index for serving, preferring the memory-mapped snapshot when one is published.
+
+    The index is layered under the delta of reviews ingested from the live feed
+    (see ``ingest_feed.py``), which is picked up as it grows; set
+    ``DELTA_POLL_SECONDS = None`` to serve the built index alone.
+    """
+    vector_store = vector_store_manager.load_snapshot() if use_snapshot else None
+    if vector_store is None:
+        vector_store = vector_store_manager.load_vector_store()
+    if vector_store is None or DELTA_POLL_SECONDS is None:
+        return vector_store
+
+    from .delta import LiveIndex
+
+    return LiveIndex(vector_store, DELTA_PATH, poll_seconds=DELTA_POLL_SECONDS)
+
+
+def export_topic_clusters(
+    vector_store_manager: "VectorStoreManager",
+    vector_store: Any,
+    clusters: int = TOPIC_CLUSTERS,
+) -> Optional[Path]:
+    """Precompute the topic clusters answering aggregate questions (skipped when ``clusters`` is 0)."""
+    if not clusters:
+        return None
+    return vector_store_manager.export_topics(
+        vector_store,
+        clusters=clusters,
+        group_key=PARTITION_KEY,
+        top_terms=TOPIC_TERMS,
+        representatives=TOPIC_REPRESENTATIVES,
+    )
+
+
+def create_rag_chain(
+    api_key: str,
+    vector_store: Any,
+    chat_model: Optional[Any] = None,
+    profiler: Optional["Profiler"] = None,
+    index_version: Optional[str] = None,
+    topics: Optional["TopicIndex"] = None,
+) -> "ReviewRAGChain":
+    """Build a ReviewRAGChain with the configured settings, optionally on an injected chat model."""
+    from .rag_chain import RAGChainConfig, ReviewRAGChain
+    from .resilience import ResilienceConfig
+
+    config = RAGChainConfig(
+        chat_model=CHAT_MODEL,
+        api_key=api_key,
+        top_k=TOP_K_RETRIEVAL,
+        batch_window_ms=QUERY_BATCH_WINDOW_MS,
+        batch_max_size=QUERY_BATCH_MAX_SIZE,
+        session_max_count=SESSION_MAX_COUNT,
+        session_ttl_seconds=SESSION_TTL_SECONDS,
+        session_max_turns=SESSION_MAX_TURNS,
+        session_reuse_threshold=SESSION_REUSE_THRESHOLD,
+        resilience=ResilienceConfig(
+            timeout_seconds=LLM_TIMEOUT_SECONDS,
+            deadline_seconds=LLM_DEADLINE_SECONDS,
+            max_retries=LLM_MAX_RETRIES,
+            hedge=LLM_HEDGE_ENABLED,
+            hedge_quantile=LLM_HEDGE_QUANTILE,
+            breaker_failure_threshold=LLM_BREAKER_FAILURE_THRESHOLD,
+            breaker_reset_seconds=LLM_BREAKER_RESET_SECONDS,
+            max_concurrency=LLM_MAX_CONCURRENCY,
+        ),
+        answer_mode=ANSWER_MODE,
+        extractive_fallback=EXTRACTIVE_FALLBACK,
+        topic_matches=TOPIC_MATCHES,
+        topic_min_similarity=TOPIC_MIN_SIMILARITY,
+        retrieval_unit=RETRIEVAL_UNIT,
+        parent_overfetch=PARENT_OVERFETCH,
+    )
+    return ReviewRAGChain(
+        vector_store=vector_store,
+        config=config,
+        chat_model=chat_model,
+        profiler=profiler,
+        index_version=index_version,
+        topics=topics,
+    )
+
+
+def watch_index_versions(
+    rag_chain: "ReviewRAGChain",
+    api_key: str,
+    use_snapshot: bool = True,
+) -> Optional[IndexWatcher]:
+    """
+    Hot-swap ``rag_chain`` onto every index version published from now on.
+
+    New versions are opened with the chain's embedding client and swapped in
+    while in-flight retrievals drain on the old one. Returns None when polling
+    is disabled (``INDEX_POLL_SECONDS = None``).
+    """
+    if INDEX_POLL_SECONDS is None:
+        return None
+
+    def swap(version: str, directory: Path) -> None:
+        vector_store_manager = create_vector_store_manager(api_key, directory, rag_chain.vector_store.embeddings)
+        vector_store = load_serving_store(vector_store_manager, use_snapshot=use_snapshot)
+        if vector_store is None:
+            raise FileNotFoundError(f"Index version {version} has no vector store")
+        rag_chain.swap_vector_store(
+            vector_store,
+            version=version,
+            drain_timeout_seconds=INDEX_DRAIN_TIMEOUT_SECONDS,
+            topics=vector_store_manager.load_topics(),
+        )
+
+    watcher = IndexWatcher(get_index_versions(), swap, poll_seconds=INDEX_POLL_SECONDS, version=rag_chain.index_version)
+    return watcher.start()
+
+
+def get_shared_rag_chain(api_key: Optional[str] = None, use_snapshot: bool = True) -> "ReviewRAGChain":
+    """
+    Return the process-wide ReviewRAGChain, building it on first use.
+
+    The chain is then hot-swapped onto each newly published index version.
+
+    Raises:
+        RuntimeError: If no vector store has been built yet.
+    """
+    global _shared_chain, _index_watcher
+
+    with _shared_chain_lock:
+        if _shared_chain is None:
+            api_key = api_key or get_api_key(API_KEY_ENV_VAR)
+            versions = get_index_versions()
+            version = versions.current()
+            version_directory = versions.directory(version) if version else None
+            vector_store_manager = create_vector_store_manager(api_key, version_directory)
+            vector_store = load_serving_store(vector_store_manager, use_snapshot=use_snapshot)
+            if vector_store is None:
+                raise RuntimeError("Vector store not found. Run `python build_vectorstore.py` first.")
+            _shared_chain = create_rag_chain(
+                api_key,
+                vector_store,
+                index_version=version,
+                topics=vector_store_manager.load_topics(),
+            )
+            _index_watcher = watch_index_versions(_shared_chain, api_key, use_snapshot=use_snapshot)
+            logger.info("Shared RAG chain initialized (index version %s)", version or "unversioned")
+        return _shared_chain
+
+
+def set_shared_rag_chain(rag_chain: Optional["ReviewRAGChain"]) -> None:
+    """Install an already-built chain as the process-wide instance (or clear it with None)."""
+    global _shared_chain
+
+    with _shared_chain_lock:
+        _shared_chain = rag_chain
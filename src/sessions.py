@@ -0,0 +1,126 @@
+"""Bounded per-session conversation state for follow-up questions."""
+
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Deque, Iterable, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from langchain.schema import Document
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+_STOPWORDS = frozenset(
+    "a about an and any are as at be did do does for from had has have how i in is it me of on or "
+    "other patients said say that the their there they this to was were what when where which who "
+    "why with".split()
+)
+
+
+def content_terms(text: str) -> set:
+    """Lower-cased content words of ``text``, without stopwords."""
+    return {token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in _STOPWORDS}
+
+
+def topic_overlap(first: str, second: str) -> float:
+    """Jaccard overlap of the content words of two questions (0 when either has none)."""
+    a, b = content_terms(first), content_terms(second)
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class ConversationTurn:
+    """One question/answer exchange."""
+
+    question: str
+    answer: str
+
+
+@dataclass
+class SessionState:
+    """Conversation history and the last retrieval of a single chat session."""
+
+    turns: Deque[ConversationTurn]
+    last_question: Optional[str] = None
+    last_route: Optional[Tuple[str, ...]] = None
+    last_documents: List["Document"] = field(default_factory=list)
+    last_access: float = field(default_factory=time.monotonic)
+
+    def record(
+        self,
+        question: str,
+        answer: str,
+        standalone_question: str,
+        route: Optional[Sequence[str]],
+        documents: List["Document"],
+    ) -> None:
+        """Append a turn and remember its retrieval for possible reuse by the next turn."""
+        self.turns.append(ConversationTurn(question, answer))
+        self.last_question = standalone_question
+        self.last_route = tuple(route) if route is not None else None
+        self.last_documents = list(documents)
+
+    def format_history(self) -> str:
+        """Render the retained turns as a plain-text transcript."""
+        return "\n".join(f"User: {turn.question}\nAssistant: {turn.answer}" for turn in self.turns)
+
+
+class SessionStore:
+    """Thread-safe session store bounded by both size (LRU eviction) and idle time (TTL)."""
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: float = 1800.0, max_turns: int = 6) -> None:
+        """
+        Initialize the session store.
+
+        Args:
+            max_sessions: Sessions kept before the least recently used one is evicted.
+            ttl_seconds: Idle time after which a session expires.
+            max_turns: Turns of history retained per session.
+        """
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self._sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str, history: Optional[Iterable[Tuple[str, str]]] = None) -> SessionState:
+        """
+        Return the state of ``session_id``, creating it if needed.
+
+        A new session is seeded from ``history`` (``(question, answer)`` pairs, as
+        kept by the UI), so context survives eviction or a server restart.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = SessionState(turns=deque(maxlen=self.max_turns))
+                for turn in history or ():
+                    if isinstance(turn, (list, tuple)) and len(turn) == 2 and all(turn):
+                        state.turns.append(ConversationTurn(str(turn[0]), str(turn[1])))
+                self._sessions[session_id] = state
+                if len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_id)
+            state.last_access = now
+            return state
+
+    def discard(self, session_id: str) -> None:
+        """Forget a session."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _expire(self, now: float) -> None:
+        while self._sessions:
+            session_id, state = next(iter(self._sessions.items()))
+            if now - state.last_access <= self.ttl_seconds:
+                break
+            del self._sessions[session_id]
@@ -0,0 +1,405 @@
+"""Sharded index build and parallel search across shard collections."""
+
+import heapq
+import json
+import logging
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from .utils import ensure_directory
+
+if TYPE_CHECKING:
+    from langchain.schema import Document
+    from langchain_chroma import Chroma
+    from langchain_core.embeddings import Embeddings
+
+    from .dedup import DedupReport
+
+logger = logging.getLogger(__name__)
+
+SHARD_MANIFEST_FILE = "shards.json"
+MERGE_PAGE_SIZE = 1000
+
+
+@dataclass
+class ShardSpec:
+    """Describes one shard of a partitioned index."""
+
+    name: str
+    start: Optional[int] = None
+    end: Optional[int] = None
+    key: Optional[str] = None
+    count: int = 0
+    duplicates_removed: int = 0
+
+
+def partition_shard_name(index: int, key: str) -> str:
+    """Build a filesystem-safe, unique shard name for a partition key value."""
+    slug = re.sub(r"[^a-z0-9]+", "_", key.lower()).strip("_")
+    return f"p{index:03d}_{slug}"[:60]
+
+
+def _near_duplicate_detector() -> Any:
+    """The configured NearDuplicateDetector, built the same way in the parent and every worker."""
+    from .config import DEDUP_BANDS, DEDUP_NUM_PERM, DEDUP_THRESHOLD
+    from .dedup import NearDuplicateDetector
+
+    return NearDuplicateDetector(threshold=DEDUP_THRESHOLD, num_perm=DEDUP_NUM_PERM, bands=DEDUP_BANDS)
+
+
+def _sign_shard(
+    spec: ShardSpec,
+    csv_path: Path,
+    signature_path: Path,
+    dedup_scope: Optional[str] = None,
+) -> Tuple[List[int], List[str], List[Any]]:
+    """
+    Save the MinHash signatures of a shard's reviews to ``signature_path``; runs inside a worker process.
+
+    Returns:
+        The CSV row numbers, review ids and dedup scope values of the signed reviews, in file order.
+    """
+    import numpy as np
+
+    from .config import REVIEW_METADATA_COLUMNS
+    from .data_loader import ReviewDataLoader
+    from .dedup import document_ids, document_signatures
+
+    loader = ReviewDataLoader(csv_path=csv_path, metadata_columns=REVIEW_METADATA_COLUMNS)
+    documents = list(loader.iter_reviews(review_id_range=(spec.start, spec.end)))
+    np.save(signature_path, document_signatures(documents, _near_duplicate_detector()))
+    rows = [document.metadata["row"] for document in documents]
+    scopes = [document.metadata.get(dedup_scope) if dedup_scope else None for document in documents]
+    return rows, document_ids(documents), scopes
+
+
+def _build_shard(
+    spec: ShardSpec,
+    output_directory: Path,
+    csv_path: Path,
+    embedding_model: str,
+    api_key: str,
+    batch_size: int,
+    wait_time: int,
+    skip_rows: Optional[Set[int]] = None,
+    duplicates: Optional[Dict[int, List[str]]] = None,
+) -> ShardSpec:
+    """
+    Build a single shard from the CSV rows in its review-id range; runs inside a worker process.
+
+    ``skip_rows`` and ``duplicates`` come from the corpus-wide dedup plan: the
+    skipped rows are not embedded, and each representative row records the
+    review ids it stands for.
+    """
+    from .config import REVIEW_METADATA_COLUMNS
+    from .data_loader import ReviewDataLoader
+    from .dedup import mark_duplicates
+    from .embeddings import BatchEmbeddingProcessor
+    from .vectorstore import VectorStoreManager
+
+    skip_rows = skip_rows or set()
+    duplicates = duplicates or {}
+    loader = ReviewDataLoader(csv_path=csv_path, metadata_columns=REVIEW_METADATA_COLUMNS)
+    documents = []
+    for document in loader.iter_reviews(review_id_range=(spec.start, spec.end)):
+        row = document.metadata["row"]
+        if row in skip_rows:
+            spec.duplicates_removed += 1
+            continue
+        if row in duplicates:
+            mark_duplicates(document, duplicates[row])
+        documents.append(document)
+    spec.count = len(documents)
+    if not documents:
+        return spec
+
+    manager = VectorStoreManager(
+        persist_directory=output_directory / spec.name,
+        embedding_model=embedding_model,
+        api_key=api_key,
+    )
+    processor = BatchEmbeddingProcessor(batch_size=batch_size, wait_time=wait_time)
+    processor.process_documents_in_batches(documents=documents, vector_store_manager=manager)
+    return spec
+
+
+def write_shard_manifest(directory: Path, shards: Sequence[ShardSpec], partition_key: str) -> None:
+    """Record the shard layout so the query side can open every shard (paths are relative to ``directory``)."""
+    manifest = {"partition_key": partition_key, "shards": [asdict(shard) for shard in shards]}
+    (directory / SHARD_MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+
+
+def read_shard_manifest(directory: Path) -> Optional[Dict[str, Any]]:
+    """Return the shard manifest of ``directory``, or None for a single-collection store."""
+    manifest_path = directory / SHARD_MANIFEST_FILE
+    if not manifest_path.exists():
+        return None
+    return json.loads(manifest_path.read_text())
+
+
+class ShardedIndexBuilder:
+    """Builds the index as review-id range shards across a process pool."""
+
+    def __init__(
+        self,
+        csv_path: Path,
+        output_directory: Path,
+        embedding_model: str,
+        api_key: str,
+        num_shards: int = 4,
+        num_workers: Optional[int] = None,
+        batch_size: int = 20,
+        wait_time: int = 30,
+        dedup: bool = False,
+        dedup_scope: Optional[str] = "hospital_name",
+    ) -> None:
+        """
+        Initialize the sharded builder.
+
+        Args:
+            csv_path: Path to the reviews CSV file.
+            output_directory: Root directory for the shard collections and manifest.
+            embedding_model: Embedding model used by every shard.
+            api_key: API key for the embedding provider.
+            num_shards: Number of review-id ranges to split the corpus into.
+            num_workers: Size of the process pool (defaults to ``num_shards``).
+            batch_size: Documents per embedding batch within each shard.
+            wait_time: Seconds each worker waits between its batches.
+            dedup: Drop near-duplicate reviews across the whole corpus before embedding.
+            dedup_scope: Metadata key duplicates must share to be merged (``None`` merges across hospitals).
+        """
+        self.csv_path = csv_path
+        self.output_directory = output_directory
+        self.embedding_model = embedding_model
+        self.api_key = api_key
+        self.num_shards = num_shards
+        self.num_workers = num_workers or num_shards
+        self.batch_size = batch_size
+        self.wait_time = wait_time
+        self.dedup = dedup
+        self.dedup_scope = dedup_scope
+        self.dedup_report: Optional["DedupReport"] = None
+
+    def build(self) -> List[ShardSpec]:
+        """
+        Build every shard in parallel and write the shard manifest.
+
+        Only the id column is read here to choose the ranges; each worker
+        streams the CSV itself and builds documents for its own range only.
+
+        With ``dedup`` a first pass has the workers save MinHash signatures of
+        their ranges; the parent merges the LSH bands of all shards so
+        duplicates are found across shard boundaries, then tells each worker
+        which of its rows to skip.
+        """
+        from .data_loader import ReviewDataLoader
+
+        ranges = ReviewDataLoader(csv_path=self.csv_path).partition_review_ids(self.num_shards)
+        if self.output_directory.exists():
+            logger.info("Removing existing index at %s", self.output_directory)
+            shutil.rmtree(self.output_directory)
+        ensure_directory(self.output_directory)
+
+        specs = [ShardSpec(name=f"shard_{i:03d}", start=start, end=end) for i, (start, end) in enumerate(ranges)]
+        logger.info("Building %d shards with %d worker processes", len(specs), self.num_workers)
+
+        with ProcessPoolExecutor(max_workers=self.num_workers) as executor:
+            plans: List[Tuple[Optional[Set[int]], Optional[Dict[int, List[str]]]]] = [(None, None)] * len(specs)
+            if self.dedup:
+                plans = self._plan_deduplication(executor, specs)
+            futures = [
+                executor.submit(
+                    _build_shard,
+                    spec,
+                    self.output_directory,
+                    self.csv_path,
+                    self.embedding_model,
+                    self.api_key,
+                    self.batch_size,
+                    self.wait_time,
+                    skip_rows,
+                    duplicates,
+                )
+                for spec, (skip_rows, duplicates) in zip(specs, plans)
+            ]
+            built = [future.result() for future in futures]
+
+        built = [spec for spec in built if spec.count > 0]
+        write_shard_manifest(self.output_directory, built, partition_key="review_id")
+        logger.info(
+            "Built %d shards with %d documents (%d near-duplicates skipped)",
+            len(built),
+            sum(spec.count for spec in built),
+            sum(spec.duplicates_removed for spec in built),
+        )
+        return built
+
+    def _plan_deduplication(
+        self, executor: ProcessPoolExecutor, specs: Sequence[ShardSpec]
+    ) -> List[Tuple[Set[int], Dict[int, List[str]]]]:
+        """Find near-duplicates across all shards and split the skip/representative rows per shard."""
+        from .dedup import plan_deduplication
+
+        signature_directory = self.output_directory / "_signatures"
+        ensure_directory(signature_directory)
+        paths = [signature_directory / f"{spec.name}.npy" for spec in specs]
+        try:
+            futures = [
+                executor.submit(_sign_shard, spec, self.csv_path, path, self.dedup_scope)
+                for spec, path in zip(specs, paths)
+            ]
+            signed = [future.result() for future in futures]
+            rows = [row for shard_rows, _, _ in signed for row in shard_rows]
+            ids = [review_id for _, shard_ids, _ in signed for review_id in shard_ids]
+            scopes = [scope for _, _, shard_scopes in signed for scope in shard_scopes]
+            plan = plan_deduplication(_near_duplicate_detector(), paths, rows, ids, scopes, self.batch_size)
+        finally:
+            shutil.rmtree(signature_directory, ignore_errors=True)
+        self.dedup_report = plan.report
+
+        plans = []
+        for shard_rows, _, _ in signed:
+            in_shard = set(shard_rows)
+            plans.append(
+                (
+                    plan.skip_rows & in_shard,
+                    {row: duplicate_ids for row, duplicate_ids in plan.duplicates.items() if row in in_shard},
+                )
+            )
+        return plans
+
+
+def merge_shards(shard_stores: Sequence["Chroma"], target: "Chroma", page_size: int = MERGE_PAGE_SIZE) -> int:
+    """
+    Copy every shard into ``target`` reusing the stored embeddings (no re-embedding).
+
+    Returns:
+        Number of documents copied.
+    """
+    copied = 0
+    for store in shard_stores:
+        total = store._collection.count()
+        for offset in range(0, total, page_size):
+            page = store.get(limit=page_size, offset=offset, include=["embeddings", "documents", "metadatas"])
+            target._collection.add(
+                ids=page["ids"],
+                embeddings=page["embeddings"],
+                documents=page["documents"],
+                metadatas=page["metadatas"],
+            )
+            copied += len(page["ids"])
+    logger.info("Merged %d documents from %d shards", copied, len(shard_stores))
+    return copied
+
+
+class ShardedVectorStore:
+    """Searches several shard stores in parallel and merges their top-k results."""
+
+    def __init__(
+        self,
+        shards: Dict[str, Any],
+        embedding_function: "Embeddings",
+        max_workers: Optional[int] = None,
+        partition_key: Optional[str] = None,
+        shard_keys: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Initialize the sharded store.
+
+        Args:
+            shards: Mapping of shard name to a store (Chroma or IndexSnapshot).
+            embedding_function: Embeddings used to encode each query once for all shards.
+            max_workers: Threads used for the fan-out (defaults to one per shard).
+            partition_key: Metadata field the shards are partitioned by (e.g. ``hospital_name``).
+            shard_keys: Mapping of shard name to the partition key value it holds.
+        """
+        self.shards = shards
+        self.embedding_function = embedding_function
+        self.partition_key = partition_key
+        self._shards_by_value = {value: name for name, value in (shard_keys or {}).items() if value is not None}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or max(1, len(shards)),
+            thread_name_prefix="shard-search",
+        )
+
+    @property
+    def embeddings(self) -> "Embeddings":
+        """Embedding function used for queries, mirroring the LangChain vector store API."""
+        return self.embedding_function
+
+    @property
+    def partition_values(self) -> List[str]:
+        """Partition key values with a dedicated shard, sorted for display."""
+        return sorted(self._shards_by_value)
+
+    def shards_for_values(self, values: Sequence[str]) -> List[str]:
+        """Map partition key values (case-insensitive) to the names of their shards."""
+        lookup = {value.lower(): name for value, name in self._shards_by_value.items()}
+        return [lookup[value.lower()] for value in values if value.lower() in lookup]
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: Sequence[float],
+        k: int = 4,
+        shard_names: Optional[Sequence[str]] = None,
+    ) -> List[Tuple["Document", float]]:
+        """Return the merged ``k`` best documents across the selected shards (all by default)."""
+        from .vectorstore import similarity_search_by_vector_with_score
+
+        names = list(self.shards) if shard_names is None else [name for name in shard_names if name in self.shards]
+        if not names:
+            return []
+        if len(names) == 1:
+            return similarity_search_by_vector_with_score(self.shards[names[0]], embedding, k)
+
+        futures = [
+            self._executor.submit(similarity_search_by_vector_with_score, self.shards[name], embedding, k)
+            for name in names
+        ]
+        candidates = [result for future in futures for result in future.result()]
+        return heapq.nlargest(k, candidates, key=lambda item: item[1])
+
+    def similarity_search_by_vectors_with_score(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        k: int = 4,
+        shard_names: Optional[Sequence[str]] = None,
+    ) -> List[List[Tuple["Document", float]]]:
+        """Search several query embeddings at once; each shard receives a single batched query."""
+        from .vectorstore import similarity_search_by_vectors_with_score
+
+        names = list(self.shards) if shard_names is None else [name for name in shard_names if name in self.shards]
+        if not names:
+            return [[] for _ in embeddings]
+
+        futures = [
+            self._executor.submit(similarity_search_by_vectors_with_score, self.shards[name], embeddings, k)
+            for name in names
+        ]
+        per_shard = [future.result() for future in futures]
+        return [
+            heapq.nlargest(k, [result for shard in per_shard for result in shard[row]], key=lambda item: item[1])
+            for row in range(len(embeddings))
+        ]
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        shard_names: Optional[Sequence[str]] = None,
+    ) -> List[Tuple["Document", float]]:
+        """Embed ``query`` once and search the selected shards."""
+        return self.similarity_search_by_vector_with_score(self.embedding_function.embed_query(query), k, shard_names)
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        shard_names: Optional[Sequence[str]] = None,
+    ) -> List["Document"]:
+        """Embed ``query`` once and return the merged top-k documents."""
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, shard_names)]
@@ -0,0 +1,293 @@
+"""Read-only, memory-mapped index snapshots for fast warm start.
+
+A snapshot is a directory holding a contiguous float32 vector matrix, a UTF-8
+text blob and metadata blob with int64 offset tables, and a JSON manifest.
+Replicas open it with ``mmap`` so loading is near-instant and every process on
+a node shares the same page-cache pages instead of holding a private copy.
+"""
+
+import json
+import logging
+import mmap
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+    from langchain.schema import Document
+    from langchain_chroma import Chroma
+    from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+TEXTS_FILE = "texts.bin"
+TEXT_OFFSETS_FILE = "text_offsets.npy"
+METADATA_FILE = "metadata.bin"
+METADATA_OFFSETS_FILE = "metadata_offsets.npy"
+
+EXPORT_PAGE_SIZE = 1000
+
+
+class _SnapshotWriter:
+    """Streams records into the snapshot files of a staging directory."""
+
+    def __init__(self, directory: Path, count: int, dimension: int) -> None:
+        import numpy as np
+
+        self.directory = directory
+        self.count = count
+        self.dimension = dimension
+        self.vectors = np.lib.format.open_memmap(
+            directory / VECTORS_FILE, mode="w+", dtype=np.float32, shape=(count, dimension)
+        )
+        self.text_offsets = np.zeros(count + 1, dtype=np.int64)
+        self.metadata_offsets = np.zeros(count + 1, dtype=np.int64)
+        self._texts = open(directory / TEXTS_FILE, "wb")
+        self._metadata = open(directory / METADATA_FILE, "wb")
+        self.position = 0
+
+    def write(
+        self,
+        ids: Sequence[str],
+        embeddings: Any,
+        texts: Sequence[str],
+        metadatas: Sequence[Optional[Dict[str, Any]]],
+    ) -> None:
+        import numpy as np
+
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        end = self.position + len(ids)
+        self.vectors[self.position : end] = vectors / norms
+
+        for offset, (doc_id, text, metadata) in enumerate(zip(ids, texts, metadatas), start=self.position):
+            encoded_text = (text or "").encode("utf-8")
+            encoded_meta = json.dumps({"id": doc_id, "metadata": metadata or {}}).encode("utf-8")
+            self._texts.write(encoded_text)
+            self._metadata.write(encoded_meta)
+            self.text_offsets[offset + 1] = self.text_offsets[offset] + len(encoded_text)
+            self.metadata_offsets[offset + 1] = self.metadata_offsets[offset] + len(encoded_meta)
+        self.position = end
+
+    def close(self, manifest: Dict[str, Any]) -> None:
+        import numpy as np
+
+        if self.position != self.count:
+            raise RuntimeError(f"Snapshot expected {self.count} records but received {self.position}")
+        self.vectors.flush()
+        del self.vectors
+        self._texts.close()
+        self._metadata.close()
+        np.save(self.directory / TEXT_OFFSETS_FILE, self.text_offsets)
+        np.save(self.directory / METADATA_OFFSETS_FILE, self.metadata_offsets)
+        (self.directory / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+
+
+def _publish_directory(staging_dir: Path, output_dir: Path) -> None:
+    """Move a finished staging directory into place, replacing any previous snapshot."""
+    if output_dir.exists():
+        retired_dir = output_dir.with_name(f"{output_dir.name}.old-{os.getpid()}")
+        os.replace(output_dir, retired_dir)
+        os.replace(staging_dir, output_dir)
+        shutil.rmtree(retired_dir, ignore_errors=True)
+    else:
+        os.replace(staging_dir, output_dir)
+
+
+def write_snapshot(
+    output_dir: Path,
+    records: Iterable[Tuple[Sequence[str], Any, Sequence[str], Sequence[Optional[Dict[str, Any]]]]],
+    count: int,
+    dimension: int,
+    embedding_model: Optional[str] = None,
+) -> Path:
+    """
+    Write a snapshot from pages of ``(ids, embeddings, texts, metadatas)``.
+
+    The snapshot is assembled in a staging directory next to ``output_dir`` and
+    moved into place only once complete, so readers never see a partial write.
+
+    Returns:
+        Path of the published snapshot directory.
+    """
+    output_dir.parent.mkdir(parents=True, exist_ok=True)
+    staging_dir = output_dir.with_name(f"{output_dir.name}.staging-{os.getpid()}")
+    if staging_dir.exists():
+        shutil.rmtree(staging_dir)
+    staging_dir.mkdir()
+
+    try:
+        writer = _SnapshotWriter(staging_dir, count, dimension)
+        for ids, embeddings, texts, metadatas in records:
+            writer.write(ids, embeddings, texts, metadatas)
+        writer.close(
+            {
+                "format_version": SNAPSHOT_FORMAT_VERSION,
+                "count": count,
+                "dimension": dimension,
+                "embedding_model": embedding_model,
+                "created_at": time.time(),
+            }
+        )
+    except Exception:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    _publish_directory(staging_dir, output_dir)
+    logger.info("Published index snapshot with %d vectors at %s", count, output_dir)
+    return output_dir
+
+
+def export_snapshot(
+    vector_store: "Chroma",
+    output_dir: Path,
+    embedding_model: Optional[str] = None,
+    page_size: int = EXPORT_PAGE_SIZE,
+) -> Path:
+    """
+    Export a Chroma vector store to a memory-mappable snapshot.
+
+    Args:
+        vector_store: Populated Chroma store to export.
+        output_dir: Destination directory of the snapshot.
+        embedding_model: Name of the embedding model, recorded in the manifest.
+        page_size: Number of records fetched from Chroma at a time.
+
+    Returns:
+        Path of the published snapshot directory.
+    """
+    count = vector_store._collection.count()
+    if count == 0:
+        raise ValueError("Cannot export a snapshot of an empty vector store")
+
+    first_page = vector_store.get(limit=1, include=["embeddings"])
+    dimension = len(first_page["embeddings"][0])
+
+    def pages():
+        for offset in range(0, count, page_size):
+            page = vector_store.get(
+                limit=page_size,
+                offset=offset,
+                include=["embeddings", "documents", "metadatas"],
+            )
+            yield page["ids"], page["embeddings"], page["documents"], page["metadatas"]
+
+    return write_snapshot(output_dir, pages(), count, dimension, embedding_model=embedding_model)
+
+
+class IndexSnapshot:
+    """Read-only vector index backed by memory-mapped snapshot files."""
+
+    def __init__(self, directory: Path, embedding_function: "Embeddings") -> None:
+        """
+        Open a snapshot directory.
+
+        Args:
+            directory: Directory produced by ``write_snapshot``/``export_snapshot``.
+            embedding_function: Embeddings used to encode incoming queries.
+        """
+        import numpy as np
+
+        self.directory = directory
+        self.embedding_function = embedding_function
+        self.manifest = json.loads((directory / MANIFEST_FILE).read_text())
+        if self.manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format version: {self.manifest.get('format_version')}")
+
+        self.vectors = np.load(directory / VECTORS_FILE, mmap_mode="r")
+        self.text_offsets = np.load(directory / TEXT_OFFSETS_FILE, mmap_mode="r")
+        self.metadata_offsets = np.load(directory / METADATA_OFFSETS_FILE, mmap_mode="r")
+        self._texts = self._map_file(directory / TEXTS_FILE)
+        self._metadata = self._map_file(directory / METADATA_FILE)
+
+    @staticmethod
+    def _map_file(path: Path):
+        if path.stat().st_size == 0:
+            return b""
+        with open(path, "rb") as handle:
+            return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return int(self.manifest["count"])
+
+    @property
+    def embeddings(self) -> "Embeddings":
+        """Embedding function used for queries, mirroring the LangChain vector store API."""
+        return self.embedding_function
+
+    def get_document(self, index: int) -> "Document":
+        """Materialize the document stored at ``index``."""
+        from langchain_core.documents import Document
+
+        text_start, text_end = int(self.text_offsets[index]), int(self.text_offsets[index + 1])
+        meta_start, meta_end = int(self.metadata_offsets[index]), int(self.metadata_offsets[index + 1])
+        record = json.loads(bytes(self._metadata[meta_start:meta_end]).decode("utf-8"))
+        return Document(
+            id=record["id"],
+            page_content=bytes(self._texts[text_start:text_end]).decode("utf-8"),
+            metadata=record["metadata"],
+        )
+
+    def _normalize(self, embedding: Sequence[float]) -> "np.ndarray":
+        import numpy as np
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        return query / norm if norm else query
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: Sequence[float],
+        k: int = 4,
+    ) -> List[Tuple["Document", float]]:
+        """Return the ``k`` nearest documents with their cosine similarity (higher is closer)."""
+        import numpy as np
+
+        if len(self) == 0 or k <= 0:
+            return []
+        scores = self.vectors @ self._normalize(embedding)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.get_document(int(i)), float(scores[i])) for i in top]
+
+    def similarity_search_by_vectors_with_score(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        k: int = 4,
+    ) -> List[List[Tuple["Document", float]]]:
+        """Search several query embeddings with a single matrix product."""
+        import numpy as np
+
+        if len(self) == 0 or k <= 0 or len(embeddings) == 0:
+            return [[] for _ in embeddings]
+        queries = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        scores = (queries / norms) @ self.vectors.T
+        k = min(k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-scores[row, candidates])]
+            results.append([(self.get_document(int(i)), float(scores[row, i])) for i in ordered])
+        return results
+
+    def similarity_search_by_vector(self, embedding: Sequence[float], k: int = 4) -> List["Document"]:
+        """Return the ``k`` nearest documents to an embedding."""
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4) -> List[Tuple["Document", float]]:
+        """Embed ``query`` and return the ``k`` nearest documents with scores."""
+        return self.similarity_search_by_vector_with_score(self.embedding_function.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4) -> List["Document"]:
+        """Embed ``query`` and return the ``k`` nearest documents."""
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
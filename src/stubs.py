@@ -0,0 +1,148 @@
+"""Local stand-ins for remote model providers, with injectable latency and failures.
+
+Used by tests and offline benchmarks; importing this module loads LangChain.
+"""
+
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+
+class StubProviderError(RuntimeError):
+    """Error raised by stub models; carries an HTTP-style status code."""
+
+    def __init__(self, message: str, code: int = 503) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Chat model that answers locally after a simulated provider delay.
+
+    Each call sleeps ``latency_seconds`` plus up to ``latency_jitter_seconds``;
+    with probability ``slow_probability`` it sleeps ``slow_latency_seconds``
+    instead (a latency tail), and with probability ``failure_probability`` it
+    raises StubProviderError with ``failure_code``.
+    """
+
+    model_name: str = "stub-chat"
+    latency_seconds: float = 0.05
+    latency_jitter_seconds: float = 0.0
+    slow_probability: float = 0.0
+    slow_latency_seconds: float = 5.0
+    failure_probability: float = 0.0
+    failure_code: int = 503
+    stream_chunk_words: int = 4
+    seed: Optional[int] = None
+
+    _random: random.Random = PrivateAttr()
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _calls: int = PrivateAttr(default=0)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._random = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-chat"
+
+    @property
+    def calls(self) -> int:
+        """Number of generation requests received."""
+        return self._calls
+
+    def _simulate_provider(self) -> None:
+        with self._lock:
+            self._calls += 1
+            slow = self._random.random() < self.slow_probability
+            fail = self._random.random() < self.failure_probability
+            delay = self.slow_latency_seconds if slow else self.latency_seconds
+            delay += self._random.uniform(0.0, self.latency_jitter_seconds)
+        time.sleep(delay)
+        if fail:
+            raise StubProviderError(f"{self.model_name} unavailable", code=self.failure_code)
+
+    @staticmethod
+    def _reply(messages: List[BaseMessage]) -> str:
+        question = str(messages[-1].content).strip() if messages else ""
+        return f"Stub answer based on the retrieved reviews. {question}"
+
+    @staticmethod
+    def _usage(messages: List[BaseMessage], reply: str) -> Dict[str, int]:
+        """Token usage as a provider would report it, counting words as tokens."""
+        input_tokens = sum(len(str(message.content).split()) for message in messages)
+        output_tokens = len(reply.split())
+        total_tokens = input_tokens + output_tokens
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": total_tokens}
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self._simulate_provider()
+        reply = self._reply(messages)
+        message = AIMessage(content=reply, usage_metadata=self._usage(messages, reply))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        self._simulate_provider()
+        words = self._reply(messages).split(" ")
+        for start in range(0, len(words), self.stream_chunk_words):
+            text = " ".join(words[start : start + self.stream_chunk_words])
+            if start + self.stream_chunk_words < len(words):
+                text += " "
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+
+
+class StubEmbeddings(Embeddings):
+    """
+    Local hashed bag-of-words embeddings with a simulated per-call delay.
+
+    Texts sharing words get similar vectors, so retrieval over a stub index
+    still returns related reviews.
+    """
+
+    _TOKEN = re.compile(r"[a-z0-9']+")
+
+    def __init__(self, dimension: int = 256, latency_seconds: float = 0.0) -> None:
+        self.dimension = dimension
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimension
+        for token in self._TOKEN.findall(text.lower()):
+            vector[zlib.crc32(token.encode("utf-8")) % self.dimension] += 1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency_seconds)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
@@ -0,0 +1,416 @@
+"""Precomputed topic clusters for aggregate questions.
+
+After each build, every review embedding is clustered with spherical k-means.
+Each cluster is labelled with its most distinctive terms, and its per-hospital
+review counts and most central reviews are stored. Questions about what is
+common across many reviews ("what are common complaints about the
+facilities?") are then answered from these compact summaries, which describe
+every review, instead of from the k nearest ones.
+"""
+
+import json
+import logging
+import math
+import re
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from .chunking import PARENT_ID
+from .sessions import content_terms
+
+if TYPE_CHECKING:
+    import numpy as np
+    from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+TOPICS_FORMAT_VERSION = 1
+TOPICS_FILE = "topics.json"
+CENTROIDS_FILE = "centroids.npy"
+MAX_QUOTE_CHARS = 300
+EXPORT_PAGE_SIZE = 1000
+
+_LABEL_STOPWORDS = frozenset(
+    "also although but can could during even felt however made make making many much not one our some still "
+    "than then though unfortunately very well while would hospital hospital's patient".split()
+)
+_FEEDBACK = (
+    r"(complain\w*|complaints?|issues?|problems?|concerns?|praise\w*|compliments?|feedback|experiences?|topics?)"
+)
+# Only phrasings that ask about many reviews at once; words like "main", "top" or "most" alone are too often part
+# of a specific question ("the main entrance", "the top floor", "the most parking complaints").
+_AGGREGATE_QUESTION = re.compile(
+    rf"\b(common(ly)?|frequent(ly)?|recurring|repeated(ly)?|typical(ly)?)\s+(\w+\s+){{0,2}}?{_FEEDBACK}\b"
+    r"|\b(themes?|trends)\b"
+    r"|\boverall\s+(sentiment|impressions?|experience|opinions?|satisfaction|ratings?)\b"
+    r"|\b(how many|what share of|what percentage of|what proportion of|(the )?majority of)\s+"
+    r"(the\s+)?(patients|reviews|reviewers|people)\b",
+    re.IGNORECASE,
+)
+
+
+def is_aggregate_question(question: str) -> bool:
+    """Whether ``question`` asks what is common across many reviews rather than about specific ones."""
+    return bool(_AGGREGATE_QUESTION.search(question))
+
+
+def _normalize_rows(vectors: "np.ndarray") -> "np.ndarray":
+    import numpy as np
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _assign(vectors: "np.ndarray", centroids: "np.ndarray", batch_size: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    import numpy as np
+
+    labels = np.empty(len(vectors), dtype=np.int64)
+    similarities = np.empty(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), batch_size):
+        scores = vectors[start : start + batch_size] @ centroids.T
+        labels[start : start + batch_size] = scores.argmax(axis=1)
+        similarities[start : start + batch_size] = scores.max(axis=1)
+    return labels, similarities
+
+
+def spherical_kmeans(
+    vectors: "np.ndarray",
+    k: int,
+    iterations: int = 30,
+    seed: int = 0,
+    tolerance: float = 1e-3,
+    batch_size: int = 8192,
+) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    Cluster unit vectors by cosine similarity.
+
+    Centroids are seeded with k-means++ and refined with batched matrix
+    products, so memory stays bounded by ``batch_size`` rows of scores.
+    Clusters that empty out are re-seeded with the points farthest from their
+    centroid.
+
+    Returns:
+        ``(centroids, labels, similarities)``: unit centroids, the cluster of every
+        vector and its cosine similarity to that cluster's centroid.
+    """
+    import numpy as np
+
+    vectors = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+    k = min(k, len(vectors))
+    rng = np.random.default_rng(seed)
+
+    centroids = np.empty((k, vectors.shape[1]), dtype=np.float32)
+    centroids[0] = vectors[rng.integers(len(vectors))]
+    closest = 1.0 - vectors @ centroids[0]
+    for index in range(1, k):
+        weights = np.clip(closest, 0.0, None)
+        total = weights.sum()
+        choice = rng.choice(len(vectors), p=weights / total) if total > 0 else rng.integers(len(vectors))
+        centroids[index] = vectors[choice]
+        closest = np.minimum(closest, 1.0 - vectors @ centroids[index])
+
+    labels = np.full(len(vectors), -1, dtype=np.int64)
+    for iteration in range(iterations):
+        new_labels, similarities = _assign(vectors, centroids, batch_size)
+        changed = np.count_nonzero(new_labels != labels)
+        labels = new_labels
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        sizes = np.bincount(labels, minlength=k)
+        for empty in np.flatnonzero(sizes == 0):
+            farthest = int(similarities.argmin())
+            sums[empty] = vectors[farthest]
+            similarities[farthest] = np.inf
+        centroids = _normalize_rows(sums)
+
+        if changed <= tolerance * len(vectors):
+            logger.debug("k-means converged after %d iterations", iteration + 1)
+            break
+
+    labels, similarities = _assign(vectors, centroids, batch_size)
+    return centroids, labels, similarities
+
+
+def distinctive_terms(texts: Sequence[str], labels: Sequence[int], k: int, top_terms: int = 6) -> List[List[str]]:
+    """
+    Label each cluster with the terms most over-represented in it (class-based TF-IDF).
+
+    A term scores by the share of the cluster's reviews using it, weighted by
+    its inverse document frequency over the whole corpus.
+    """
+    cluster_frequency = [Counter() for _ in range(k)]
+    document_frequency: Counter = Counter()
+    sizes = Counter()
+    for text, label in zip(texts, labels):
+        terms = {
+            term for term in content_terms(text) if len(term) > 2 and not term.isdigit() and term not in _LABEL_STOPWORDS
+        }
+        cluster_frequency[label].update(terms)
+        document_frequency.update(terms)
+        sizes[label] += 1
+
+    total = len(texts)
+    labelled = []
+    for label in range(k):
+        scores = {
+            term: count / sizes[label] * math.log(total / document_frequency[term])
+            for term, count in cluster_frequency[label].items()
+            if count > 1 or sizes[label] == 1
+        }
+        labelled.append(sorted(scores, key=lambda term: (-scores[term], term))[:top_terms])
+    return labelled
+
+
+def _quote(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= MAX_QUOTE_CHARS else text[: MAX_QUOTE_CHARS - 3].rstrip() + "..."
+
+
+@dataclass
+class Topic:
+    """One cluster of reviews."""
+
+    id: int
+    label: str
+    terms: List[str]
+    size: int
+    group_counts: Dict[str, int] = field(default_factory=dict)
+    representatives: List[Dict[str, Any]] = field(default_factory=list)
+    group_representatives: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+
+
+class TopicIndex:
+    """Topic clusters of one index version, matched to questions by centroid similarity."""
+
+    def __init__(
+        self,
+        topics: List[Topic],
+        centroids: "np.ndarray",
+        group_key: str,
+        group_totals: Dict[str, int],
+        review_count: Optional[int] = None,
+    ) -> None:
+        self.topics = topics
+        self.centroids = centroids
+        self.group_key = group_key
+        self.group_totals = group_totals
+        self.review_count = review_count
+
+    @property
+    def documents(self) -> int:
+        """
+        Number of distinct reviews clustered.
+
+        The chunks of one review can fall in several topics, so the topic
+        sizes only add up to it for an index of whole reviews.
+        """
+        if self.review_count is not None:
+            return self.review_count
+        return sum(topic.size for topic in self.topics)
+
+    def save(self, directory: Path) -> Path:
+        """Write ``topics.json`` and the centroid matrix to ``directory``."""
+        import numpy as np
+
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / CENTROIDS_FILE, self.centroids)
+        manifest = {
+            "format_version": TOPICS_FORMAT_VERSION,
+            "group_key": self.group_key,
+            "group_totals": self.group_totals,
+            "review_count": self.review_count,
+            "topics": [asdict(topic) for topic in self.topics],
+        }
+        (directory / TOPICS_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        return directory
+
+    @classmethod
+    def load(cls, directory: Path) -> "TopicIndex":
+        """Open topics written by ``save``."""
+        import numpy as np
+
+        manifest = json.loads((directory / TOPICS_FILE).read_text(encoding="utf-8"))
+        if manifest.get("format_version") != TOPICS_FORMAT_VERSION:
+            raise ValueError(f"Unsupported topics format version: {manifest.get('format_version')}")
+        return cls(
+            topics=[Topic(**topic) for topic in manifest["topics"]],
+            centroids=np.load(directory / CENTROIDS_FILE),
+            group_key=manifest["group_key"],
+            group_totals=manifest["group_totals"],
+            review_count=manifest.get("review_count"),
+        )
+
+    def group_named_in(self, question: str) -> Optional[str]:
+        """The group (e.g. hospital) named in ``question``, if exactly one is."""
+        lowered = question.lower()
+        named = [group for group in self.group_totals if group.lower() in lowered]
+        return named[0] if len(named) == 1 else None
+
+    def match(
+        self,
+        embedding: Sequence[float],
+        group: Optional[str] = None,
+        n: int = 4,
+        min_similarity: float = 0.0,
+    ) -> List[Tuple[Topic, float]]:
+        """
+        The ``n`` topics closest to a question embedding, limited to topics present in ``group``.
+
+        Topics whose centroid similarity is below ``min_similarity`` are left out,
+        so a question no topic is about gets no matches.
+        """
+        import numpy as np
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        scores = self.centroids @ (query / norm if norm else query)
+        matches = []
+        for index in np.argsort(-scores):
+            if scores[index] < min_similarity:
+                break
+            topic = self.topics[int(index)]
+            if group is not None and not topic.group_counts.get(group):
+                continue
+            matches.append((topic, float(scores[index])))
+            if len(matches) == n:
+                break
+        return matches
+
+    def _share(self, topic: Topic, group: Optional[str]) -> Tuple[int, int]:
+        if group is None:
+            return topic.size, self.documents
+        return topic.group_counts.get(group, 0), self.group_totals.get(group, 0)
+
+    def _quotes(self, topic: Topic, group: Optional[str]) -> List[Dict[str, Any]]:
+        return topic.group_representatives.get(group, []) if group is not None else topic.representatives
+
+    def summary_documents(self, matches: List[Tuple[Topic, float]], group: Optional[str] = None) -> List["Document"]:
+        """One compact context document per matched topic: label, review share and representative quotes."""
+        from langchain_core.documents import Document
+
+        documents = []
+        scope = f" at {group}" if group else ""
+        for topic, similarity in matches:
+            count, total = self._share(topic, group)
+            lines = [
+                f"Topic: {topic.label}",
+                f"{count} of {total} reviews{scope} ({count / total:.0%}) fall in this topic." if total else "",
+                "Representative reviews:",
+            ]
+            lines.extend(f'- "{quote["text"]}"' for quote in self._quotes(topic, group))
+            documents.append(
+                Document(
+                    page_content="\n".join(line for line in lines if line),
+                    metadata={"topic_id": topic.id, "review_count": count, "similarity": round(similarity, 4)},
+                )
+            )
+        return documents
+
+    def describe(self, matches: List[Tuple[Topic, float]], group: Optional[str] = None) -> str:
+        """Render matched topics as an answer, without calling the LLM."""
+        if not matches:
+            return "No relevant reviews were found for this question."
+        scope = f" at {group}" if group else ""
+        ranked = sorted(matches, key=lambda match: -self._share(match[0], group)[0])
+        lines = [f"Here is how the {self._share(ranked[0][0], group)[1]} reviews{scope} break down on this question:"]
+        for topic, _ in ranked:
+            count, total = self._share(topic, group)
+            lines.append(f"\n**{topic.label}**: {count} reviews ({count / total:.0%})" if total else "")
+            for quote in self._quotes(topic, group):
+                source = f" (review {quote['review_id']})" if quote.get("review_id") is not None else ""
+                lines.append(f'- "{quote["text"]}"{source}')
+        return "\n".join(line for line in lines if line)
+
+
+def build_topic_index(
+    vectors: "np.ndarray",
+    texts: Sequence[str],
+    metadatas: Sequence[Dict[str, Any]],
+    clusters: int = 24,
+    group_key: str = "hospital_name",
+    top_terms: int = 6,
+    representatives: int = 3,
+    seed: int = 0,
+) -> TopicIndex:
+    """
+    Cluster review embeddings into topics.
+
+    Args:
+        vectors: One embedding per review (or per chunk of a chunked index).
+        texts: Review texts, aligned with ``vectors``.
+        metadatas: Review metadata, aligned with ``vectors``; chunks are grouped by their ``parent_id``.
+        clusters: Number of k-means clusters.
+        group_key: Metadata key counted per topic (e.g. hospital).
+        top_terms: Terms in each topic label.
+        representatives: Reviews kept per topic, and per topic and group, closest to the centroid first.
+        seed: Seed for k-means initialization.
+    """
+    import numpy as np
+
+    if len(texts) == 0:
+        raise ValueError("Cannot build topics from an empty index")
+    centroids, labels, similarities = spherical_kmeans(vectors, clusters, seed=seed)
+    terms = distinctive_terms(texts, labels, len(centroids), top_terms)
+    groups = [str(metadata.get(group_key)) if metadata.get(group_key) is not None else None for metadata in metadatas]
+    # Chunks of one review count as that review once, so sizes and shares stay in reviews.
+    parents = [metadata.get(PARENT_ID, index) for index, metadata in enumerate(metadatas)]
+
+    topics = []
+    for label in range(len(centroids)):
+        members = np.flatnonzero(labels == label)
+        members = members[np.argsort(-similarities[members])]
+        topic = Topic(
+            id=label,
+            label=", ".join(terms[label]) or f"topic {label}",
+            terms=terms[label],
+            size=0,
+        )
+        seen = set()
+        for member in members:
+            if parents[member] in seen:
+                continue
+            seen.add(parents[member])
+            topic.size += 1
+            group = groups[member]
+            quote = {"review_id": metadatas[member].get("review_id"), "text": _quote(texts[member])}
+            if len(topic.representatives) < representatives:
+                topic.representatives.append(quote)
+            if group is not None:
+                topic.group_counts[group] = topic.group_counts.get(group, 0) + 1
+                group_quotes = topic.group_representatives.setdefault(group, [])
+                if len(group_quotes) < representatives:
+                    group_quotes.append(quote)
+        topics.append(topic)
+
+    group_totals = dict(Counter(group for group, _ in set(zip(groups, parents)) if group is not None))
+    review_count = len(set(parents))
+    logger.info("Clustered %d embeddings of %d reviews into %d topics", len(texts), review_count, len(topics))
+    return TopicIndex(topics, centroids, group_key, group_totals, review_count)
+
+
+def load_index_records(vector_store: Any) -> Tuple["np.ndarray", List[str], List[Dict[str, Any]]]:
+    """Read every ``(vector, text, metadata)`` of a memory-mapped snapshot or a Chroma store."""
+    import numpy as np
+
+    if hasattr(vector_store, "get_document"):
+        documents = [vector_store.get_document(i) for i in range(len(vector_store))]
+        return (
+            np.asarray(vector_store.vectors),
+            [str(document.metadata.get("source") or document.page_content) for document in documents],
+            [document.metadata for document in documents],
+        )
+
+    vectors, texts, metadatas = [], [], []
+    count = vector_store._collection.count()
+    for offset in range(0, count, EXPORT_PAGE_SIZE):
+        page = vector_store.get(limit=EXPORT_PAGE_SIZE, offset=offset, include=["embeddings", "documents", "metadatas"])
+        for embedding, text, metadata in zip(page["embeddings"], page["documents"], page["metadatas"]):
+            metadata = metadata or {}
+            vectors.append(embedding)
+            texts.append(str(metadata.get("source") or text))
+            metadatas.append(metadata)
+    return np.asarray(vectors, dtype=np.float32), texts, metadatas
@@ -1,10 +1,10 @@
 """Utility functions for the RAG chatbot application."""
 
 import logging
+import math
 import os
 from pathlib import Path
-
-from dotenv import load_dotenv
+from typing import Sequence
 
 
 def setup_logging(log_level: int = logging.INFO) -> None:
@@ -19,8 +19,18 @@ def ensure_directory(path: Path) -> None:
 
 def get_api_key(env_var: str = "GOOGLE_API_KEY") -> str:
     """Retrieve the API key from an environment variable."""
+    from dotenv import load_dotenv
+
     load_dotenv()
     api_key = os.getenv(env_var)
     if not api_key:
         raise ValueError(f"API key not found in environment variable {env_var}")
     return api_key
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values (0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), math.ceil(q * len(sorted_values))))
+    return sorted_values[rank - 1]
@@ -0,0 +1,280 @@
+"""Streaming, constant-memory validation of the reviews CSV before ingestion."""
+
+import bisect
+import csv
+import hashlib
+import logging
+import math
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+REVIEW_LENGTH_BINS = (0, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+MAX_EXAMPLES = 10
+
+# Undecodable bytes survive as lone surrogates under ``errors="surrogateescape"``.
+_UNDECODABLE = re.compile("[\udc80-\udcff]")
+
+
+class _CompactIdSet:
+    """
+    Duplicate detector over 64-bit id digests.
+
+    Digests are buffered for one chunk, then stored as a sorted ``uint64`` run,
+    so memory is 8 bytes per distinct id instead of a Python object. Runs are
+    merged only once the newer one is as large as the one before it, so each
+    digest is re-sorted a logarithmic number of times instead of on every chunk.
+    """
+
+    def __init__(self) -> None:
+        self._runs: List["np.ndarray"] = []
+        self._pending: Dict[int, str] = {}
+        self.duplicates = 0
+        self.examples: List[str] = []
+
+    @staticmethod
+    def _digest(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode("utf-8", "surrogateescape"), digest_size=8).digest(), "big")
+
+    def add(self, value: str) -> None:
+        digest = self._digest(value)
+        if digest in self._pending:
+            self._record(value)
+        else:
+            self._pending[digest] = value
+
+    def flush(self) -> None:
+        import numpy as np
+
+        if not self._pending:
+            return
+        digests = np.fromiter(self._pending.keys(), dtype=np.uint64, count=len(self._pending))
+        repeated = np.zeros(digests.size, dtype=bool)
+        for run in self._runs:
+            positions = np.searchsorted(run, digests)
+            in_range = positions < run.size
+            repeated[in_range] |= run[positions[in_range]] == digests[in_range]
+        for digest in digests[repeated]:
+            self._record(self._pending[int(digest)])
+        self._pending.clear()
+
+        new = np.sort(digests[~repeated])
+        if new.size:
+            self._runs.append(new)
+        while len(self._runs) > 1 and self._runs[-2].size <= self._runs[-1].size:
+            newest = self._runs.pop()
+            self._runs[-1] = np.sort(np.concatenate((self._runs[-1], newest)))
+
+    def _record(self, value: str) -> None:
+        self.duplicates += 1
+        if len(self.examples) < MAX_EXAMPLES:
+            self.examples.append(value)
+
+
+@dataclass
+class DataValidationReport:
+    """Machine-readable result of a validation pass."""
+
+    path: str
+    rows: int = 0
+    columns: List[str] = field(default_factory=list)
+    column_stats: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    review_length: Dict[str, Any] = field(default_factory=dict)
+    issues: Dict[str, Any] = field(default_factory=dict)
+    examples: Dict[str, List[Any]] = field(default_factory=dict)
+    samples: List[str] = field(default_factory=list)
+    estimated_tokens: int = 0
+    estimated_embedding_calls: int = 0
+
+    @property
+    def ok(self) -> bool:
+        """True when nothing was found that would break ingestion."""
+        return not any(self.issues.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        report = asdict(self)
+        report["ok"] = self.ok
+        return report
+
+
+class DataValidator:
+    """Validates a reviews CSV in a single streaming pass."""
+
+    def __init__(
+        self,
+        source_column: str = "review",
+        id_column: str = "review_id",
+        required_columns: Sequence[str] = (),
+        max_input_tokens: int = 2048,
+        chars_per_token: float = 4.0,
+        batch_size: int = 20,
+        chunk_rows: int = 50000,
+    ) -> None:
+        """
+        Initialize the validator.
+
+        Args:
+            source_column: Column holding the review text.
+            id_column: Column holding the unique review identifier.
+            required_columns: Further columns ingestion depends on (e.g. metadata columns).
+            max_input_tokens: Embedding model input limit; longer documents are reported as oversized.
+            chars_per_token: Characters per token used to estimate embedding cost.
+            batch_size: Documents per embedding call, used to estimate the number of calls.
+            chunk_rows: Rows between merges of the duplicate-id buffer.
+        """
+        self.source_column = source_column
+        self.id_column = id_column
+        self.required_columns = tuple(dict.fromkeys((id_column, source_column, *required_columns)))
+        self.max_input_tokens = max_input_tokens
+        self.chars_per_token = chars_per_token
+        self.batch_size = batch_size
+        self.chunk_rows = chunk_rows
+
+    def validate(self, csv_path: Path) -> DataValidationReport:
+        """
+        Stream ``csv_path`` once and collect statistics and ingestion-breaking issues.
+
+        Raises:
+            FileNotFoundError: If the CSV file doesn't exist.
+        """
+        if not csv_path.exists():
+            raise FileNotFoundError(f"CSV file not found at {csv_path}")
+
+        report = DataValidationReport(path=str(csv_path))
+        issues = dict.fromkeys(
+            (
+                "empty_reviews",
+                "duplicate_ids",
+                "missing_ids",
+                "oversized_reviews",
+                "encoding_errors",
+                "malformed_rows",
+            ),
+            0,
+        )
+        examples: Dict[str, List[Any]] = {name: [] for name in issues}
+
+        def flag(issue: str, example: Any) -> None:
+            issues[issue] += 1
+            if len(examples[issue]) < MAX_EXAMPLES:
+                examples[issue].append(example)
+
+        histogram = [0] * len(REVIEW_LENGTH_BINS)
+        min_length: Optional[int] = None
+        max_length = 0
+        total_length = 0
+        seen_ids = _CompactIdSet()
+
+        with open(csv_path, newline="", encoding="utf-8", errors="surrogateescape") as csv_file:
+            reader = csv.DictReader(csv_file)
+            report.columns = [name.strip() for name in reader.fieldnames or []]
+            report.column_stats = {name: {"non_null": 0, "missing": 0} for name in report.columns}
+            missing_columns = [name for name in self.required_columns if name not in report.columns]
+            if missing_columns:
+                report.issues = {"missing_columns": missing_columns, **issues}
+                report.examples = examples
+                return report
+
+            for row in reader:
+                line = reader.line_num
+                report.rows += 1
+                if None in row or None in row.values():
+                    flag("malformed_rows", line)
+
+                content_chars = -1
+                for raw_name, value in row.items():
+                    if raw_name is None:
+                        continue
+                    value = (value or "").strip()
+                    stats = report.column_stats[raw_name.strip()]
+                    stats["non_null" if value else "missing"] += 1
+                    content_chars += len(raw_name.strip()) + len(value) + 3
+                if any(_UNDECODABLE.search(value) for value in row.values() if isinstance(value, str)):
+                    flag("encoding_errors", line)
+
+                review = (row.get(self.source_column) or "").strip()
+                if review:
+                    length = len(review)
+                    histogram[bisect.bisect_right(REVIEW_LENGTH_BINS, length) - 1] += 1
+                    min_length = length if min_length is None else min(min_length, length)
+                    max_length = max(max_length, length)
+                    total_length += length
+                    if len(report.samples) < 3:
+                        report.samples.append(review)
+                else:
+                    flag("empty_reviews", line)
+
+                tokens = math.ceil(max(content_chars, 0) / self.chars_per_token)
+                report.estimated_tokens += tokens
+                if tokens > self.max_input_tokens:
+                    flag("oversized_reviews", line)
+
+                review_id = (row.get(self.id_column) or "").strip()
+                if review_id:
+                    seen_ids.add(review_id)
+                else:
+                    flag("missing_ids", line)
+                if report.rows % self.chunk_rows == 0:
+                    seen_ids.flush()
+                    logger.debug(f"Validated {report.rows} rows")
+
+        seen_ids.flush()
+        issues["duplicate_ids"] = seen_ids.duplicates
+        examples["duplicate_ids"] = seen_ids.examples
+
+        non_empty = report.rows - issues["empty_reviews"]
+        report.review_length = {
+            "min": min_length or 0,
+            "max": max_length,
+            "mean": round(total_length / non_empty, 1) if non_empty else 0.0,
+            "histogram": [
+                {"min_chars": low, "max_chars": high, "count": count}
+                for low, high, count in zip(REVIEW_LENGTH_BINS, list(REVIEW_LENGTH_BINS[1:]) + [None], histogram)
+            ],
+        }
+        report.estimated_embedding_calls = math.ceil(report.rows / self.batch_size)
+        report.issues = {"missing_columns": [], **issues}
+        report.examples = examples
+        return report
+
+
+def validate_reviews_csv(csv_path: Path, report_path: Optional[Path] = None) -> DataValidationReport:
+    """
+    Validate the reviews CSV with the configured limits, optionally writing the JSON report.
+
+    Args:
+        csv_path: CSV file to validate.
+        report_path: Where to write the report; skipped when None.
+
+    Returns:
+        The DataValidationReport.
+    """
+    import json
+
+    from .config import (
+        BATCH_SIZE,
+        CHARS_PER_TOKEN,
+        EMBEDDING_MAX_INPUT_TOKENS,
+        REVIEW_METADATA_COLUMNS,
+        VALIDATION_CHUNK_ROWS,
+    )
+
+    validator = DataValidator(
+        required_columns=REVIEW_METADATA_COLUMNS,
+        max_input_tokens=EMBEDDING_MAX_INPUT_TOKENS,
+        chars_per_token=CHARS_PER_TOKEN,
+        batch_size=BATCH_SIZE,
+        chunk_rows=VALIDATION_CHUNK_ROWS,
+    )
+    report = validator.validate(csv_path)
+    if report_path is not None:
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(report.to_dict(), indent=2))
+        logger.info(f"Data validation report written to {report_path}")
+    return report
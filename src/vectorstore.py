@@ -2,18 +2,77 @@
 
 import logging
 import shutil
+import time
 from pathlib import Path
-from typing import List, Optional
-
-from langchain.schema import Document
-from langchain_chroma import Chroma
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from typing import TYPE_CHECKING, Any, List, Optional, Sequence, Tuple, Union
 
 from .utils import ensure_directory
 
+if TYPE_CHECKING:
+    from langchain.schema import Document
+    from langchain_chroma import Chroma
+    from langchain_core.embeddings import Embeddings
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+    from .sharding import ShardedVectorStore
+    from .snapshot import IndexSnapshot
+    from .topics import TopicIndex
+
 logger = logging.getLogger(__name__)
 
 
+def similarity_search_by_vector_with_score(
+    store: Any,
+    embedding: Sequence[float],
+    k: int,
+) -> List[Tuple["Document", float]]:
+    """
+    Search any supported store by vector, returning cosine-style scores where higher is closer.
+
+    Chroma reports squared L2 distances; for unit-normalized embeddings these map
+    exactly to cosine similarity via ``1 - d / 2``, which keeps scores comparable
+    with memory-mapped snapshots when results from several stores are merged.
+    """
+    if hasattr(store, "similarity_search_by_vector_with_score"):
+        return store.similarity_search_by_vector_with_score(embedding, k)
+    results = store.similarity_search_by_vector_with_relevance_scores(embedding, k)
+    return [(doc, 1.0 - distance / 2.0) for doc, distance in results]
+
+
+def similarity_search_by_vectors_with_score(
+    store: Any,
+    embeddings: Sequence[Sequence[float]],
+    k: int,
+) -> List[List[Tuple["Document", float]]]:
+    """
+    Search a batch of query embeddings in one call where the store supports it.
+
+    Snapshots and sharded stores use their batched matrix search and Chroma
+    receives a single multi-query request; scores follow the same convention as
+    ``similarity_search_by_vector_with_score``.
+    """
+    if hasattr(store, "similarity_search_by_vectors_with_score"):
+        return store.similarity_search_by_vectors_with_score(embeddings, k)
+    if hasattr(store, "_collection"):
+        from langchain_core.documents import Document
+
+        results = store._collection.query(
+            query_embeddings=[list(embedding) for embedding in embeddings],
+            n_results=k,
+            include=["documents", "metadatas", "distances"],
+        )
+        return [
+            [
+                (Document(id=doc_id, page_content=text, metadata=metadata or {}), 1.0 - distance / 2.0)
+                for doc_id, text, metadata, distance in zip(ids, texts, metadatas, distances)
+            ]
+            for ids, texts, metadatas, distances in zip(
+                results["ids"], results["documents"], results["metadatas"], results["distances"]
+            )
+        ]
+    return [similarity_search_by_vector_with_score(store, embedding, k) for embedding in embeddings]
+
+
 class VectorStoreManager:
     """Manages creation and retrieval of the vector store."""
 
@@ -22,22 +81,43 @@ class VectorStoreManager:
         persist_directory: Path,
         embedding_model: str,
         api_key: str,
+        snapshot_directory: Optional[Path] = None,
+        topics_directory: Optional[Path] = None,
+        embedding_function: Optional["Embeddings"] = None,
     ) -> None:
-        """Initialize the vector store manager."""
+        """
+        Initialize the vector store manager.
+
+        ``embedding_function`` shares an existing embedding client (e.g. the one a
+        serving chain already uses) instead of creating one for ``embedding_model``.
+        """
         self.persist_directory = persist_directory
+        self.snapshot_directory = snapshot_directory
+        self.topics_directory = topics_directory
         self.embedding_model = embedding_model
         self.api_key = api_key
-        self.embedding_function = GoogleGenerativeAIEmbeddings(
-            model=self.embedding_model,
-            google_api_key=self.api_key,
-        )
+        self._embedding_function: Optional[Union["GoogleGenerativeAIEmbeddings", "Embeddings"]] = embedding_function
+
+    @property
+    def embedding_function(self) -> Union["GoogleGenerativeAIEmbeddings", "Embeddings"]:
+        """Embedding client, created on first use to keep imports off the startup path."""
+        if self._embedding_function is None:
+            from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+            self._embedding_function = GoogleGenerativeAIEmbeddings(
+                model=self.embedding_model,
+                google_api_key=self.api_key,
+            )
+        return self._embedding_function
 
     def create_vector_store(
         self,
-        documents: List[Document],
+        documents: List["Document"],
         recreate: bool = False,
-    ) -> Chroma:
+    ) -> "Chroma":
         """Create a new vector store from documents."""
+        from langchain_chroma import Chroma
+
         if recreate and self.persist_directory.exists():
             logger.info("Recreating vector store: removing existing directory")
             shutil.rmtree(self.persist_directory)
@@ -52,14 +132,161 @@ class VectorStoreManager:
         logger.info("Vector store created successfully with %d documents", len(documents))
         return vector_store
 
-    def load_vector_store(self) -> Optional[Chroma]:
-        """Load the existing vector store."""
+    def load_vector_store(self) -> Optional[Union["Chroma", "ShardedVectorStore"]]:
+        """Load the existing vector store, opening every shard of a sharded layout."""
         if not self.persist_directory.exists():
             logger.warning("Vector store directory does not exist at %s", self.persist_directory)
             return None
 
+        from langchain_chroma import Chroma
+
+        from .sharding import ShardedVectorStore, read_shard_manifest
+
+        manifest = read_shard_manifest(self.persist_directory)
+        if manifest is not None:
+            logger.info("Loading %d shards from %s", len(manifest["shards"]), self.persist_directory)
+            shards = {
+                shard["name"]: Chroma(
+                    persist_directory=str(self.persist_directory / shard["name"]),
+                    embedding_function=self.embedding_function,
+                )
+                for shard in manifest["shards"]
+            }
+            return ShardedVectorStore(
+                shards,
+                self.embedding_function,
+                partition_key=manifest["partition_key"],
+                shard_keys={shard["name"]: shard.get("key") for shard in manifest["shards"]},
+            )
+
         logger.info("Loading vector store from %s", self.persist_directory)
         return Chroma(
             persist_directory=str(self.persist_directory),
             embedding_function=self.embedding_function,
         )
+
+    def create_partitioned_vector_store(
+        self,
+        documents: List["Document"],
+        partition_key: str,
+        batch_processor: Any,
+    ) -> "ShardedVectorStore":
+        """
+        Build one collection per value of ``partition_key`` (e.g. one per hospital).
+
+        Args:
+            documents: Documents carrying ``partition_key`` in their metadata.
+            partition_key: Metadata field to partition on.
+            batch_processor: BatchEmbeddingProcessor used to embed each partition under the rate limit; its
+                wait time is also kept between partitions.
+
+        Returns:
+            ShardedVectorStore that can route queries to a single partition.
+        """
+        from .sharding import ShardSpec, partition_shard_name, write_shard_manifest
+
+        groups = {}
+        for document in documents:
+            if partition_key not in document.metadata:
+                raise ValueError(f"Document is missing partition key '{partition_key}' in its metadata")
+            groups.setdefault(str(document.metadata[partition_key]), []).append(document)
+
+        if self.persist_directory.exists():
+            logger.info("Recreating vector store: removing existing directory")
+            shutil.rmtree(self.persist_directory)
+        ensure_directory(self.persist_directory)
+
+        specs = []
+        for index, (value, group) in enumerate(sorted(groups.items())):
+            spec = ShardSpec(name=partition_shard_name(index, value), key=value, count=len(group))
+            if index > 0:
+                logger.info(f"Partition done. Waiting {batch_processor.wait_time} seconds...")
+                time.sleep(batch_processor.wait_time)
+            logger.info("Building partition %s=%s with %d documents", partition_key, value, len(group))
+            partition_manager = VectorStoreManager(
+                persist_directory=self.persist_directory / spec.name,
+                embedding_model=self.embedding_model,
+                api_key=self.api_key,
+                embedding_function=self.embedding_function,
+            )
+            batch_processor.process_documents_in_batches(documents=group, vector_store_manager=partition_manager)
+            specs.append(spec)
+
+        write_shard_manifest(self.persist_directory, specs, partition_key=partition_key)
+        return self.load_vector_store()
+
+    def create_from_shards(self, shard_directory: Path) -> "Chroma":
+        """Merge a sharded build into a single store at ``persist_directory`` without re-embedding."""
+        from langchain_chroma import Chroma
+
+        from .sharding import merge_shards, read_shard_manifest
+
+        manifest = read_shard_manifest(shard_directory)
+        if manifest is None:
+            raise FileNotFoundError(f"No shard manifest found in {shard_directory}")
+
+        if self.persist_directory.exists():
+            logger.info("Recreating vector store: removing existing directory")
+            shutil.rmtree(self.persist_directory)
+        ensure_directory(self.persist_directory)
+
+        target = Chroma(persist_directory=str(self.persist_directory), embedding_function=self.embedding_function)
+        shard_stores = [
+            Chroma(persist_directory=str(shard_directory / shard["name"]), embedding_function=self.embedding_function)
+            for shard in manifest["shards"]
+        ]
+        merge_shards(shard_stores, target)
+        return target
+
+    def export_snapshot(self, vector_store: "Chroma") -> Path:
+        """Publish a read-only, memory-mappable snapshot of the vector store."""
+        from .snapshot import export_snapshot
+
+        if self.snapshot_directory is None:
+            raise ValueError("No snapshot directory configured for this VectorStoreManager")
+        return export_snapshot(vector_store, self.snapshot_directory, embedding_model=self.embedding_model)
+
+    def load_snapshot(self) -> Optional["IndexSnapshot"]:
+        """Open the published index snapshot, sharing its pages with other processes."""
+        from .snapshot import MANIFEST_FILE, IndexSnapshot
+
+        if self.snapshot_directory is None or not (self.snapshot_directory / MANIFEST_FILE).exists():
+            logger.info("No index snapshot available at %s", self.snapshot_directory)
+            return None
+
+        logger.info("Memory-mapping index snapshot from %s", self.snapshot_directory)
+        return IndexSnapshot(self.snapshot_directory, self.embedding_function)
+
+    def export_topics(
+        self,
+        vector_store: Union["Chroma", "IndexSnapshot"],
+        clusters: int,
+        group_key: str,
+        top_terms: int = 6,
+        representatives: int = 3,
+    ) -> Path:
+        """Cluster every stored review embedding into topics and save them next to the index."""
+        from .topics import build_topic_index, load_index_records
+
+        if self.topics_directory is None:
+            raise ValueError("No topics directory configured for this VectorStoreManager")
+        vectors, texts, metadatas = load_index_records(vector_store)
+        topics = build_topic_index(
+            vectors,
+            texts,
+            metadatas,
+            clusters=clusters,
+            group_key=group_key,
+            top_terms=top_terms,
+            representatives=representatives,
+        )
+        return topics.save(self.topics_directory)
+
+    def load_topics(self) -> Optional["TopicIndex"]:
+        """Open the precomputed topic clusters, if this index has them."""
+        from .topics import TOPICS_FILE, TopicIndex
+
+        if self.topics_directory is None or not (self.topics_directory / TOPICS_FILE).exists():
+            logger.info("No topic clusters available at %s", self.topics_directory)
+            return None
+        return TopicIndex.load(self.topics_directory)
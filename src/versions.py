@@ -0,0 +1,221 @@
+"""Versioned index directories with an atomically switched "current" pointer.
+
+Every build writes a fresh ``versions/<version>/`` directory under the index
+root, holding the same ``chroma_data`` and ``index_snapshot`` layout as an
+unversioned build. Publishing replaces the ``CURRENT`` pointer file with
+``os.replace``, so readers see either the old or the new version and never a
+half-written index. Serving processes poll the pointer and swap to new versions
+in place; replaced versions are garbage-collected once they are past the
+retention policy.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+VERSION_INFO_FILE = "VERSION.json"
+CHROMA_SUBDIR = "chroma_data"
+SNAPSHOT_SUBDIR = "index_snapshot"
+TOPICS_SUBDIR = "topics"
+
+
+@dataclass
+class VersionInfo:
+    """Lifecycle timestamps of one index version (epoch seconds; None until the event happens)."""
+
+    version: str
+    created_at: float
+    published_at: Optional[float] = None
+    retired_at: Optional[float] = None
+
+
+class IndexVersions:
+    """Creates, publishes and garbage-collects index versions under one root directory."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.versions_directory = root / VERSIONS_DIR
+        self.pointer = root / CURRENT_FILE
+
+    def current(self) -> Optional[str]:
+        """The published version, or None when nothing has been published yet."""
+        try:
+            version = self.pointer.read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def directory(self, version: str) -> Path:
+        """Directory holding ``version``."""
+        return self.versions_directory / version
+
+    def list_versions(self) -> List[VersionInfo]:
+        """Every version on disk, oldest first."""
+        if not self.versions_directory.exists():
+            return []
+        infos = [self._read_info(path.name) for path in self.versions_directory.iterdir() if path.is_dir()]
+        return sorted((info for info in infos if info is not None), key=lambda info: info.created_at)
+
+    def create(self) -> Path:
+        """Create an empty, unpublished version directory."""
+        version = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        directory = self.directory(version)
+        directory.mkdir(parents=True)
+        self._write_info(VersionInfo(version=version, created_at=time.time()))
+        logger.info("Building index version %s in %s", version, directory)
+        return directory
+
+    @contextlib.contextmanager
+    def build(self) -> Iterator[Path]:
+        """Yield a new version directory, publishing it on success and removing it on failure."""
+        directory = self.create()
+        try:
+            yield directory
+        except BaseException:
+            logger.warning("Build of index version %s failed; removing it", directory.name)
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+        self.publish(directory.name)
+
+    def publish(self, version: str) -> None:
+        """
+        Point ``CURRENT`` at ``version``; also used to roll back to a retained version.
+
+        Raises:
+            FileNotFoundError: If the version does not exist.
+        """
+        info = self._read_info(version)
+        if info is None:
+            raise FileNotFoundError(f"Index version {version} not found in {self.versions_directory}")
+
+        previous = self.current()
+        now = time.time()
+        info.published_at, info.retired_at = now, None
+        self._write_info(info)
+
+        temporary = self.pointer.with_name(f"{CURRENT_FILE}.{os.getpid()}.tmp")
+        with open(temporary, "w", encoding="utf-8") as handle:
+            handle.write(version)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, self.pointer)
+
+        if previous and previous != version:
+            retired = self._read_info(previous)
+            if retired is not None:
+                retired.retired_at = now
+                self._write_info(retired)
+        logger.info("Published index version %s (previous: %s)", version, previous)
+
+    def collect_garbage(self, keep: int = 3, retention_seconds: float = 3600.0) -> List[str]:
+        """
+        Delete published versions beyond the retention policy.
+
+        The current version and the ``keep - 1`` most recently published others
+        are always kept. Older versions are deleted only once they have been
+        replaced for at least ``retention_seconds``, so replicas still polling
+        can swap off them first. Unpublished versions (builds in progress) are
+        never touched.
+
+        Returns:
+            The deleted versions.
+        """
+        current = self.current()
+        published = [info for info in self.list_versions() if info.published_at is not None]
+        published.sort(key=lambda info: info.published_at, reverse=True)
+        others = [info for info in published if info.version != current]
+
+        now = time.time()
+        removed = []
+        for info in others[max(keep - 1, 0) :]:
+            if info.retired_at is None or now - info.retired_at < retention_seconds:
+                continue
+            shutil.rmtree(self.directory(info.version), ignore_errors=True)
+            removed.append(info.version)
+        if removed:
+            logger.info("Garbage-collected index versions: %s", ", ".join(removed))
+        return removed
+
+    def _read_info(self, version: str) -> Optional[VersionInfo]:
+        try:
+            data = json.loads((self.directory(version) / VERSION_INFO_FILE).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+        return VersionInfo(**data)
+
+    def _write_info(self, info: VersionInfo) -> None:
+        path = self.directory(info.version) / VERSION_INFO_FILE
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(asdict(info), indent=2), encoding="utf-8")
+        os.replace(temporary, path)
+
+
+class IndexWatcher:
+    """Polls the ``CURRENT`` pointer and hands every newly published version to a callback."""
+
+    def __init__(
+        self,
+        versions: IndexVersions,
+        on_version: Callable[[str, Path], None],
+        poll_seconds: float = 10.0,
+        version: Optional[str] = None,
+    ) -> None:
+        """
+        Initialize the watcher.
+
+        Args:
+            versions: Index root to watch.
+            on_version: Called with the new version and its directory; raising leaves the
+                version unapplied, so it is retried on the next poll.
+            poll_seconds: Interval between pointer checks.
+            version: Version already being served.
+        """
+        self.versions = versions
+        self.on_version = on_version
+        self.poll_seconds = poll_seconds
+        self.version = version
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> bool:
+        """Apply the current version if it changed; returns True when a new version was applied."""
+        current = self.versions.current()
+        if current is None or current == self.version:
+            return False
+        try:
+            self.on_version(current, self.versions.directory(current))
+        except Exception as exc:
+            logger.error("Could not switch to index version %s: %s", current, exc, exc_info=True)
+            return False
+        self.version = current
+        return True
+
+    def start(self) -> "IndexWatcher":
+        """Start polling in a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="index-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop polling."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            self.check()
@@ -0,0 +1,118 @@
+"""Tests for parallel, cached end-to-end answer evaluation."""
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+pytest.importorskip("langchain_core")
+
+from src.answer_evaluation import (  # noqa: E402
+    AnswerConfig,
+    AnswerEvaluator,
+    HeuristicFaithfulnessGrader,
+    summarize_answer_evaluation,
+)
+from src.data_loader import ReviewDataLoader  # noqa: E402
+from src.evaluation import EvaluationSample  # noqa: E402
+from src.rag_chain import RAGChainConfig, ReviewRAGChain  # noqa: E402
+from src.snapshot import IndexSnapshot, write_snapshot  # noqa: E402
+from src.stubs import StubChatModel, StubEmbeddings  # noqa: E402
+
+REVIEWS = [
+    (1, "Wallace-Hamilton", "Discharge was quick and the nurses explained every medication."),
+    (2, "Wallace-Hamilton", "Parking was expensive and the garage was dark."),
+    (3, "Burke, Griffin and Cooper", "Communication between the staff was poor."),
+]
+SAMPLES = [
+    EvaluationSample(question="What did patients say about discharge?", expected_keywords=["discharge"]),
+    EvaluationSample(question="How is parking?", expected_keywords=["parking", "garage"]),
+]
+CONFIGS = [
+    AnswerConfig(mode="generative", unit="review", top_k=2),
+    AnswerConfig(mode="extractive", unit="review", top_k=1),
+]
+
+
+def _chain(tmp_path, chat_model):
+    embeddings = StubEmbeddings(dimension=128)
+    loader = ReviewDataLoader(csv_path=None, metadata_columns=("review_id", "hospital_name"))
+    rows = [{"review_id": str(i), "hospital_name": hospital, "review": review} for i, hospital, review in REVIEWS]
+    documents = [loader.document_from_row(row, number) for number, row in enumerate(rows)]
+    texts = [document.page_content for document in documents]
+    ids, metadatas = [str(i) for i in range(len(texts))], [document.metadata for document in documents]
+    page = (ids, embeddings.embed_documents(texts), texts, metadatas)
+    directory = write_snapshot(tmp_path / "index", [page], count=len(texts), dimension=embeddings.dimension)
+    config = RAGChainConfig(chat_model="stub", api_key="", top_k=3)
+    return ReviewRAGChain(IndexSnapshot(directory, embeddings), config, chat_model=chat_model, index_version="v1")
+
+
+def test_heuristic_grader_scores_supported_sentences():
+    grader = HeuristicFaithfulnessGrader(threshold=0.6)
+    context = ["Parking was expensive and the garage was dark."]
+
+    assert grader.grade("parking?", "Parking was expensive. The garage was dark.", context).score == 1.0
+    graded = grader.grade("parking?", "Parking was expensive. Valet service was free and friendly.", context)
+    assert graded.score == 0.5
+    assert graded.details["unsupported"] == ["Valet service was free and friendly."]
+    assert grader.grade("parking?", "", context).score == 1.0
+
+
+def test_answers_are_evaluated_per_config_with_latency_and_tokens(tmp_path):
+    chat_model = StubChatModel(latency_seconds=0.0)
+    evaluator = AnswerEvaluator(_chain(tmp_path, chat_model), CONFIGS, cache_directory=None, max_workers=4)
+
+    results = evaluator.evaluate(SAMPLES)
+    assert len(results) == 4 and results["error"].isna().all()
+    assert chat_model.calls == 2
+
+    generative = results[results["config"] == "generative/review/k=2"]
+    assert (generative["documents"] == 2).all()
+    assert (generative["input_tokens"] > 0).all() and (generative["output_tokens"] > 0).all()
+    assert not generative["tokens_estimated"].any()
+    extractive = results[results["config"] == "extractive/review/k=1"]
+    assert (extractive["input_tokens"] == 0).all()
+    assert extractive["faithfulness"].mean() > generative["faithfulness"].mean()
+
+    summary = summarize_answer_evaluation(results).set_index("config")
+    assert list(summary.index) == ["generative/review/k=2", "extractive/review/k=1"]
+    assert summary.loc["generative/review/k=2", "input_tokens"] == generative["input_tokens"].sum()
+    extractive_summary = summary.loc["extractive/review/k=1"]
+    assert extractive_summary["latency_p95_ms"] >= extractive_summary["latency_p50_ms"]
+    assert summary["generated"].sum() == 4 and summary["cached"].sum() == 0
+
+
+def test_re_runs_reuse_cached_generations_and_grades(tmp_path):
+    chat_model = StubChatModel(latency_seconds=0.0)
+    chain = _chain(tmp_path, chat_model)
+    cache = tmp_path / "cache"
+
+    first = AnswerEvaluator(chain, CONFIGS, cache_directory=cache).evaluate(SAMPLES)
+    second = AnswerEvaluator(chain, CONFIGS, cache_directory=cache).evaluate(SAMPLES)
+    assert chat_model.calls == 2
+    assert second["cached"].all()
+    assert list(second["answer"]) == list(first["answer"])
+    assert list(second["input_tokens"]) == list(first["input_tokens"])
+
+    stricter = AnswerEvaluator(chain, CONFIGS, grader=HeuristicFaithfulnessGrader(0.9), cache_directory=cache)
+    assert stricter.evaluate(SAMPLES)["cached"].all()
+    assert chat_model.calls == 2
+
+    wider = [AnswerConfig(mode="generative", unit="review", top_k=3)]
+    AnswerEvaluator(chain, wider, cache_directory=cache).evaluate(SAMPLES)
+    chain.swap_vector_store(chain.vector_store, version="v2")
+    AnswerEvaluator(chain, CONFIGS[:1], cache_directory=cache).evaluate(SAMPLES)
+    assert chat_model.calls == 6
+
+    chain.config.topic_matches = 0
+    AnswerEvaluator(chain, CONFIGS[:1], cache_directory=cache).evaluate(SAMPLES)
+    assert chat_model.calls == 8
+
+
+def test_profiled_chain_profiles_evaluated_answers(tmp_path):
+    from src.profiling import Profiler
+
+    chain = _chain(tmp_path, StubChatModel(latency_seconds=0.0))
+    chain.profiler = Profiler(output_directory=tmp_path / "profiles", memory=False)
+    AnswerEvaluator(chain, CONFIGS[:1], cache_directory=None, max_workers=1).evaluate(SAMPLES)
+    assert chain.profiler.profiled == len(SAMPLES)
+    assert list((tmp_path / "profiles").glob("*answer_question.prof"))
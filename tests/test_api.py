@@ -0,0 +1,109 @@
+"""Tests for the HTTP/JSON query API."""
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from langchain_core.documents import Document  # noqa: E402
+
+from src.api import create_api  # noqa: E402
+from src.rag_chain import UnknownHospitalError  # noqa: E402
+from src.resilience import CircuitOpenError, DeadlineExceededError  # noqa: E402
+
+
+class FakeRAGChain:
+    """Minimal stand-in exposing the ReviewRAGChain serving interface."""
+
+    available_partitions = ["Wallace-Hamilton"]
+
+    def retrieve_relevant_documents(self, question, k=None, hospital=None, unit=None):
+        if hospital == "Nowhere General":
+            raise UnknownHospitalError(f"Unknown hospital: {hospital!r}")
+        return [Document(page_content=f"{question}|{k}|{hospital}|{unit}", metadata={"row": 1})]
+
+    def answer_question(self, question, hospital=None, mode=None, unit=None):
+        if question == "outage":
+            raise CircuitOpenError("chat circuit is open; failing fast")
+        return f"{mode or 'answer'} to {question}"
+
+    def stream_answer(self, question, hospital=None, mode=None, unit=None):
+        if question == "slow":
+            raise DeadlineExceededError("answer deadline exceeded")
+        yield from ["answer ", "to ", question]
+
+    def metrics(self):
+        return {"chat": {"calls": 1, "circuit": "closed"}}
+
+
+@pytest.fixture
+def client():
+    return TestClient(create_api(FakeRAGChain()))
+
+
+def test_health(client):
+    assert client.get("/health").json() == {"status": "ok", "partitions": ["Wallace-Hamilton"]}
+
+
+def test_retrieve_single_and_batch(client):
+    single = client.post("/retrieve", json={"question": "parking", "k": 2, "hospital": "Wallace-Hamilton"}).json()
+    assert single["documents"][0]["page_content"] == "parking|2|Wallace-Hamilton|None"
+    chunks = client.post("/retrieve", json={"question": "parking", "unit": "chunk"}).json()
+    assert chunks["documents"][0]["page_content"] == "parking|None|None|chunk"
+    assert client.post("/retrieve", json={"question": "parking", "unit": "sentence"}).status_code == 422
+    assert client.post("/retrieve", json={"question": "parking", "hospital": "Nowhere General"}).status_code == 422
+
+    batch = client.post("/retrieve", json={"questions": ["a", "b"]}).json()
+    assert [item["question"] for item in batch["results"]] == ["a", "b"]
+    assert batch["results"][1]["documents"][0]["page_content"] == "b|None|None|None"
+
+
+def test_answer_single_and_batch(client):
+    assert client.post("/answer", json={"question": "q"}).json() == {"answer": "answer to q"}
+    batch = client.post("/answer", json={"questions": ["x", "y"]}).json()
+    assert [item["answer"] for item in batch["results"]] == ["answer to x", "answer to y"]
+
+
+def test_answer_mode_is_validated_and_passed_through(client):
+    assert client.post("/answer", json={"question": "q", "mode": "extractive"}).json() == {"answer": "extractive to q"}
+    assert client.post("/answer", json={"question": "q", "mode": "poetry"}).status_code == 422
+
+
+def test_answer_requires_exactly_one_question_form(client):
+    assert client.post("/answer", json={}).status_code == 422
+    assert client.post("/answer", json={"question": "q", "questions": ["q"]}).status_code == 422
+
+
+def test_answer_stream(client):
+    response = client.post("/answer/stream", json={"question": "q"})
+    assert response.status_code == 200
+    assert response.text == "answer to q"
+    assert client.post("/answer/stream", json={"question": "slow"}).status_code == 504
+
+
+def test_metrics_and_open_circuit(client):
+    assert client.get("/metrics").json()["chat"]["circuit"] == "closed"
+    response = client.post("/answer", json={"question": "outage"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "30"
+
+
+def test_answer_stream_maps_a_slow_model_to_504():
+    from src.rag_chain import RAGChainConfig, ReviewRAGChain
+    from src.resilience import ResilienceConfig
+    from src.stubs import StubChatModel
+
+    class OneReviewStore:
+        def similarity_search(self, question, k):
+            return [Document(page_content="review: The discharge process was quick.", metadata={"row": 0})]
+
+    config = RAGChainConfig(
+        chat_model="stub",
+        api_key="",
+        top_k=1,
+        resilience=ResilienceConfig(timeout_seconds=0.1, deadline_seconds=0.3, max_retries=0),
+        extractive_fallback=False,
+    )
+    chain = ReviewRAGChain(OneReviewStore(), config, chat_model=StubChatModel(seed=0, latency_seconds=1.0))
+    assert TestClient(create_api(chain)).post("/answer/stream", json={"question": "discharge?"}).status_code == 504
@@ -0,0 +1,101 @@
+"""Tests for micro-batched retrieval."""
+
+import threading
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("langchain_chroma")
+
+from langchain_chroma import Chroma  # noqa: E402
+from langchain_core.documents import Document  # noqa: E402
+from langchain_core.embeddings import DeterministicFakeEmbedding  # noqa: E402
+
+from src.batching import QueryBatcher  # noqa: E402
+from src.snapshot import IndexSnapshot, write_snapshot  # noqa: E402
+
+TEXTS = [f"review number {i}" for i in range(40)]
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    embedder = CountingEmbedding(size=16)
+    vectors = DeterministicFakeEmbedding(size=16).embed_documents(TEXTS)
+    pages = [([str(i) for i in range(len(TEXTS))], vectors, TEXTS, [{"row": i} for i in range(len(TEXTS))])]
+    write_snapshot(tmp_path / "snapshot", pages, count=len(TEXTS), dimension=16)
+    return IndexSnapshot(tmp_path / "snapshot", embedder)
+
+
+def _run_concurrently(batcher, questions, k):
+    results = {}
+    barrier = threading.Barrier(len(questions))
+
+    def worker(question):
+        barrier.wait()
+        results[question] = batcher.search(question, k)
+
+    threads = [threading.Thread(target=worker, args=(q,)) for q in questions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_queries_are_coalesced(snapshot):
+    batcher = QueryBatcher(snapshot, max_batch_size=64, max_wait_ms=50)
+    batcher._last_batch_size = 2  # simulate a loaded service so the window is open
+    questions = TEXTS[:16]
+
+    results = _run_concurrently(batcher, questions, k=3)
+    batcher.close()
+
+    assert snapshot.embedding_function.calls < len(questions)
+    assert batcher.stats.largest_batch > 1
+    for question in questions:
+        assert [doc.page_content for doc in results[question]] == [
+            doc.page_content for doc in snapshot.similarity_search(question, 3)
+        ]
+
+
+def test_idle_batcher_dispatches_immediately(snapshot):
+    batcher = QueryBatcher(snapshot, max_wait_ms=10_000)
+    assert batcher.search(TEXTS[5], 1)[0].page_content == TEXTS[5]
+    batcher.close()
+
+
+def test_searches_racing_close_all_complete(snapshot):
+    batcher = QueryBatcher(snapshot, max_wait_ms=1)
+    results = []
+
+    def worker(question):
+        for _ in range(20):
+            results.append(batcher.search(question, 1)[0].page_content == question)
+
+    threads = [threading.Thread(target=worker, args=(q,)) for q in TEXTS[:8]]
+    for thread in threads:
+        thread.start()
+    batcher.close()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert not any(thread.is_alive() for thread in threads)
+    assert len(results) == 160 and all(results)
+    assert batcher.search(TEXTS[3], 1)[0].page_content == TEXTS[3]
+
+
+def test_chroma_batched_search(tmp_path):
+    embedder = DeterministicFakeEmbedding(size=16)
+    documents = [Document(page_content=text) for text in TEXTS[:10]]
+    store = Chroma.from_documents(documents, embedder, persist_directory=str(tmp_path))
+    batcher = QueryBatcher(store, max_wait_ms=20)
+    results = _run_concurrently(batcher, TEXTS[:4], k=2)
+    batcher.close()
+    assert all(results[q][0].page_content == q for q in TEXTS[:4])
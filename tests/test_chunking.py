@@ -0,0 +1,121 @@
+"""Tests for sentence-window chunking and parent-review retrieval."""
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("langchain_core")
+
+from src.chunking import SentenceWindowChunker, collapse_to_parents, parent_document, sentence_windows  # noqa: E402
+from src.data_loader import ReviewDataLoader  # noqa: E402
+from src.rag_chain import RAGChainConfig, ReviewRAGChain  # noqa: E402
+from src.snapshot import IndexSnapshot, write_snapshot  # noqa: E402
+from src.stubs import StubChatModel, StubEmbeddings  # noqa: E402
+
+REVIEWS = [
+    (
+        1,
+        "Wallace-Hamilton",
+        "The nurses were kind. Parking cost a fortune. The parking garage was dark. "
+        "Discharge was quick. Food was fine.",
+    ),
+    (2, "Wallace-Hamilton", "Parking was easy to find."),
+    (3, "Burke, Griffin and Cooper", "The surgeon explained everything. Recovery was smooth."),
+]
+
+
+def _documents():
+    loader = ReviewDataLoader(csv_path=None, metadata_columns=("review_id", "hospital_name"))
+    rows = [{"review_id": str(i), "hospital_name": hospital, "review": review} for i, hospital, review in REVIEWS]
+    return [loader.document_from_row(row, number) for number, row in enumerate(rows)]
+
+
+def _index(tmp_path, documents, embeddings):
+    texts = [document.page_content for document in documents]
+    ids, metadatas = [str(i) for i in range(len(texts))], [document.metadata for document in documents]
+    page = (ids, embeddings.embed_documents(texts), texts, metadatas)
+    directory = write_snapshot(tmp_path / "index", [page], count=len(texts), dimension=embeddings.dimension)
+    return IndexSnapshot(directory, embeddings)
+
+
+def test_sentence_windows_overlap_and_cover_every_sentence():
+    text = "One. Two. Three. Four. Five. Six."
+    assert sentence_windows(text, 3, 2) == ["One. Two. Three.", "Three. Four. Five.", "Four. Five. Six."]
+    assert sentence_windows("Only one.", 3, 2) == ["Only one."]
+    assert sentence_windows("", 3, 2) == []
+
+
+def test_chunks_point_to_their_parent_review():
+    review = _documents()[0]
+    chunks = SentenceWindowChunker(window_sentences=2, stride_sentences=2).split(review)
+
+    assert [chunk.metadata["chunk_index"] for chunk in chunks] == [0, 1, 2]
+    assert all(chunk.metadata["parent_id"] == "1" and chunk.metadata["chunk_count"] == 3 for chunk in chunks)
+    assert chunks[1].metadata["source"] == "The parking garage was dark. Discharge was quick."
+    assert "review: The parking garage was dark. Discharge was quick." in chunks[1].page_content
+    assert "hospital_name: Wallace-Hamilton" in chunks[1].page_content
+
+    parent = parent_document(chunks[1])
+    assert parent.page_content == review.page_content
+    assert parent.metadata == review.metadata
+    assert collapse_to_parents(chunks, k=5) == [parent]
+
+    single = SentenceWindowChunker(window_sentences=2).split(_documents()[1])
+    assert len(single) == 1 and "parent_content" not in single[0].metadata
+    assert parent_document(single[0]).page_content == _documents()[1].page_content
+
+
+def test_retrieval_unit_is_chosen_per_request(tmp_path):
+    embeddings = StubEmbeddings(dimension=128)
+    chunks = SentenceWindowChunker(window_sentences=1, stride_sentences=1).split_documents(_documents())
+    config = RAGChainConfig(chat_model="stub", api_key="", top_k=2)
+    chain = ReviewRAGChain(_index(tmp_path, chunks, embeddings), config, chat_model=StubChatModel(latency_seconds=0.0))
+
+    matched = chain.retrieve_relevant_documents("parking garage parking cost", unit="chunk")
+    assert [document.metadata["parent_id"] for document in matched] == ["1", "1"]
+
+    reviews = chain.retrieve_relevant_documents("parking garage parking cost")
+    assert [document.metadata["review_id"] for document in reviews] == ["1", "2"]
+    assert reviews[0].metadata["source"] == REVIEWS[0][2]
+    assert "chunk_index" not in reviews[0].metadata
+
+    with pytest.raises(ValueError):
+        chain.retrieve_relevant_documents("parking", unit="sentence")
+
+
+def test_empty_retrieval_does_not_decide_whether_the_index_is_chunked(tmp_path, monkeypatch):
+    embeddings = StubEmbeddings(dimension=128)
+    chunks = SentenceWindowChunker(window_sentences=1, stride_sentences=1).split_documents(_documents())
+    config = RAGChainConfig(chat_model="stub", api_key="", top_k=2)
+    store = _index(tmp_path, chunks, embeddings)
+    chain = ReviewRAGChain(store, config, chat_model=StubChatModel(latency_seconds=0.0))
+
+    with monkeypatch.context() as patch:
+        patch.setattr(store, "similarity_search", lambda *args, **kwargs: [])
+        assert chain.retrieve_relevant_documents("parking") == []
+    assert chain._index.chunked is None
+    assert [document.metadata["review_id"] for document in chain.retrieve_relevant_documents("parking cost")][0] == "1"
+    assert chain._index.chunked is True
+
+
+def test_whole_review_index_skips_over_fetching(tmp_path):
+    embeddings = StubEmbeddings(dimension=128)
+    config = RAGChainConfig(chat_model="stub", api_key="", top_k=1)
+    store = _index(tmp_path, _documents(), embeddings)
+    chain = ReviewRAGChain(store, config, chat_model=StubChatModel(latency_seconds=0.0))
+
+    assert chain.retrieve_relevant_documents("surgeon recovery")[0].metadata["review_id"] == "3"
+    assert chain._index.chunked is False
+    assert chain.retrieve_relevant_documents("parking easy", unit="chunk")[0].metadata["review_id"] == "2"
+
+
+def test_stride_is_capped_at_the_window_so_no_sentence_is_skipped():
+    chunker = SentenceWindowChunker(window_sentences=1, stride_sentences=2)
+    chunks = chunker.split(_documents()[0])
+    assert chunker.stride_sentences == 1
+    assert [chunk.metadata["source"] for chunk in chunks] == [
+        "The nurses were kind.",
+        "Parking cost a fortune.",
+        "The parking garage was dark.",
+        "Discharge was quick.",
+        "Food was fine.",
+    ]
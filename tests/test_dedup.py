@@ -0,0 +1,69 @@
+"""Tests for MinHash/LSH near-duplicate removal."""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from src.dedup import NearDuplicateDetector, deduplicate_documents  # noqa: E402
+
+TEMPLATE = "The medical staff were attentive and the {} ward was clean, but the discharge process took far too long."
+
+
+def _documents(texts, hospitals=None):
+    pytest.importorskip("langchain_core")
+    from langchain_core.documents import Document
+
+    hospitals = hospitals or ["Mercy"] * len(texts)
+    return [
+        Document(page_content=f"review: {text}", metadata={"source": text, "review_id": i, "hospital_name": h})
+        for i, (text, h) in enumerate(zip(texts, hospitals))
+    ]
+
+
+def test_templated_reviews_cluster_together():
+    texts = [
+        TEMPLATE.format("cardiology"),
+        "Parking was expensive and hard to find on weekdays.",
+        TEMPLATE.format("cardiology") + " Overall fine.",
+        TEMPLATE.format("cardiology"),
+    ]
+    clusters = NearDuplicateDetector(threshold=0.7).cluster(texts)
+    assert clusters == [[0, 2, 3], [1]]
+
+
+def test_num_perm_must_split_into_bands():
+    with pytest.raises(ValueError):
+        NearDuplicateDetector(num_perm=100, bands=32)
+
+
+def test_deduplicate_keeps_representative_and_reports_savings():
+    texts = [TEMPLATE.format("cardiology")] * 3 + ["Parking was expensive and hard to find on weekdays."]
+    unique, report = deduplicate_documents(_documents(texts), NearDuplicateDetector(), batch_size=2)
+
+    assert [doc.metadata["review_id"] for doc in unique] == [0, 3]
+    assert unique[0].metadata["duplicate_review_ids"] == "1,2"
+    assert unique[0].metadata["duplicate_count"] == 2
+    assert "duplicate_count" not in unique[1].metadata
+    assert report.duplicates_removed == 2
+    assert report.duplicate_clusters == 1
+    assert report.embedding_calls_saved == 1
+
+
+def test_scope_key_only_merges_within_scope():
+    texts = [TEMPLATE.format("oncology")] * 3
+    documents = _documents(texts, hospitals=["Mercy", "General", "Mercy"])
+    unique, report = deduplicate_documents(documents, NearDuplicateDetector(), scope_key="hospital_name")
+
+    assert sorted(doc.metadata["review_id"] for doc in unique) == [0, 1]
+    assert report.duplicates_removed == 1
+
+
+def test_default_scope_keeps_hospitals_apart():
+    from src.config import DEDUP_SCOPE
+
+    texts, hospitals = [TEMPLATE.format("oncology")] * 2, ["Mercy", "General"]
+    unique, _ = deduplicate_documents(_documents(texts, hospitals), NearDuplicateDetector(), scope_key=DEDUP_SCOPE)
+    assert len(unique) == 2
+
+    merged, _ = deduplicate_documents(_documents(texts, hospitals), NearDuplicateDetector(), scope_key=None)
+    assert len(merged) == 1
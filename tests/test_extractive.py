@@ -0,0 +1,98 @@
+"""Tests for LLM-free extractive answers and the generation fallback."""
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document  # noqa: E402
+
+from src.extractive import ExtractiveAnswerer, split_sentences  # noqa: E402
+from src.rag_chain import EXTRACTIVE, FALLBACK_NOTICE, RAGChainConfig, ReviewRAGChain  # noqa: E402
+from src.resilience import ResilienceConfig  # noqa: E402
+from src.stubs import StubChatModel  # noqa: E402
+
+DOCUMENTS = [
+    Document(
+        page_content="",
+        metadata={
+            "source": "The food was cold. I was discharged quickly and the discharge papers were clear.",
+            "review_id": "7",
+            "hospital_name": "Mercy",
+        },
+    ),
+    Document(
+        page_content="",
+        metadata={
+            "source": "The discharge papers were clear! Parking was expensive.",
+            "review_id": "9",
+            "hospital_name": "General",
+        },
+    ),
+]
+
+
+class StubVectorStore:
+    def similarity_search(self, question, k):
+        return DOCUMENTS[:k]
+
+
+def test_split_sentences():
+    assert split_sentences("One. Two! Three?") == ["One.", "Two!", "Three?"]
+
+
+def test_ranks_relevant_sentences_first_and_drops_duplicates():
+    documents = DOCUMENTS + [Document(page_content="", metadata={"source": "The discharge papers were clear."})]
+    texts = [sentence.text for sentence in ExtractiveAnswerer().rank("What did patients say about discharge?", documents)]
+    assert all("discharge" in text for text in texts[:2])
+    assert {"The food was cold.", "Parking was expensive."} == set(texts[2:])
+    assert "The discharge papers were clear." not in texts
+
+
+def test_answer_groups_quotes_by_hospital():
+    answer = ExtractiveAnswerer(max_per_group=1).answer("discharge", DOCUMENTS)
+    assert "**Mercy**" in answer and "**General**" in answer
+    assert "(review 7)" in answer
+    assert answer.count('- "') == 2
+
+
+def test_no_documents():
+    assert ExtractiveAnswerer().answer("discharge", []) == "No relevant reviews were found for this question."
+
+
+def _chain(**model_settings):
+    config = RAGChainConfig(
+        chat_model="stub",
+        api_key="",
+        top_k=2,
+        resilience=ResilienceConfig(timeout_seconds=0.1, deadline_seconds=0.5, max_retries=0),
+    )
+    return ReviewRAGChain(StubVectorStore(), config, chat_model=StubChatModel(seed=0, **model_settings))
+
+
+def test_extractive_mode_skips_the_model():
+    chain = _chain(latency_seconds=0.0)
+    answer = chain.answer_question("discharge", mode=EXTRACTIVE)
+    assert answer.startswith("Here is what patients said")
+    assert chain.chat_model.calls == 0
+    with pytest.raises(ValueError):
+        chain.answer_question("discharge", mode="poetry")
+
+
+def test_falls_back_when_generation_misses_deadline_or_fails():
+    slow = _chain(latency_seconds=0.5)
+    assert slow.answer_question("discharge").startswith(FALLBACK_NOTICE)
+    assert slow.metrics()["extractive_fallbacks"] == 1
+
+    failing = _chain(latency_seconds=0.0, failure_probability=1.0)
+    assert "".join(failing.stream_answer("discharge")).startswith(FALLBACK_NOTICE)
+    assert failing.answer_in_session("s1", "discharge").startswith(FALLBACK_NOTICE)
+
+
+def test_concurrent_fallbacks_are_all_counted():
+    from concurrent.futures import ThreadPoolExecutor
+
+    failing = _chain(latency_seconds=0.0, failure_probability=1.0)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        answers = list(pool.map(lambda _: failing.answer_question("discharge"), range(40)))
+    assert all(answer.startswith(FALLBACK_NOTICE) for answer in answers)
+    assert failing.metrics()["extractive_fallbacks"] == 40
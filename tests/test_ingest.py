@@ -0,0 +1,178 @@
+"""Tests for near-real-time feed ingestion and the live delta index."""
+
+import json
+import os
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("langchain_core")
+
+from src.data_loader import ReviewDataLoader  # noqa: E402
+from src.delta import DeltaWriter, LiveIndex  # noqa: E402
+from src.ingest import DirectoryFeed, FileFeed, IngestWorker  # noqa: E402
+from src.snapshot import IndexSnapshot, write_snapshot  # noqa: E402
+from src.stubs import StubEmbeddings  # noqa: E402
+
+BASE_REVIEWS = [
+    (1, "Wallace-Hamilton", "The nurses were kind and attentive."),
+    (2, "Burke, Griffin and Cooper", "Discharge paperwork took hours."),
+]
+
+
+def _row(review_id, hospital, review):
+    return {"review_id": review_id, "hospital_name": hospital, "review": review}
+
+
+def _append(path, rows):
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.writelines(json.dumps(_row(*row)) + "\n" for row in rows)
+
+
+def _base_index(tmp_path, embeddings):
+    loader = ReviewDataLoader(tmp_path / "unused.csv", metadata_columns=("review_id", "hospital_name"))
+    documents = [loader.document_from_row(_row(*row), i) for i, row in enumerate(BASE_REVIEWS)]
+    texts = [document.page_content for document in documents]
+    ids, metadatas = [str(i) for i in range(len(texts))], [document.metadata for document in documents]
+    page = (ids, embeddings.embed_documents(texts), texts, metadatas)
+    directory = write_snapshot(tmp_path / "base", [page], count=len(texts), dimension=embeddings.dimension)
+    return IndexSnapshot(directory, embeddings)
+
+
+def _worker(feed, delta_directory, embeddings, **kwargs):
+    options = {"batch_size": 2, "max_batch_wait_seconds": 60.0, "min_interval_seconds": 0.0, "poll_seconds": 0.0}
+    return IngestWorker(
+        feed=feed,
+        delta=DeltaWriter(delta_directory),
+        embeddings=embeddings,
+        data_loader=ReviewDataLoader(delta_directory / "unused.csv", metadata_columns=("review_id", "hospital_name")),
+        **{**options, **kwargs},
+    )
+
+
+def test_file_feed_reads_complete_lines_and_csv_header(tmp_path):
+    feed_path = tmp_path / "feed.jsonl"
+    feed_path.write_text('{"review": "one"}\n{"review": "tw')
+    records, offset = FileFeed(feed_path).read(None, limit=10)
+    assert [record.row for record in records] == [{"review": "one"}]
+    assert FileFeed(feed_path).backlog(offset) == len('{"review": "tw')
+
+    with open(feed_path, "a") as handle:
+        handle.write('o"}\nnot json\n')
+    records, offset = FileFeed(feed_path).read(offset, limit=10)
+    assert [record.row for record in records] == [{"review": "two"}, None]
+
+    csv_path = tmp_path / "feed.csv"
+    csv_path.write_text("review_id,review\n7,Parking was easy\n8,Cold food\n")
+    records, offset = FileFeed(csv_path).read(None, limit=1)
+    assert records[0].row == {"review_id": "7", "review": "Parking was easy"}
+    records, _ = FileFeed(csv_path).read(offset, limit=10)
+    assert records[0].row == {"review_id": "8", "review": "Cold food"}
+
+    with pytest.raises(ValueError):
+        FileFeed(tmp_path / "other.jsonl").read(offset, limit=1)
+
+
+def test_directory_feed_continues_across_drop_files(tmp_path):
+    (tmp_path / "001.jsonl").write_text('{"review": "a"}\n{"review": "b"}')
+    (tmp_path / "002.csv").write_text("review\nc\n")
+    (tmp_path / "003.jsonl.tmp").write_text('{"review": "still being written"}\n')
+    feed = DirectoryFeed(tmp_path)
+
+    records, offset = feed.read(None, limit=2)
+    assert [record.row["review"] for record in records] == ["a", "b"]
+    records, offset = feed.read(offset, limit=10)
+    assert [record.row["review"] for record in records] == ["c"]
+    assert offset["file"] == "002.csv"
+    assert feed.backlog(offset) == 0
+    assert feed.read(offset, limit=10)[0] == []
+
+
+def test_lag_is_measured_from_feed_arrival(tmp_path):
+    embeddings = StubEmbeddings(dimension=64)
+    feed_path = tmp_path / "feed.jsonl"
+    stamped = {**_row(10, "Wallace-Hamilton", "Valet parking was quick."), "received_at": time.time() - 30}
+    feed_path.write_text(json.dumps(stamped) + "\n")
+    _append(feed_path, [(11, "Wallace-Hamilton", "The cafeteria food was cold.")])
+    appended_at = feed_path.stat().st_mtime
+    os.utime(feed_path, (appended_at - 10, appended_at - 10))
+
+    worker = _worker(FileFeed(feed_path), tmp_path / "delta", embeddings)
+    worker.run(until_idle=True)
+    lags = worker.metrics()["lag_seconds"]
+    assert lags["max"] >= 30 > lags["p50"] >= 10
+
+
+def test_worker_commits_batches_and_restart_does_not_re_embed(tmp_path):
+    embeddings = StubEmbeddings(dimension=64)
+    feed_path, delta_directory = tmp_path / "feed.jsonl", tmp_path / "delta"
+    rows = [
+        (10, "Wallace-Hamilton", "Valet parking was quick and cheap."),
+        (11, "Wallace-Hamilton", "The cafeteria food was cold."),
+        (12, "Burke, Griffin and Cooper", "Nobody explained my discharge medication."),
+    ]
+    _append(feed_path, rows)
+    live = LiveIndex(_base_index(tmp_path, embeddings), delta_directory, poll_seconds=0.0)
+    assert live.similarity_search("valet parking", k=1)[0].metadata["review_id"] == "1"
+
+    worker = _worker(FileFeed(feed_path), delta_directory, embeddings)
+    worker.run(until_idle=True)
+    metrics = worker.metrics()
+    assert (metrics["rows_committed"], metrics["batches"], metrics["backlog_bytes"]) == (3, 2, 0)
+    assert metrics["lag_seconds"]["max"] >= metrics["lag_seconds"]["p50"] >= 0
+    assert live.similarity_search("valet parking", k=1)[0].metadata["review_id"] == "10"
+    assert live.delta_metrics()["documents"] == 3
+
+    calls = embeddings.calls
+    restarted = _worker(FileFeed(feed_path), delta_directory, embeddings)
+    restarted.run(until_idle=True)
+    assert embeddings.calls == calls
+    _append(feed_path, [(13, "Wallace-Hamilton", "Chapel volunteers were lovely.")])
+    restarted.run(until_idle=True)
+    assert embeddings.calls == calls + 1
+    assert restarted.delta.state["rows"] == 4
+
+
+def test_newer_records_replace_older_ones_and_compaction_keeps_them(tmp_path):
+    embeddings = StubEmbeddings(dimension=64)
+    feed_path, delta_directory = tmp_path / "feed.jsonl", tmp_path / "delta"
+    rows = [
+        (1, "Wallace-Hamilton", "The nurses were kind but the wait was long."),
+        (20, "Wallace-Hamilton", "Clean rooms."),
+        (20, "Wallace-Hamilton", "Clean rooms and quiet nights."),
+    ]
+    _append(feed_path, rows)
+    live = LiveIndex(_base_index(tmp_path, embeddings), delta_directory, poll_seconds=0.0)
+
+    worker = _worker(FileFeed(feed_path), delta_directory, embeddings, batch_size=1, max_segments=2)
+    worker.run(until_idle=True)
+    assert worker.stats.compactions == 1
+    assert len(worker.delta.segments) == 1
+
+    texts = [document.metadata["source"] for document in live.similarity_search("nurses kind clean rooms", k=4)]
+    assert "The nurses were kind and attentive." not in texts
+    assert texts.count("Clean rooms and quiet nights.") == 1
+    assert "Clean rooms." not in texts
+    assert sorted(path.name for path in delta_directory.iterdir() if path.is_dir()) == worker.delta.segments
+
+
+def test_compaction_keeps_every_chunk_of_the_newest_version(tmp_path):
+    from src.chunking import SentenceWindowChunker
+
+    embeddings = StubEmbeddings(dimension=64)
+    feed_path, delta_directory = tmp_path / "feed.jsonl", tmp_path / "delta"
+    rows = [
+        (30, "Wallace-Hamilton", "Old one. Old two. Old three. Old four."),
+        (30, "Wallace-Hamilton", "New one. New two. New three."),
+        (31, "Wallace-Hamilton", "Only one. Only two."),
+    ]
+    _append(feed_path, rows)
+    chunker = SentenceWindowChunker(window_sentences=1, stride_sentences=1)
+    worker = _worker(FileFeed(feed_path), delta_directory, embeddings, batch_size=1, max_segments=2, chunker=chunker)
+    worker.run(until_idle=True)
+    worker.delta.compact()
+
+    segment = IndexSnapshot(delta_directory / worker.delta.segments[0], embedding_function=None)
+    kept = sorted(segment.get_document(row).metadata["source"] for row in range(len(segment)))
+    assert kept == ["New one.", "New three.", "New two.", "Only one.", "Only two."]
@@ -0,0 +1,32 @@
+"""Tests that entry points keep heavy dependencies off the import path."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = [
+    "gradio",
+    "fastapi",
+    "uvicorn",
+    "langchain",
+    "langchain_core",
+    "langchain_chroma",
+    "langchain_google_genai",
+    "chromadb",
+    "pandas",
+    "numpy",
+]
+
+
+def test_entry_points_do_not_import_heavy_dependencies():
+    code = (
+        "import sys\n"
+        "import src, src.data_loader, src.embeddings, src.evaluation, src.rag_chain, src.vectorstore\n"
+        "import app, build_vectorstore, check_data, demo, evaluate, ingest_feed, serve\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
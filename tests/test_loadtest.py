@@ -0,0 +1,97 @@
+"""Tests for the load-testing harness."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.loadtest import LevelResult, LoadGenerator, find_saturation, http_target, load_questions
+from src.utils import percentile
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) == 0.0
+
+
+def test_closed_loop_counts_requests_and_errors():
+    def target(question):
+        if question == "bad":
+            raise TimeoutError("slow provider")
+
+    result = LoadGenerator(target, ["good", "bad"]).run_closed(concurrency=3, requests=10)
+    assert result.requests == 10
+    assert result.errors == 5
+    assert result.errors_by_type == {"TimeoutError": 5}
+    assert result.error_rate == 0.5
+
+
+def test_open_loop_issues_poisson_arrivals():
+    calls = []
+    result = LoadGenerator(calls.append, ["q"]).run_open(rate=200, duration_seconds=0.2)
+    assert result.requests == len(calls) > 10
+    assert result.rate == 200
+
+
+def _level(label, rps, p99, error_rate=0.0):
+    return LevelResult(label, None, None, 100, 0, 1.0, rps, error_rate, 1.0, 1.0, p99, p99)
+
+
+def test_find_saturation():
+    results = [_level("c=1", 10, 100), _level("c=2", 19, 110), _level("c=4", 20, 300), _level("c=8", 20, 900)]
+    saturation = find_saturation(results, slo_p99_ms=500)
+    assert saturation == {"last_healthy": "c=4", "saturated_at": "c=4", "peak_throughput_rps": 20}
+
+
+def test_load_questions_formats(tmp_path):
+    (tmp_path / "q.txt").write_text("first\n\nsecond\n")
+    (tmp_path / "q.jsonl").write_text(json.dumps({"question": "logged"}) + "\n")
+    (tmp_path / "q.csv").write_text("question,hits\nfrom csv,3\n")
+    assert load_questions(tmp_path / "q.txt") == ["first", "second"]
+    assert load_questions(tmp_path / "q.jsonl") == ["logged"]
+    assert load_questions(tmp_path / "q.csv") == ["from csv"]
+
+
+def test_http_target_reports_status_errors():
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            status = 503 if body["question"] == "outage" else 200
+            payload = json.dumps({"answer": body["question"], "mode": body.get("mode")}).encode()
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        target = http_target(f"http://127.0.0.1:{server.server_port}", "answer", mode="extractive")
+        assert json.loads(target("q")) == {"answer": "q", "mode": "extractive"}
+        result = LoadGenerator(target, ["q", "outage"]).run_closed(concurrency=2, requests=6)
+        assert result.errors_by_type == {"HTTP 503": 3}
+    finally:
+        server.shutdown()
+
+
+def test_offline_chain_runs_without_network(tmp_path):
+    pytest.importorskip("langchain_core")
+    pytest.importorskip("numpy")
+    from src.config import REVIEWS_CSV_PATH
+    from src.loadtest import build_offline_chain, chain_target
+
+    chain = build_offline_chain(REVIEWS_CSV_PATH, chat_latency_seconds=0.0, limit=50, workdir=tmp_path)
+    result = LoadGenerator(chain_target(chain), ["What about the discharge process?"]).run_closed(2, requests=4)
+    assert result.requests == 4 and result.errors == 0
+    assert chain.metrics()["chat"]["successes"] == 4
+
+    chain.chat_model.failure_probability, chain.chat_model.failure_code = 1.0, 400
+    result = LoadGenerator(chain_target(chain), ["What about the discharge process?"]).run_closed(2, requests=4)
+    assert result.errors_by_type == {"ExtractiveFallbackError": 4}
+    assert chain.metrics()["extractive_fallbacks"] == 4
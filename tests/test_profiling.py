@@ -0,0 +1,68 @@
+"""Tests for sampled profiling of requests and ingestion batches."""
+
+import contextlib
+import time
+import tracemalloc
+
+import pytest
+
+from src.profiling import Profiler
+
+
+def _busy_work():
+    data = [str(i) * 10 for i in range(20000)]
+    time.sleep(0.02)
+    return len(data)
+
+
+def test_disabled_profiler_is_a_no_op(tmp_path):
+    for profiler in (Profiler.disabled(), Profiler(output_directory=tmp_path, sample_rate=0.0)):
+        section = profiler.profile("request")
+        assert isinstance(section, contextlib.nullcontext)
+        with section:
+            _busy_work()
+        assert profiler.profiled == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_enabled_profiler_requires_output_directory():
+    with pytest.raises(ValueError):
+        Profiler()
+
+
+def test_profiled_section_writes_artifacts(tmp_path):
+    profiler = Profiler(output_directory=tmp_path, interval_ms=1.0)
+    with profiler.profile("answer question"):
+        _busy_work()
+
+    assert profiler.profiled == 1
+    suffixes = sorted(path.name.split("answer_question", 1)[1] for path in tmp_path.iterdir())
+    assert suffixes == [".folded", ".memory.txt", ".prof"]
+    folded = next(tmp_path.glob("*.folded")).read_text()
+    assert "_busy_work" in folded
+    memory = next(tmp_path.glob("*.memory.txt")).read_text()
+    assert memory.startswith("section: answer question")
+    assert not tracemalloc.is_tracing()
+
+
+def test_failing_section_releases_profiler(tmp_path):
+    profiler = Profiler(output_directory=tmp_path, interval_ms=1.0)
+    with pytest.raises(RuntimeError):
+        with profiler.profile("boom"):
+            raise RuntimeError("boom")
+    assert not tracemalloc.is_tracing()
+
+    with profiler.profile("after"):
+        _busy_work()
+    assert profiler.profiled == 1
+    assert profiler.skipped_busy == 0
+
+
+def test_nested_sections_are_not_profiled_twice(tmp_path):
+    profiler = Profiler(output_directory=tmp_path, memory=False, interval_ms=1.0)
+    with profiler.profile("outer"):
+        with profiler.profile("inner"):
+            _busy_work()
+    assert profiler.profiled == 1
+    assert profiler.skipped_busy == 1
+    assert not list(tmp_path.glob("*.memory.txt"))
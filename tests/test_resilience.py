@@ -0,0 +1,186 @@
+"""Tests for model-call deadlines, retries, hedging and circuit breaking."""
+
+import threading
+import time
+
+import pytest
+
+from src.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceededError,
+    ResilienceConfig,
+    ResilientCaller,
+    is_retryable,
+)
+
+
+class FlakyCall:
+    """Fails with the given errors first, then returns "ok"."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def _caller(**overrides):
+    settings = dict(timeout_seconds=1.0, deadline_seconds=None, backoff_base_seconds=0.0, max_concurrency=4)
+    settings.update(overrides)
+    return ResilientCaller(ResilienceConfig(**settings))
+
+
+def test_retries_transient_errors():
+    caller = _caller(max_retries=2)
+    call = FlakyCall(ConnectionError("reset"), TimeoutError("slow"))
+    assert caller.call(call) == "ok"
+    assert call.calls == 3
+    assert caller.metrics["retries"] == 2
+
+
+def test_does_not_retry_request_errors():
+    caller = _caller(max_retries=2)
+    call = FlakyCall(ValueError("bad prompt"))
+    with pytest.raises(ValueError):
+        caller.call(call)
+    assert call.calls == 1
+    assert caller.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_is_retryable_by_status_code():
+    error = RuntimeError("throttled")
+    error.code = 429
+    assert is_retryable(error)
+    assert not is_retryable(CircuitOpenError("open"))
+
+
+def test_attempt_deadline():
+    caller = _caller(timeout_seconds=0.05, max_retries=0)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        caller.call(time.sleep, 1.0)
+    assert time.monotonic() - started < 0.5
+    assert caller.metrics["timeouts"] == 1
+
+
+def test_hedged_request_wins_over_slow_primary():
+    calls = []
+    lock = threading.Lock()
+
+    def first_call_is_slow():
+        with lock:
+            calls.append(None)
+            slow = len(calls) == 1
+        time.sleep(1.0 if slow else 0.01)
+        return "slow" if slow else "fast"
+
+    caller = _caller(hedge=True, hedge_min_samples=0, hedge_min_delay_seconds=0.05, max_retries=0)
+    started = time.monotonic()
+    assert caller.call(first_call_is_slow) == "fast"
+    assert time.monotonic() - started < 0.5
+    assert caller.metrics["hedges_fired"] == 1
+    assert caller.metrics["hedge_wins"] == 1
+
+
+def _slow_stream(first_delay, then_delay):
+    time.sleep(first_delay)
+    yield "first"
+    time.sleep(then_delay)
+    yield "second"
+
+
+def test_stream_first_chunk_is_bounded_and_retried():
+    config = ResilienceConfig(timeout_seconds=0.05, deadline_seconds=1.0, max_retries=1, backoff_base_seconds=0)
+    caller = ResilientCaller(config)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        list(caller.stream(_slow_stream, 0.3, 0.0))
+    assert time.monotonic() - started < 0.3
+    assert caller.metrics["attempts"] == 2 and caller.metrics["timeouts"] == 2
+
+    assert list(caller.stream(_slow_stream, 0.0, 0.0)) == ["first", "second"]
+    assert caller.metrics["successes"] == 1
+
+
+def test_stream_idle_timeout_and_deadline_after_first_chunk():
+    caller = ResilientCaller(ResilienceConfig(timeout_seconds=0.05, deadline_seconds=1.0, max_retries=1))
+    chunks = []
+    with pytest.raises(DeadlineExceededError, match="no chunk"):
+        for chunk in caller.stream(_slow_stream, 0.0, 0.3):
+            chunks.append(chunk)
+    assert chunks == ["first"]
+    assert caller.metrics["attempts"] == 1
+
+    caller = ResilientCaller(ResilienceConfig(timeout_seconds=None, deadline_seconds=0.1))
+    with pytest.raises(DeadlineExceededError, match="deadline"):
+        list(caller.stream(_slow_stream, 0.0, 0.3))
+
+
+def test_circuit_opens_fails_fast_and_recovers():
+    caller = _caller(max_retries=0, breaker_failure_threshold=2, breaker_reset_seconds=0.05)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            caller.call(FlakyCall(ConnectionError("down")))
+    assert caller.breaker.state == CircuitBreaker.OPEN
+
+    healthy = FlakyCall()
+    with pytest.raises(CircuitOpenError):
+        caller.call(healthy)
+    assert healthy.calls == 0
+    assert caller.metrics["short_circuited"] == 1
+
+    time.sleep(0.06)
+    assert caller.call(healthy) == "ok"
+    assert caller.breaker.state == CircuitBreaker.CLOSED
+
+
+class StubVectorStore:
+    def similarity_search(self, question, k):
+        from langchain_core.documents import Document
+
+        return [Document(page_content="review: The discharge process was quick.", metadata={"row": 0})]
+
+
+def _stub_chain(**model_settings):
+    pytest.importorskip("langchain_core")
+    from src.rag_chain import RAGChainConfig, ReviewRAGChain
+    from src.stubs import StubChatModel
+
+    config = RAGChainConfig(
+        chat_model="stub",
+        api_key="",
+        top_k=1,
+        resilience=ResilienceConfig(timeout_seconds=0.2, deadline_seconds=1.0, max_retries=1, backoff_base_seconds=0),
+        extractive_fallback=False,
+    )
+    return ReviewRAGChain(StubVectorStore(), config, chat_model=StubChatModel(seed=0, **model_settings))
+
+
+def test_chain_answers_with_stub_model():
+    chain = _stub_chain(latency_seconds=0.0)
+    assert chain.answer_question("How was discharge?").startswith("Stub answer")
+    assert "".join(chain.stream_answer("How was discharge?")).startswith("Stub answer")
+    assert chain.metrics()["chat"]["successes"] == 2
+
+
+def test_chain_enforces_deadline_against_slow_stub():
+    chain = _stub_chain(latency_seconds=1.0)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        chain.answer_question("How was discharge?")
+    assert time.monotonic() - started < 1.0
+    assert chain.metrics()["chat"]["attempts"] == 2
+
+
+def test_chain_stream_enforces_deadline_against_slow_stub():
+    chain = _stub_chain(latency_seconds=1.0)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        list(chain.stream_answer("How was discharge?"))
+    assert time.monotonic() - started < 1.0
+    assert chain.metrics()["chat"]["attempts"] == 2
@@ -0,0 +1,62 @@
+"""Tests for bounded conversation sessions."""
+
+import pytest
+
+from src.sessions import SessionStore, topic_overlap
+
+
+def test_store_evicts_least_recently_used():
+    store = SessionStore(max_sessions=2)
+    store.get("a")
+    store.get("b")
+    store.get("a")
+    store.get("c")
+    assert len(store) == 2
+    assert "b" not in store._sessions
+
+
+def test_store_expires_idle_sessions(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("src.sessions.time.monotonic", lambda: clock[0])
+    store = SessionStore(ttl_seconds=10)
+    store.get("a").record("q", "a", "q", None, [])
+    clock[0] += 11
+    assert not store.get("a").turns
+
+
+def test_history_seeding_and_turn_limit():
+    store = SessionStore(max_turns=2)
+    state = store.get("a", history=[("q1", "a1"), ("q2", "a2"), ("q3", "a3")])
+    assert [turn.question for turn in state.turns] == ["q2", "q3"]
+
+
+def test_topic_overlap():
+    assert topic_overlap("What about the discharge process?", "How was the discharge process?") == 1.0
+    assert topic_overlap("parking fees", "nurse attitude") == 0.0
+
+
+def test_follow_up_reuses_documents_on_same_topic():
+    pytest.importorskip("langchain_core")
+    from langchain_core.documents import Document
+    from langchain_core.runnables import RunnableLambda
+
+    from src.rag_chain import RAGChainConfig, ReviewRAGChain
+
+    class Store:
+        searches = 0
+
+        def similarity_search(self, question, k):
+            Store.searches += 1
+            return [Document(page_content=question)]
+
+    chain = ReviewRAGChain(Store(), RAGChainConfig(chat_model="gemini-2.5-flash", api_key="test", top_k=2))
+    chain.generation_chain = RunnableLambda(lambda inputs: f"answer: {inputs['question']}")
+    condensed = iter(["What did patients say about the discharge process?", "How was hospital parking?"])
+    chain.condense_chain = RunnableLambda(lambda inputs: next(condensed))
+
+    chain.answer_in_session("s1", "What did patients say about the discharge process?")
+    chain.answer_in_session("s1", "and what else about it?")
+    assert Store.searches == 1
+
+    assert chain.answer_in_session("s1", "parking?") == "answer: How was hospital parking?"
+    assert Store.searches == 2
@@ -0,0 +1,137 @@
+"""Tests for sharded index search and merging."""
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("langchain_chroma")
+
+from langchain_chroma import Chroma  # noqa: E402
+from langchain_core.documents import Document  # noqa: E402
+from langchain_core.embeddings import DeterministicFakeEmbedding  # noqa: E402
+
+from src.data_loader import ReviewDataLoader  # noqa: E402
+from src.rag_chain import UnknownHospitalError  # noqa: E402
+from src.sharding import ShardedIndexBuilder, ShardedVectorStore, ShardSpec, merge_shards  # noqa: E402
+
+
+@pytest.fixture
+def embedder():
+    return DeterministicFakeEmbedding(size=16)
+
+
+def _store(tmp_path, name, texts, embedder):
+    documents = [Document(page_content=text, metadata={"shard": name}) for text in texts]
+    return Chroma.from_documents(documents, embedder, persist_directory=str(tmp_path / name))
+
+
+def test_sharded_search_merges_top_k_across_shards(tmp_path, embedder):
+    shards = {
+        "a": _store(tmp_path, "a", ["quick discharge", "rude staff"], embedder),
+        "b": _store(tmp_path, "b", ["clean rooms", "long wait"], embedder),
+    }
+    store = ShardedVectorStore(shards, embedder)
+
+    results = store.similarity_search_with_score("clean rooms", k=3)
+    assert len(results) == 3
+    assert results[0][0].page_content == "clean rooms"
+    assert results[0][1] == pytest.approx(1.0, abs=1e-4)
+
+    only_a = store.similarity_search("clean rooms", k=5, shard_names=["a"])
+    assert {doc.metadata["shard"] for doc in only_a} == {"a"}
+
+
+def test_merge_shards_copies_embeddings(tmp_path, embedder):
+    shards = [_store(tmp_path, "a", ["one", "two"], embedder), _store(tmp_path, "b", ["three"], embedder)]
+    target = Chroma(persist_directory=str(tmp_path / "merged"), embedding_function=embedder)
+
+    assert merge_shards(shards, target, page_size=1) == 3
+    assert target.similarity_search("three", k=1)[0].page_content == "three"
+
+
+def test_partition_review_ids_covers_every_row(tmp_path):
+    csv_path = tmp_path / "reviews.csv"
+    rows = "\n".join(f"{i},review {i}" for i in (5, 1, 9, 3, 7, 2))
+    csv_path.write_text(f"review_id,review\n{rows}\n")
+    loader = ReviewDataLoader(csv_path=csv_path)
+
+    ranges = loader.partition_review_ids(3)
+    assert ranges == [(1, 3), (3, 7), (7, 10)]
+    assert sum(1 for r in ranges for _ in loader.iter_reviews(review_id_range=r)) == 6
+    middle = list(loader.iter_reviews(review_id_range=ranges[1]))
+    assert [document.metadata["row"] for document in middle] == [0, 3]
+    assert middle[0].page_content == "review_id: 5\nreview: review 5"
+
+
+def test_sharded_dedup_finds_duplicates_across_shards(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    template = "The medical staff were attentive and the ward was clean, but the discharge took far too long."
+    reviews = [
+        (1, template, "Mercy"),
+        (2, "Parking was expensive and hard to find on weekdays.", "Mercy"),
+        (3, template, "General"),
+        (4, template, "Mercy"),
+        (5, template, "Mercy"),
+    ]
+    csv_path = tmp_path / "reviews.csv"
+    rows = "\n".join(f'{i},"{text}",{hospital}' for i, text, hospital in reviews)
+    csv_path.write_text(f"review_id,review,hospital_name\n{rows}\n")
+    builder = ShardedIndexBuilder(csv_path, tmp_path / "index", "model", "key", num_shards=2, dedup=True)
+    (tmp_path / "index").mkdir()
+    specs = [ShardSpec(name="shard_000", start=1, end=3), ShardSpec(name="shard_001", start=3, end=6)]
+
+    with ThreadPoolExecutor() as executor:
+        plans = builder._plan_deduplication(executor, specs)
+
+    # Row 0 in the first shard represents rows 3 and 4 of the second; General's copy stays in its own scope.
+    assert plans[0] == (set(), {0: ["4", "5"]})
+    assert plans[1] == ({3, 4}, {})
+    assert builder.dedup_report.duplicates_removed == 2
+    assert not (tmp_path / "index" / "_signatures").exists()
+
+
+def test_partitioned_store_routes_by_hospital(tmp_path, embedder):
+    from src.embeddings import BatchEmbeddingProcessor
+    from src.rag_chain import RAGChainConfig, ReviewRAGChain
+    from src.vectorstore import VectorStoreManager
+
+    documents = [
+        Document(page_content=f"review {i}", metadata={"hospital_name": hospital})
+        for i, hospital in enumerate(["Wallace-Hamilton", "Burke, Griffin and Cooper", "Wallace-Hamilton"])
+    ]
+    manager = VectorStoreManager(
+        persist_directory=tmp_path / "index",
+        embedding_model="fake",
+        api_key="test",
+        embedding_function=embedder,
+    )
+    store = manager.create_partitioned_vector_store(
+        documents,
+        partition_key="hospital_name",
+        batch_processor=BatchEmbeddingProcessor(batch_size=10, wait_time=0),
+    )
+    assert store.partition_values == ["Burke, Griffin and Cooper", "Wallace-Hamilton"]
+
+    chain = ReviewRAGChain(store, RAGChainConfig(chat_model="gemini-2.5-flash", api_key="test", top_k=5))
+    assert chain.route_question("How was parking at wallace-hamilton?") == store.shards_for_values(["Wallace-Hamilton"])
+    assert chain.route_question("Any complaints about parking?") is None
+
+    routed = chain.retrieve_relevant_documents("Any complaints?", hospital="Wallace-Hamilton")
+    assert {doc.metadata["hospital_name"] for doc in routed} == {"Wallace-Hamilton"}
+    assert len(chain.retrieve_relevant_documents("Any complaints?")) == 3
+
+    with pytest.raises(UnknownHospitalError):
+        chain.retrieve_relevant_documents("Any complaints?", hospital="Wallace-Hamiltn")
+
+
+def test_unpartitioned_store_filters_by_selected_hospital(tmp_path, embedder):
+    from src.rag_chain import RAGChainConfig, ReviewRAGChain
+
+    hospitals = ["Wallace-Hamilton"] * 8 + ["Burke, Griffin and Cooper"]
+    documents = [Document(page_content=f"review {i}", metadata={"hospital_name": h}) for i, h in enumerate(hospitals)]
+    store = Chroma.from_documents(documents, embedder, persist_directory=str(tmp_path / "flat"))
+    chain = ReviewRAGChain(store, RAGChainConfig(chat_model="gemini-2.5-flash", api_key="test", top_k=2))
+
+    routed = chain.retrieve_relevant_documents("Any complaints?", hospital="burke, griffin and cooper")
+    assert [doc.metadata["hospital_name"] for doc in routed] == ["Burke, Griffin and Cooper"]
+    assert chain.retrieve_relevant_documents("Any complaints?", hospital="Nowhere General") == []
@@ -0,0 +1,42 @@
+"""Tests for memory-mapped index snapshots."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("langchain_core")
+
+from langchain_core.embeddings import DeterministicFakeEmbedding  # noqa: E402
+
+from src.snapshot import IndexSnapshot, write_snapshot  # noqa: E402
+
+
+def _write(tmp_path, texts):
+    embedder = DeterministicFakeEmbedding(size=16)
+    vectors = embedder.embed_documents(texts)
+    ids = [str(i) for i in range(len(texts))]
+    metadatas = [{"row": i} for i in range(len(texts))]
+    pages = [(ids[:2], vectors[:2], texts[:2], metadatas[:2]), (ids[2:], vectors[2:], texts[2:], metadatas[2:])]
+    directory = write_snapshot(tmp_path / "snapshot", pages, count=len(texts), dimension=16)
+    return IndexSnapshot(directory, embedder)
+
+
+def test_snapshot_round_trip_and_search(tmp_path):
+    texts = ["discharge was smooth", "parking was terrible", "nurses were kind", "food was cold"]
+    snapshot = _write(tmp_path, texts)
+
+    assert len(snapshot) == 4
+    assert snapshot.get_document(2).page_content == "nurses were kind"
+    assert snapshot.get_document(2).metadata == {"row": 2}
+
+    results = snapshot.similarity_search_with_score("parking was terrible", k=2)
+    assert results[0][0].page_content == "parking was terrible"
+    assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+    assert results[0][1] >= results[1][1]
+
+
+def test_snapshot_republish_replaces_previous(tmp_path):
+    _write(tmp_path, ["a", "b", "c"])
+    snapshot = _write(tmp_path, ["x", "y", "z", "w"])
+
+    assert len(snapshot) == 4
+    assert [p.name for p in tmp_path.iterdir()] == ["snapshot"]
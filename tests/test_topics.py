@@ -0,0 +1,129 @@
+"""Tests for precomputed topic clusters and aggregate answers."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.topics import TopicIndex, build_topic_index, is_aggregate_question, spherical_kmeans  # noqa: E402
+
+PARKING = [
+    "The parking lot was full and parking fees were outrageous.",
+    "Parking was impossible, the garage lot had no spaces.",
+    "Paid a fortune for parking in a dark lot.",
+    "No parking spaces near the entrance, the lot was packed.",
+]
+FOOD = [
+    "The food was cold and the meals arrived late.",
+    "Hospital food was bland, cold meals every day.",
+    "Meals were inedible and the food cart was always late.",
+    "Cold food again, the meals had no taste.",
+]
+
+
+def _reviews():
+    texts = PARKING + FOOD
+    hospitals = ["Wallace-Hamilton", "Burke, Griffin and Cooper"] * 4
+    metadatas = [{"review_id": i, "hospital_name": hospital} for i, hospital in enumerate(hospitals)]
+    return texts, metadatas
+
+
+def _embeddings():
+    pytest.importorskip("langchain_core")
+    from src.stubs import StubEmbeddings
+
+    return StubEmbeddings(dimension=64)
+
+
+def test_aggregate_question_detection():
+    assert is_aggregate_question("What are common complaints about the facilities?")
+    assert is_aggregate_question("How many patients mentioned parking?")
+    assert is_aggregate_question("What is the overall sentiment at Wallace-Hamilton?")
+    assert not is_aggregate_question("Did anyone mention Dr. Smith?")
+    assert not is_aggregate_question("What did patients say about the main entrance?")
+    assert not is_aggregate_question("Is the top floor of Wallace-Hamilton noisy?")
+    assert not is_aggregate_question("Which hospital has the most parking complaints?")
+
+
+def test_spherical_kmeans_separates_blobs():
+    rng = np.random.default_rng(0)
+    centers = np.eye(3, 8, dtype=np.float32)
+    vectors = np.concatenate([center + 0.05 * rng.standard_normal((50, 8)) for center in centers])
+
+    centroids, labels, similarities = spherical_kmeans(vectors, 3, seed=1)
+    assert centroids.shape == (3, 8)
+    assert np.allclose(np.linalg.norm(centroids, axis=1), 1.0, atol=1e-5)
+    assert [len(set(labels[i * 50 : (i + 1) * 50])) for i in range(3)] == [1, 1, 1]
+    assert len(set(labels)) == 3
+    assert similarities.min() > 0.8
+
+
+def test_topics_label_count_and_round_trip(tmp_path):
+    embeddings = _embeddings()
+    texts, metadatas = _reviews()
+    topics = build_topic_index(np.asarray(embeddings.embed_documents(texts)), texts, metadatas, clusters=2)
+
+    parking = next(topic for topic in topics.topics if "parking" in topic.terms)
+    assert parking.size == 4
+    assert parking.group_counts == {"Wallace-Hamilton": 2, "Burke, Griffin and Cooper": 2}
+    assert len(parking.representatives) == 3
+    assert topics.group_totals == {"Wallace-Hamilton": 4, "Burke, Griffin and Cooper": 4}
+
+    loaded = TopicIndex.load(topics.save(tmp_path))
+    (best, score), _ = loaded.match(embeddings.embed_query("common parking lot problems"), n=2)
+    assert best.label == parking.label
+    assert score > 0
+    assert loaded.group_named_in("What do people say at wallace-hamilton?") == "Wallace-Hamilton"
+
+    summary = loaded.summary_documents([(best, score)], group="Wallace-Hamilton")[0].page_content
+    assert "2 of 4 reviews at Wallace-Hamilton (50%)" in summary
+    assert loaded.describe([]).startswith("No relevant reviews")
+
+
+def test_review_split_across_topics_is_counted_once_in_the_total(tmp_path):
+    texts = PARKING + FOOD + [PARKING[0], FOOD[0]]
+    metadatas = [{"review_id": i} for i in range(8)] + [{"parent_id": "100"}] * 2
+    vectors = np.eye(2, 8, dtype=np.float32)[[0, 0, 0, 0, 1, 1, 1, 1, 0, 1]]
+    topics = build_topic_index(vectors, texts, metadatas, clusters=2)
+
+    assert sum(topic.size for topic in topics.topics) == 10
+    assert topics.documents == 9
+    assert TopicIndex.load(topics.save(tmp_path)).documents == 9
+
+
+class NoRetrievalStore:
+    """Vector store that fails the test if a nearest-neighbour search is made."""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.searches = 0
+
+    def similarity_search(self, query, k=4):
+        self.searches += 1
+        return []
+
+
+def test_chain_answers_aggregate_questions_from_topics():
+    embeddings = _embeddings()
+    from src.rag_chain import RAGChainConfig, ReviewRAGChain
+    from src.stubs import StubChatModel
+
+    texts, metadatas = _reviews()
+    topics = build_topic_index(np.asarray(embeddings.embed_documents(texts)), texts, metadatas, clusters=2)
+    store = NoRetrievalStore(embeddings)
+    config = RAGChainConfig(chat_model="stub", api_key="", top_k=2, topic_matches=1, topic_min_similarity=0.0)
+    chain = ReviewRAGChain(store, config, chat_model=StubChatModel(latency_seconds=0.0), topics=topics)
+
+    answer = chain.answer_question("What are the most common complaints about parking?", mode="extractive")
+    assert "**" + next(topic.label for topic in topics.topics if "parking" in topic.terms) + "**" in answer
+    assert "4 reviews (50%)" in answer
+    assert chain.answer_question("What are recurring themes about meals?").startswith("Stub answer")
+    assert store.searches == 0
+    assert chain.metrics()["topic_answers"] == 2
+
+    chain.answer_question("Did anyone mention the chapel?", mode="extractive")
+    assert store.searches == 1
+
+    chain.config.topic_min_similarity = 0.99
+    chain.answer_question("What are common complaints about the chapel?", mode="extractive")
+    assert store.searches == 2
+    assert chain.metrics()["topic_answers"] == 2
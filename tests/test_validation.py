@@ -0,0 +1,74 @@
+"""Tests for the streaming reviews CSV validator."""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from src.validation import DataValidator  # noqa: E402
+
+HEADER = b"review_id,review,hospital_name\n"
+
+
+def _write(tmp_path, body: bytes):
+    path = tmp_path / "reviews.csv"
+    path.write_bytes(HEADER + body)
+    return path
+
+
+def test_clean_file_passes_with_stats(tmp_path):
+    path = _write(tmp_path, b'1,"Friendly nurses and a clean ward.",Mercy\n2,Long wait.,General\n')
+    report = DataValidator(required_columns=("hospital_name",), batch_size=1).validate(path)
+
+    assert report.ok
+    assert report.rows == 2
+    assert report.column_stats["review"] == {"non_null": 2, "missing": 0}
+    assert report.review_length["max"] == len("Friendly nurses and a clean ward.")
+    assert sum(bucket["count"] for bucket in report.review_length["histogram"]) == 2
+    assert report.estimated_tokens > 0
+    assert report.estimated_embedding_calls == 2
+
+
+def test_reports_ingestion_breaking_rows(tmp_path):
+    body = (
+        b"1,Good care.,Mercy\n"
+        b"2,,Mercy\n"
+        b"1,Duplicate id across chunks.,Mercy\n"
+        b",Missing id.,Mercy\n"
+        b"3,Too many,fields,here\n"
+        b"4,Caf\xe9 was closed.,Mercy\n"
+        b"5," + b"word " * 200 + b",Mercy\n"
+    )
+    report = DataValidator(max_input_tokens=100, chunk_rows=2).validate(_write(tmp_path, body))
+
+    assert not report.ok
+    assert report.issues["empty_reviews"] == 1
+    assert report.issues["duplicate_ids"] == 1
+    assert report.examples["duplicate_ids"] == ["1"]
+    assert report.issues["missing_ids"] == 1
+    assert report.issues["malformed_rows"] == 1
+    assert report.issues["encoding_errors"] == 1
+    assert report.issues["oversized_reviews"] == 1
+    assert report.examples["empty_reviews"] == [3]
+
+
+def test_duplicate_ids_are_found_across_many_chunks(tmp_path):
+    ids = list(range(80)) + list(range(0, 40, 2))
+    path = _write(tmp_path, b"".join(f"{i},Fine stay.,Mercy\n".encode() for i in ids))
+    report = DataValidator(chunk_rows=7).validate(path)
+    assert report.issues["duplicate_ids"] == 20
+    assert report.examples["duplicate_ids"] == [str(i) for i in range(0, 20, 2)]
+
+
+def test_missing_required_columns_stop_validation(tmp_path):
+    path = tmp_path / "reviews.csv"
+    path.write_text("id,text\n1,hello\n")
+    report = DataValidator().validate(path)
+
+    assert report.issues["missing_columns"] == ["review_id", "review"]
+    assert report.rows == 0
+    assert not report.ok
+
+
+def test_missing_file_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        DataValidator().validate(tmp_path / "absent.csv")
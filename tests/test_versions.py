@@ -0,0 +1,142 @@
+"""Tests for versioned index directories and hot swapping the serving index."""
+
+import threading
+import time
+
+import pytest
+
+from src.versions import IndexVersions, IndexWatcher
+
+
+def _publish(versions, marker):
+    with versions.build() as directory:
+        (directory / "marker.txt").write_text(marker)
+    return directory.name
+
+
+def test_build_publishes_and_failed_build_keeps_current(tmp_path):
+    versions = IndexVersions(tmp_path)
+    assert versions.current() is None
+
+    first = _publish(versions, "one")
+    assert versions.current() == first
+    assert (versions.directory(first) / "marker.txt").read_text() == "one"
+
+    with pytest.raises(RuntimeError):
+        with versions.build() as directory:
+            raise RuntimeError("embedding quota exhausted")
+    assert not directory.exists()
+    assert versions.current() == first
+    assert not list(tmp_path.glob("CURRENT.*"))
+
+
+def test_rollback_and_unknown_version(tmp_path):
+    versions = IndexVersions(tmp_path)
+    first = _publish(versions, "one")
+    _publish(versions, "two")
+
+    versions.publish(first)
+    assert versions.current() == first
+    with pytest.raises(FileNotFoundError):
+        versions.publish("missing")
+
+
+def test_garbage_collection_respects_keep_and_retention(tmp_path):
+    versions = IndexVersions(tmp_path)
+    published = [_publish(versions, str(i)) for i in range(4)]
+    in_progress = versions.create().name
+
+    assert versions.collect_garbage(keep=2, retention_seconds=3600) == []
+
+    removed = versions.collect_garbage(keep=2, retention_seconds=0)
+    assert set(removed) == set(published[:2])
+    remaining = {info.version for info in versions.list_versions()}
+    assert remaining == {published[2], published[3], in_progress}
+    assert versions.current() == published[3]
+
+
+def test_watcher_applies_new_versions_and_retries_failures(tmp_path):
+    versions = IndexVersions(tmp_path)
+    first = _publish(versions, "one")
+    applied = []
+    failures = [RuntimeError("not readable yet")]
+
+    def on_version(version, directory):
+        if failures:
+            raise failures.pop()
+        applied.append((version, (directory / "marker.txt").read_text()))
+
+    watcher = IndexWatcher(versions, on_version, version=first)
+    assert not watcher.check()
+
+    second = _publish(versions, "two")
+    assert not watcher.check()
+    assert watcher.check()
+    assert applied == [(second, "two")]
+    assert watcher.version == second
+    assert not watcher.check()
+
+
+class BlockingStore:
+    """Vector store whose searches wait for ``release`` and report which store served them."""
+
+    def __init__(self, name):
+        from langchain_core.documents import Document
+
+        self.document = Document(page_content=f"served by {name}")
+        self.release = threading.Event()
+        self.release.set()
+        self.entered = threading.Event()
+
+    def similarity_search(self, query, k=4):
+        self.entered.set()
+        self.release.wait()
+        return [self.document]
+
+
+def test_chain_swaps_index_after_draining_in_flight_queries():
+    pytest.importorskip("langchain_core")
+    from src.rag_chain import RAGChainConfig, ReviewRAGChain
+    from src.stubs import StubChatModel
+
+    old, new = BlockingStore("old"), BlockingStore("new")
+    config = RAGChainConfig(chat_model="stub", api_key="", top_k=1)
+    chain = ReviewRAGChain(old, config, chat_model=StubChatModel(latency_seconds=0.0), index_version="v1")
+
+    old.release.clear()
+    in_flight = []
+    query = threading.Thread(target=lambda: in_flight.extend(chain.retrieve_relevant_documents("parking?")))
+    query.start()
+    assert old.entered.wait(1.0)
+
+    swap = threading.Thread(target=chain.swap_vector_store, args=(new,), kwargs={"version": "v2"})
+    swap.start()
+    time.sleep(0.05)
+    assert swap.is_alive()
+    assert chain.index_version == "v2"
+    assert chain.retrieve_relevant_documents("parking?")[0].page_content == "served by new"
+
+    old.release.set()
+    query.join(1.0)
+    swap.join(1.0)
+    assert not swap.is_alive()
+    assert in_flight[0].page_content == "served by old"
+    assert chain.metrics()["index"] == {"version": "v2", "swaps": 1}
+
+
+def test_swap_gives_up_draining_after_timeout():
+    pytest.importorskip("langchain_core")
+    from src.rag_chain import RAGChainConfig, ReviewRAGChain
+    from src.stubs import StubChatModel
+
+    old = BlockingStore("old")
+    config = RAGChainConfig(chat_model="stub", api_key="", top_k=1)
+    chain = ReviewRAGChain(old, config, chat_model=StubChatModel(latency_seconds=0.0))
+
+    old.release.clear()
+    query = threading.Thread(target=chain.retrieve_relevant_documents, args=("parking?",))
+    query.start()
+    assert old.entered.wait(1.0)
+    assert not chain.swap_vector_store(BlockingStore("new"), version="v2", drain_timeout_seconds=0.05)
+    old.release.set()
+    query.join(1.0)